@@ -0,0 +1,279 @@
+import argparse
+import json
+import os
+import sys
+import multiprocessing
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.correr import RAIZ, _commit
+from benchmarks.generador import escribir_conjunto
+
+# ============================
+# Prueba de carga por página (streamlit.testing AppTest)
+# ============================
+# Cada sesión simulada recorre las páginas como lo haría un usuario: abre
+# cada página y ejecuta sus interacciones guionadas (buscar y elegir ruta,
+# registrar y cerrar un tráfico, filtrar fechas, paginar...). Se mide el
+# tiempo de cada rerun y se reporta p50/p95/p99 por página e interacción.
+# AppTest no se puede usar desde varios hilos a la vez (instala un Runtime
+# global), así que las sesiones simultáneas corren en procesos: dentro de
+# cada proceso las sesiones comparten los cachés de picus como en el
+# servidor real, y entre procesos las escrituras pasan por los candados de
+# archivo.
+#
+# python -m benchmarks.carga_paginas --rutas 20000 --sesiones 40 --paralelas 8
+
+PAGINAS = {
+    "inicio": "🏠 Home.py",
+    "captura": "pages/0_🛣️ Captura de Rutas.py",
+    "consulta": "pages/1_🔍 Consulta Individual de Ruta.py",
+    "simulador": "pages/2_🔁 Simulador Vuelta Redonda.py",
+    "programacion": "pages/3_🚚 Programación de Viajes.py",
+    "gestion": "pages/4_🗂️ Gestión de Rutas Cortas.py",
+    "administracion": "pages/5_📂 Administración de Archivos.py",
+    "diagnostico": "pages/6_🩺 Diagnóstico.py",
+    "sensibilidad": "pages/7_🎲 Sensibilidad Diesel y Tipo de Cambio.py",
+}
+TIEMPO_MAXIMO = 120
+
+
+class SinWidget(Exception):
+    pass
+
+
+def _widget(at, tipo, etiqueta):
+    for w in getattr(at, tipo):
+        if w.label == etiqueta:
+            return w
+    raise SinWidget(f"{tipo} '{etiqueta}'")
+
+
+def _boton(at, etiqueta):
+    # Los botones llevan emoji; basta con que la etiqueta contenga el texto
+    for b in at.button:
+        if etiqueta in b.label:
+            return b
+    raise SinWidget(f"button '{etiqueta}'")
+
+
+def _segunda_opcion(at, etiqueta):
+    caja = _widget(at, "selectbox", etiqueta)
+    if len(caja.options) < 2:
+        return
+    # AppTest compara el valor ya formateado; con format_func=dict.get (las
+    # etiquetas precalculadas de las páginas) hay que pasar la llave original
+    opcion = caja.options[1]
+    mapa = getattr(caja.format_func, "__self__", None)
+    if isinstance(mapa, dict):
+        opcion = next((llave for llave, texto in mapa.items() if texto == opcion), opcion)
+    caja.set_value(opcion)
+
+
+# ---------- Guiones por página: lista de (interacción, acción antes del rerun) ----------
+
+def _guion_captura(at, sesion):
+    def revisar():
+        _widget(at, "text_input", "Nombre Cliente").input(f"CARGA {sesion}")
+        _widget(at, "text_input", "Origen").input("MONTERREY")
+        _widget(at, "text_input", "Destino").input("LAREDO")
+        _widget(at, "number_input", "Kilómetros").set_value(230.0)
+        _widget(at, "number_input", "Ingreso Flete").set_value(18000.0)
+        _boton(at, "Revisar Ruta").click()
+    return [("revisar_ruta", revisar)]
+
+
+def _guion_consulta(at, sesion):
+    return [
+        ("buscar", lambda: _widget(at, "text_input", "Buscar por cliente, origen o destino").input("mon")),
+        ("seleccionar_ruta", lambda: _segunda_opcion(at, "Selecciona índice")),
+    ]
+
+
+def _guion_simulador(at, sesion):
+    return [
+        ("buscar", lambda: _widget(at, "text_input", "Buscar ruta (cliente, origen o destino)").input("lar")),
+        ("seleccionar_ruta", lambda: _segunda_opcion(at, "Selecciona una ruta")),
+        ("cambiar_tipo", lambda: _widget(at, "selectbox", "Tipo de ruta inicial").select("EXPO")),
+    ]
+
+
+def _guion_programacion(at, sesion):
+    trafico = f"CARGA{sesion}"
+
+    def registrar():
+        _widget(at, "text_input", "Número de Tráfico").input(trafico)
+        _widget(at, "text_input", "Unidad").input(f"U{sesion}")
+        _widget(at, "text_input", "Operador").input(f"OPERADOR {sesion}")
+        _boton(at, "Registrar Tráfico").click()
+
+    def elegir_pendiente():
+        caja = _widget(at, "selectbox", "Selecciona un tráfico pendiente")
+        propias = [o for o in caja.options if o.startswith(trafico + "_")]
+        if propias:
+            caja.select(propias[0])
+
+    def filtrar_fechas():
+        hoy = datetime.today().date()
+        _widget(at, "date_input", "Fecha inicio").set_value(hoy - timedelta(days=30))
+        _widget(at, "date_input", "Fecha fin").set_value(hoy)
+
+    return [
+        ("seleccionar_ruta", lambda: _segunda_opcion(at, "Selecciona una ruta")),
+        ("registrar_trafico", registrar),
+        ("elegir_pendiente", elegir_pendiente),
+        ("cerrar_trafico", lambda: _boton(at, "Guardar y cerrar tráfico").click()),
+        ("filtrar_fechas", filtrar_fechas),
+    ]
+
+
+def _guion_gestion(at, sesion):
+    def paginar():
+        caja = [n for n in at.number_input if n.label.startswith("Página")][0]
+        paginas = int(re.search(r"de (\d+)", caja.label).group(1))
+        caja.set_value(min(2, paginas))
+    return [
+        ("filtrar", lambda: _widget(at, "text_input", "Cliente contiene").input("CLIENTE 00")),
+        ("ordenar", lambda: _widget(at, "selectbox", "Ordenar por").select("% Utilidad")),
+        ("paginar", paginar),
+    ]
+
+
+def _guion_sensibilidad(at, sesion):
+    def simular():
+        _widget(at, "number_input", "Escenarios").set_value(2000)
+        _boton(at, "Simular escenarios").click()
+    return [("simular", simular)]
+
+
+GUIONES = {
+    "captura": _guion_captura,
+    "consulta": _guion_consulta,
+    "simulador": _guion_simulador,
+    "programacion": _guion_programacion,
+    "gestion": _guion_gestion,
+    "sensibilidad": _guion_sensibilidad,
+}
+
+
+def _rerun(at, registros, pagina, interaccion):
+    inicio = time.perf_counter()
+    try:
+        at.run()
+        errores = [e.message for e in at.exception]
+    except Exception as e:
+        errores = [f"{type(e).__name__}: {e}"]
+    ms = (time.perf_counter() - inicio) * 1000
+    registros.append({"pagina": pagina, "interaccion": interaccion, "ms": ms,
+                      "error": errores[0][:200] if errores else None})
+    return not errores
+
+
+def sesion(numero, paginas=None):
+    # Un usuario que recorre todas las páginas en orden
+    from streamlit.testing.v1 import AppTest
+
+    registros = []
+    for pagina, archivo in PAGINAS.items():
+        if paginas and pagina not in paginas:
+            continue
+        at = AppTest.from_file(os.path.join(RAIZ, archivo), default_timeout=TIEMPO_MAXIMO)
+        if not _rerun(at, registros, pagina, "abrir"):
+            continue
+        for interaccion, accion in GUIONES.get(pagina, lambda *_: [])(at, numero):
+            try:
+                accion()
+            except (SinWidget, IndexError, ValueError) as e:
+                registros.append({"pagina": pagina, "interaccion": interaccion, "ms": np.nan,
+                                  "error": f"{type(e).__name__}: {e}"})
+                continue
+            if not _rerun(at, registros, pagina, interaccion):
+                break
+    return registros
+
+
+def resumir(registros):
+    df = pd.DataFrame(registros)
+    def fila(grupo):
+        ms = grupo["ms"].dropna()
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99]) if len(ms) else (np.nan,) * 3
+        return pd.Series({
+            "reruns": len(ms), "errores": int(grupo["error"].notna().sum()),
+            "p50_ms": round(p50, 1), "p95_ms": round(p95, 1), "p99_ms": round(p99, 1),
+            "max_ms": round(ms.max(), 1) if len(ms) else np.nan,
+        })
+    por_interaccion = df.groupby(["pagina", "interaccion"], sort=False)[["ms", "error"]].apply(fila).reset_index()
+    por_pagina = df.groupby("pagina", sort=False)[["ms", "error"]].apply(fila).reset_index()
+    errores = df.loc[df["error"].notna(), ["pagina", "interaccion", "error"]].drop_duplicates()
+    return por_pagina, por_interaccion, errores
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga de las páginas de PICUS")
+    parser.add_argument("--rutas", type=int, default=10000, help="Tamaño del catálogo generado")
+    parser.add_argument("--viajes", type=int, help="Tráficos generados (por defecto la mitad de las rutas)")
+    parser.add_argument("--carpeta", help="Usar datos existentes en lugar de generarlos")
+    parser.add_argument("--sesiones", type=int, default=20)
+    parser.add_argument("--paralelas", type=int, default=4, help="Sesiones simultáneas")
+    parser.add_argument("--paginas", nargs="*", choices=list(PAGINAS), help="Solo estas páginas")
+    parser.add_argument("--salida", default="reporte_carga.json")
+    args = parser.parse_args(argv)
+
+    salida = os.path.abspath(args.salida)
+    if RAIZ not in sys.path:
+        sys.path.insert(0, RAIZ)
+    temporal = None
+    carpeta = args.carpeta
+    if carpeta is None:
+        temporal = tempfile.TemporaryDirectory(prefix="picus_carga_")
+        carpeta = temporal.name
+        escribir_conjunto(carpeta, args.rutas, args.viajes)
+    # Las páginas usan rutas relativas al directorio de trabajo
+    os.chdir(carpeta)
+
+    try:
+        inicio = time.perf_counter()
+        # AppTest reemplaza __main__ en los procesos hijos; la función se manda
+        # por su nombre de módulo real para que se pueda volver a encontrar
+        from benchmarks import carga_paginas
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=args.paralelas, mp_context=contexto) as grupo:
+            lotes = list(grupo.map(carga_paginas.sesion, range(args.sesiones), [args.paginas] * args.sesiones))
+        segundos = time.perf_counter() - inicio
+    finally:
+        if temporal is not None:
+            os.chdir(RAIZ)
+            temporal.cleanup()
+
+    registros = [r for lote in lotes for r in lote]
+    por_pagina, por_interaccion, errores = resumir(registros)
+    reporte = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "rutas": args.rutas if args.carpeta is None else None,
+        "sesiones": args.sesiones,
+        "paralelas": args.paralelas,
+        "segundos": round(segundos, 1),
+        "por_pagina": por_pagina.to_dict("records"),
+        "por_interaccion": por_interaccion.to_dict("records"),
+        "errores": errores.to_dict("records"),
+    }
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, ensure_ascii=False, indent=2, default=float)
+
+    print(por_interaccion.to_string(index=False), file=sys.stderr)
+    if not errores.empty:
+        print(f"⚠️ {len(errores)} interacciones con error:", file=sys.stderr)
+        print(errores.to_string(index=False), file=sys.stderr)
+    print(f"✅ {len(registros)} reruns en {segundos:.1f} s; reporte en {salida}", file=sys.stderr)
+    return 0 if errores.empty else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generador import escribir_conjunto
+
+# ============================
+# Suite de rendimiento: genera datos por tamaño, corre los escenarios y
+# escribe un reporte JSON comparable entre versiones
+# ============================
+# python -m benchmarks.correr --tamanos 10000 100000 --salida reporte.json
+# python -m benchmarks.correr --comparar reporte_anterior.json
+# Cada tamaño corre en un proceso aparte para que los cachés de uno no
+# afecten al siguiente.
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TAMANOS = [10000, 100000]
+UMBRAL_REGRESION = 0.25
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def correr_tamano(carpeta, repeticiones, motor, escenarios=None):
+    entorno = dict(os.environ, PICUS_ALMACEN=motor,
+                   PYTHONPATH=os.pathsep.join(filter(None, [RAIZ, os.environ.get("PYTHONPATH")])))
+    proceso = subprocess.run(
+        [sys.executable, "-m", "benchmarks.escenarios", str(repeticiones), ",".join(escenarios or [])],
+        cwd=carpeta, env=entorno, capture_output=True, text=True,
+    )
+    if proceso.returncode != 0:
+        raise RuntimeError(proceso.stderr)
+    return json.loads(proceso.stdout)
+
+
+def comparar(actual, anterior, umbral=UMBRAL_REGRESION):
+    # Cambio de la mediana por (tamaño, escenario); positivo = más lento
+    clave = ["tamano", "escenario"]
+    nuevo = pd.DataFrame(actual["resultados"]).set_index(clave)["mediana_ms"]
+    viejo = pd.DataFrame(anterior["resultados"]).set_index(clave)["mediana_ms"]
+    tabla = pd.concat({"antes_ms": viejo, "ahora_ms": nuevo}, axis=1, join="inner")
+    tabla["cambio_%"] = ((tabla["ahora_ms"] / tabla["antes_ms"] - 1) * 100).round(1)
+    tabla["regresion"] = tabla["cambio_%"] > umbral * 100
+    return tabla.reset_index()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Suite de rendimiento de PICUS")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=TAMANOS, help="Número de rutas por corrida")
+    parser.add_argument("--viajes-por-ruta", type=float, default=0.5, help="Tráficos generados por cada ruta")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--motor", default=os.environ.get("PICUS_ALMACEN", "csv"), choices=["csv", "sqlite", "parquet"])
+    parser.add_argument("--escenarios", nargs="*", help="Solo estos escenarios")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", default="reporte_rendimiento.json")
+    parser.add_argument("--comparar", help="Reporte anterior contra el cual comparar")
+    parser.add_argument("--umbral", type=float, default=UMBRAL_REGRESION, help="Fracción de aumento que cuenta como regresión")
+    args = parser.parse_args(argv)
+
+    reporte = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "motor": args.motor,
+        "repeticiones": args.repeticiones,
+        "resultados": [],
+    }
+    for tamano in args.tamanos:
+        with tempfile.TemporaryDirectory(prefix=f"picus_{tamano}_") as carpeta:
+            rutas, tramos = escribir_conjunto(carpeta, tamano, int(tamano * args.viajes_por_ruta), args.semilla)
+            print(f"⏱️ {rutas} rutas / {tramos} tramos ({args.motor})", file=sys.stderr)
+            for fila in correr_tamano(carpeta, args.repeticiones, args.motor, args.escenarios):
+                fila = {"tamano": tamano, "tramos_viaje": tramos, **fila}
+                reporte["resultados"].append(fila)
+                print(f"   {fila['escenario']:<20} {fila['mediana_ms']:>10.1f} ms", file=sys.stderr)
+
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, ensure_ascii=False, indent=2)
+    print(f"✅ Reporte escrito en {args.salida}", file=sys.stderr)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            tabla = comparar(reporte, json.load(f), args.umbral)
+        print(tabla.to_string(index=False), file=sys.stderr)
+        if tabla["regresion"].any():
+            print("⚠️ Hay escenarios más lentos que el umbral", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
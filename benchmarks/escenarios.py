@@ -0,0 +1,197 @@
+import json
+import statistics
+import sys
+import time
+
+import pandas as pd
+
+from picus import busqueda, consultas, grafo, ranking, repositorio
+from picus.almacenamiento import AlmacenCSV, crear_almacen, migrar, obtener_almacen
+from picus.cotizador import cotizar_carriles
+from picus.importacion import COLUMNAS_PLANTILLA
+from picus.indice_viajes import CONCLUIDO, PENDIENTE, ids_con_estado
+from picus.parametros import cargar_datos_generales
+from picus.retornos import cadenas_regreso
+from picus.sensibilidad import N_ESCENARIOS, analizar_portafolio
+from picus.viajes import comparar_recosteo, costear_por_fecha, parchar_tramo, resumen_traficos
+
+# ============================
+# Escenarios cronometrados (un proceso por tamaño de datos)
+# ============================
+# Se corre con el directorio de trabajo apuntando a una carpeta generada por
+# benchmarks.generador. Cada escenario tiene un paso `preparar` (no se mide),
+# que deja fríos los cachés que el escenario quiere medir, y un paso `correr`.
+# Imprime en stdout una lista JSON con los tiempos en milisegundos.
+
+CARRILES_LOTE = 10000
+COLUMNAS_RESUMEN = ["ID_Programacion", "Número_Trafico", "Fecha", "Ingreso Total", "Costo_Total_Ruta"]
+
+
+def _nada():
+    pass
+
+
+def _medir(preparar, correr, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        preparar()
+        inicio = time.perf_counter()
+        correr()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+
+class Contexto:
+    # Datos que varios escenarios comparten; se arman una vez fuera del cronómetro
+    def __init__(self):
+        self.almacen = obtener_almacen()
+        self.rutas = repositorio.rutas_rc()
+        self.valores = cargar_datos_generales()
+        self.hub = self.rutas["Origen"].value_counts().index[0]
+        indice = self.almacen.indice_viajes()
+        pendientes = ids_con_estado(indice, PENDIENTE).tolist()
+        viajes = self.almacen.leer_programaciones(pendientes)
+        self.idas = viajes[viajes["Tramo"] == "IDA"].set_index("ID_Programacion")
+        self.id_edicion = pendientes[0] if len(pendientes) else None
+        self.carriles = self.rutas.sample(min(CARRILES_LOTE, len(self.rutas)), random_state=0)[COLUMNAS_PLANTILLA]
+        self.nueva_ruta = self.rutas.iloc[[0]].drop(columns=repositorio.COLUMNAS_DERIVADAS)
+        self.nuevo_viaje = viajes.iloc[[0]] if not viajes.empty else None
+        self.altas = 0
+
+
+def _leer_rutas(ctx):
+    repositorio.rutas_rc()
+
+
+def _filtrar_rc(ctx):
+    filtros = {"cliente": "CLIENTE 00", "tipos": ["IMPO", "EXPO"], "margen_min": 20.0}
+    consultas.ordenar_rutas(filtros, "% Utilidad", True)
+
+
+def _buscar_prefijo(ctx):
+    busqueda.buscar_rutas("mon sal")
+
+
+def _ranking(ctx):
+    ranking.ranking_vueltas()
+
+
+def _cadenas_grafo(ctx):
+    grafo.obtener_grafo().tabla_cadenas(ctx.hub, max_tramos=4, k=5)
+
+
+def _optimizar_regresos(ctx):
+    cadenas_regreso(ctx.idas, ctx.rutas)
+
+
+def _resumen_concluidos(ctx):
+    indice = ctx.almacen.indice_viajes()
+    concluidos = indice[indice["Estado"] == CONCLUIDO]
+    fechas = pd.to_datetime(concluidos["Fecha"])
+    viajes = ctx.almacen.leer_viajes(desde=fechas.min(), hasta=fechas.max(), columnas=COLUMNAS_RESUMEN)
+    resumen_traficos(viajes[viajes["ID_Programacion"].isin(concluidos["ID_Programacion"])])
+
+
+def _recosteo_historico(ctx):
+    # Todo el historial contra los Datos Generales vigentes en cada fecha
+    tramos = ctx.almacen.leer_viajes()
+    comparar_recosteo(tramos, costear_por_fecha(tramos))
+
+
+def _cotizar_lote(ctx):
+    cotizar_carriles(ctx.carriles, ctx.valores)
+
+
+def _sensibilidad(ctx):
+    analizar_portafolio(ctx.rutas, ctx.valores, N_ESCENARIOS)
+
+
+def _agregar_ruta(ctx):
+    repositorio.agregar_rutas(ctx.nueva_ruta)
+
+
+def _registrar_trafico(ctx):
+    ctx.altas += 1
+    fila = ctx.nuevo_viaje.assign(ID_Programacion=f"BENCH{ctx.altas}", Número_Trafico=f"BENCH{ctx.altas}")
+    ctx.almacen.agregar_viajes(fila)
+
+
+def _editar_tramo(ctx):
+    parchar_tramo(ctx.id_edicion, "IDA", {"Stop": float(ctx.altas)})
+
+
+def _guardar_catalogo(ctx):
+    repositorio.guardar_rutas(ctx.rutas)
+
+
+def _frio_rutas():
+    repositorio.invalidar()
+
+
+def _frio_consultas():
+    with consultas._lock:
+        consultas._cache.clear()
+
+
+def _frio_busqueda():
+    with busqueda._lock:
+        busqueda._cache.update(version=None, indice=None)
+
+
+def _frio_ranking():
+    ranking._ranking = ranking.RankingVueltas()
+
+
+def _frio_grafo():
+    with grafo._lock:
+        grafo._cache.update(version=None, grafo=None)
+
+
+# (nombre, preparar, correr); el orden importa: las escrituras van al final
+ESCENARIOS = [
+    ("cargar_rutas", _frio_rutas, _leer_rutas),
+    ("filtrar_rc", _frio_consultas, _filtrar_rc),
+    ("indice_busqueda", _frio_busqueda, _buscar_prefijo),
+    ("buscar_prefijo", _nada, _buscar_prefijo),
+    ("ranking_vueltas", _frio_ranking, _ranking),
+    ("cadenas_grafo", _frio_grafo, _cadenas_grafo),
+    ("optimizar_regresos", _nada, _optimizar_regresos),
+    ("resumen_concluidos", _nada, _resumen_concluidos),
+    ("recosteo_historico", _nada, _recosteo_historico),
+    ("cotizar_lote", _nada, _cotizar_lote),
+    ("sensibilidad", _nada, _sensibilidad),
+    ("agregar_ruta", _nada, _agregar_ruta),
+    ("registrar_trafico", _nada, _registrar_trafico),
+    ("editar_tramo", _nada, _editar_tramo),
+    ("guardar_catalogo", _nada, _guardar_catalogo),
+]
+
+
+def correr(repeticiones=5, escenarios=None):
+    if obtener_almacen().nombre != "csv":
+        # Los datos generados están en CSV; se copian al motor configurado
+        migrar(AlmacenCSV(), crear_almacen())
+    ctx = Contexto()
+    resultados = []
+    for nombre, preparar, ejecutar in ESCENARIOS:
+        if escenarios and nombre not in escenarios:
+            continue
+        if nombre == "editar_tramo" and ctx.id_edicion is None:
+            continue
+        if nombre == "registrar_trafico" and ctx.nuevo_viaje is None:
+            continue
+        tiempos = _medir(preparar, lambda: ejecutar(ctx), repeticiones)
+        resultados.append({
+            "escenario": nombre,
+            "repeticiones": repeticiones,
+            "min_ms": round(min(tiempos), 3),
+            "mediana_ms": round(statistics.median(tiempos), 3),
+            "max_ms": round(max(tiempos), 3),
+        })
+    return resultados
+
+
+if __name__ == "__main__":
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    escenarios = sys.argv[2].split(",") if len(sys.argv) > 2 and sys.argv[2] else None
+    json.dump(correr(repeticiones, escenarios), sys.stdout)
@@ -0,0 +1,208 @@
+import argparse
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from picus.constantes import RUTA_DATOS, RUTA_HISTORIAL_DATOS, RUTA_PROG, RUTA_RUTAS
+from picus.importacion import COLUMNAS_PLANTILLA, preparar_rutas
+from picus.parametros import VALORES_DEFAULT, VIGENCIA
+
+# ============================
+# Datos sintéticos para pruebas de escala
+# ============================
+# Genera rutas_guardadas.csv, viajes_programados.csv, datos_generales.csv e
+# historial_datos_generales.csv con la misma forma que produce la app:
+# - Ubicaciones con coordenadas; los KM salen de la distancia entre ellas y
+#   pocas ubicaciones (hubs) concentran la mayoría de orígenes y destinos.
+# - Mezcla IMPO / EXPO / VACIO, fletes en MXN o USD, cruces y extras esporádicos.
+# - Tráficos con IDA y, si concluyeron, uno o dos tramos VUELTA (VACIO opcional
+#   + regreso) que salen de donde terminó el tramo anterior.
+# - Un cambio de diesel y tipo de cambio por mes en el historial; el último
+#   renglón son los Datos Generales vigentes.
+
+CIUDADES = [
+    "NUEVO LAREDO", "LAREDO", "MONTERREY", "SALTILLO", "QUERETARO", "SAN LUIS POTOSI",
+    "APODACA", "RAMOS ARIZPE", "CIUDAD JUAREZ", "EL PASO", "REYNOSA", "MCALLEN",
+    "CELAYA", "AGUASCALIENTES", "GUADALAJARA", "TOLUCA", "PUEBLA", "CDMX", "TORREON", "CHIHUAHUA",
+]
+MEZCLA_TIPOS = {"IMPO": 0.4, "EXPO": 0.4, "VACIO": 0.2}
+DIAS_HISTORIA = 365
+PORCENTAJE_CONCLUIDOS = 0.75
+PORCENTAJE_CON_VACIO = 0.3
+
+
+def _ubicaciones(n_rutas, rng):
+    total = max(len(CIUDADES), int(np.sqrt(n_rutas) * 2))
+    nombres = CIUDADES + [f"PLANTA {i:04d}" for i in range(1, total - len(CIUDADES) + 1)]
+    coordenadas = rng.uniform(0, 1200, size=(total, 2))
+    # Zipf suave: las primeras ubicaciones son hubs
+    peso = 1 / np.arange(1, total + 1) ** 0.8
+    return np.array(nombres), coordenadas, peso / peso.sum()
+
+
+def _fechas(n, rng, hasta=None):
+    hasta = hasta or date.today()
+    dias = rng.integers(0, DIAS_HISTORIA, n)
+    base = np.datetime64(hasta - timedelta(days=DIAS_HISTORIA))
+    return np.datetime_as_string(base + dias.astype("timedelta64[D]"), unit="D")
+
+
+def _esporadico(n, rng, probabilidad, minimo, maximo):
+    return np.where(rng.random(n) < probabilidad, rng.uniform(minimo, maximo, n).round(2), 0.0)
+
+
+def generar_rutas(n, valores=None, semilla=0):
+    rng = np.random.default_rng(semilla)
+    nombres, coordenadas, peso = _ubicaciones(n, rng)
+    origen = rng.choice(len(nombres), n, p=peso)
+    destino = rng.choice(len(nombres), n, p=peso)
+    iguales = origen == destino
+    destino[iguales] = (destino[iguales] + rng.integers(1, len(nombres), iguales.sum())) % len(nombres)
+
+    tipo = rng.choice(list(MEZCLA_TIPOS), n, p=list(MEZCLA_TIPOS.values()))
+    cargado = tipo != "VACIO"
+    km = (np.linalg.norm(coordenadas[origen] - coordenadas[destino], axis=1) * 1.25 + 5).round(1)
+    usd = cargado & (rng.random(n) < 0.35)
+    tarifa_mxn = km * rng.uniform(35, 70, n) + 2500
+    cruce = cargado & (rng.random(n) < 0.2)
+    cruce_usd = rng.uniform(100, 400, n).round(2)
+    clientes = max(10, n // 200)
+
+    carriles = pd.DataFrame({
+        "Fecha": _fechas(n, rng),
+        "Tipo": tipo,
+        "Cliente": np.char.add("CLIENTE ", np.char.zfill(rng.integers(1, clientes + 1, n).astype(str), 4)),
+        "Origen": nombres[origen],
+        "Destino": nombres[destino],
+        "KM": km,
+        "Moneda": np.where(usd, "USD", "MXN"),
+        "Ingreso_Original": np.where(cargado, np.where(usd, tarifa_mxn / 17.5, tarifa_mxn), 0.0).round(2),
+        "Moneda_Cruce": np.where(cruce, "USD", "MXN"),
+        "Cruce_Original": np.where(cruce, cruce_usd, 0.0),
+        "Moneda Costo Cruce": "MXN",
+        "Costo Cruce": np.where(cruce, cruce_usd * 17.5 * 0.6, 0.0).round(2),
+        "Casetas": (km * rng.uniform(1.5, 4, n)).round(0),
+        "Movimiento_Local": _esporadico(n, rng, 0.1, 500, 1500),
+        "Puntualidad": _esporadico(n, rng, 0.1, 200, 600),
+        "Pension": _esporadico(n, rng, 0.05, 300, 900),
+        "Estancia": _esporadico(n, rng, 0.05, 500, 2500),
+        "Pistas Extra": _esporadico(n, rng, 0.02, 200, 800),
+        "Stop": _esporadico(n, rng, 0.02, 300, 700),
+        "Falso": _esporadico(n, rng, 0.01, 1000, 3000),
+        "Gatas": _esporadico(n, rng, 0.02, 200, 500),
+        "Accesorios": _esporadico(n, rng, 0.02, 100, 400),
+        "Guías": _esporadico(n, rng, 0.05, 50, 200),
+    })[COLUMNAS_PLANTILLA]
+    return preparar_rutas(carriles, valores or VALORES_DEFAULT)
+
+
+def _siguiente_tramo(candidatas, origenes, rng):
+    # Para cada origen, una ruta de `candidatas` que salga de ahí (o cualquiera si no hay)
+    agrupadas = candidatas.sort_values("Origen", kind="stable")
+    llaves = agrupadas["Origen"].to_numpy()
+    inicio = np.searchsorted(llaves, origenes, side="left")
+    cuantas = np.searchsorted(llaves, origenes, side="right") - inicio
+    al_azar = rng.integers(0, len(agrupadas), len(origenes))
+    desplazamiento = (rng.random(len(origenes)) * np.maximum(cuantas, 1)).astype(int)
+    posicion = np.where(cuantas > 0, inicio + desplazamiento, al_azar)
+    return agrupadas.index.to_numpy()[posicion]
+
+
+def generar_viajes(rutas, n, semilla=0):
+    rng = np.random.default_rng(semilla + 1)
+    cargadas = rutas[rutas["Tipo"] != "VACIO"]
+    vacios = rutas[rutas["Tipo"] == "VACIO"]
+    unidades = max(10, n // 30)
+
+    trafico = np.char.add("TR", np.char.zfill(np.arange(1, n + 1).astype(str), 7))
+    fecha = _fechas(n, rng)
+    viaje = pd.DataFrame({
+        "Fecha": fecha,
+        "Número_Trafico": trafico,
+        "Unidad": np.char.add("U", rng.integers(1, unidades + 1, n).astype(str)),
+        "Operador": np.char.add("OPERADOR ", rng.integers(1, unidades + 1, n).astype(str)),
+        "ID_Programacion": np.char.add(np.char.add(trafico, "_"), fecha),
+    })
+
+    ida = cargadas.index.to_numpy()[rng.integers(0, len(cargadas), n)]
+    tramos = [(np.arange(n), ida, "IDA")]
+
+    concluidos = np.flatnonzero(rng.random(n) < PORCENTAJE_CONCLUIDOS)
+    destino = rutas.loc[ida[concluidos], "Destino"].to_numpy()
+    con_vacio = concluidos[rng.random(len(concluidos)) < PORCENTAJE_CON_VACIO] if len(vacios) else concluidos[:0]
+    if len(con_vacio):
+        vacio = _siguiente_tramo(vacios, rutas.loc[ida[con_vacio], "Destino"].to_numpy(), rng)
+        tramos.append((con_vacio, vacio, "VUELTA"))
+        posicion = np.searchsorted(concluidos, con_vacio)
+        destino[posicion] = rutas.loc[vacio, "Destino"].to_numpy()
+    # El regreso es del tipo contrario a la IDA (IMPO → EXPO y viceversa)
+    regreso = np.empty(len(concluidos), dtype=ida.dtype)
+    tipo_ida = rutas.loc[ida[concluidos], "Tipo"].to_numpy()
+    for tipo, contrario in (("IMPO", "EXPO"), ("EXPO", "IMPO")):
+        sel = tipo_ida == tipo
+        candidatas = cargadas[cargadas["Tipo"] == contrario]
+        if sel.any() and len(candidatas):
+            regreso[sel] = _siguiente_tramo(candidatas, destino[sel], rng)
+        elif sel.any():
+            regreso[sel] = _siguiente_tramo(cargadas, destino[sel], rng)
+    tramos.append((concluidos, regreso, "VUELTA"))
+
+    partes = []
+    for orden, (filas, indices, nombre) in enumerate(tramos):
+        parte = rutas.loc[indices].reset_index(drop=True)
+        datos = viaje.iloc[filas].reset_index(drop=True)
+        parte["Fecha"] = datos["Fecha"]
+        for col in ["Número_Trafico", "Unidad", "Operador"]:
+            parte[col] = datos[col]
+        parte["Tramo"] = nombre
+        parte["ID_Programacion"] = datos["ID_Programacion"]
+        parte["_viaje"] = filas
+        parte["_orden"] = orden
+        partes.append(parte)
+    viajes = pd.concat(partes, ignore_index=True).sort_values(["_viaje", "_orden"], kind="stable")
+    return viajes.drop(columns=["_viaje", "_orden"]).reset_index(drop=True)
+
+
+def generar_historial(semilla=0, hasta=None):
+    # Caminata hacia atrás desde los valores vigentes, un renglón por mes
+    rng = np.random.default_rng(semilla + 2)
+    hasta = hasta or date.today()
+    meses = DIAS_HISTORIA // 30 + 1
+    vigencias = [hasta - timedelta(days=30 * i) for i in range(meses)][::-1]
+    historial = pd.DataFrame([VALORES_DEFAULT] * meses)
+    for parametro in ("Costo Diesel", "Tipo de cambio USD"):
+        pasos = np.concatenate([[1.0], 1 + rng.normal(0, 0.03, meses - 1)])
+        historial[parametro] = (VALORES_DEFAULT[parametro] / np.cumprod(pasos))[::-1].round(2)
+    historial.insert(0, VIGENCIA, [v.isoformat() for v in vigencias])
+    return historial
+
+
+def escribir_conjunto(carpeta, n_rutas, n_viajes=None, semilla=0):
+    # Escribe los tres archivos en `carpeta` con los nombres que usa la app
+    os.makedirs(carpeta, exist_ok=True)
+    n_viajes = n_rutas // 2 if n_viajes is None else n_viajes
+    rutas = generar_rutas(n_rutas, semilla=semilla)
+    viajes = generar_viajes(rutas, n_viajes, semilla=semilla)
+    pd.DataFrame(VALORES_DEFAULT.items(), columns=["Parametro", "Valor"]).to_csv(
+        os.path.join(carpeta, RUTA_DATOS), index=False)
+    generar_historial(semilla).to_csv(os.path.join(carpeta, RUTA_HISTORIAL_DATOS), index=False)
+    rutas.to_csv(os.path.join(carpeta, RUTA_RUTAS), index=False)
+    viajes.to_csv(os.path.join(carpeta, RUTA_PROG), index=False)
+    return len(rutas), len(viajes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos de PICUS")
+    parser.add_argument("carpeta")
+    parser.add_argument("--rutas", type=int, default=10000)
+    parser.add_argument("--viajes", type=int, help="Tráficos (por defecto la mitad de las rutas)")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args(argv)
+    rutas, tramos = escribir_conjunto(args.carpeta, args.rutas, args.viajes, args.semilla)
+    print(f"✅ {rutas} rutas y {tramos} tramos de viaje en {args.carpeta}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,17 @@
 import streamlit as st
-import pandas as pd
-import os
 from datetime import datetime
 
-# Rutas de archivos
-RUTA_RUTAS = "rutas_guardadas.csv"
-RUTA_DATOS = "datos_generales.csv"
+from picus.costos import calcular_ruta
+from picus.importacion import leer_archivo, plantilla_csv, preparar_rutas, validar
+from picus.metricas import medir
+from picus.parametros import cargar_datos_generales, guardar_datos_generales
+from picus.repositorio import agregar_ruta, agregar_rutas, repreciar_catalogo
 
-# ============================
-# Funciones auxiliares
-# ============================
-def safe_number(x):
-    return 0 if (x is None or (isinstance(x, float) and pd.isna(x))) else x
-
-def cargar_datos_generales():
-    if os.path.exists(RUTA_DATOS):
-        return pd.read_csv(RUTA_DATOS).set_index("Parametro").to_dict()["Valor"]
-    return {
-        "Sueldo por Viaje": 300.0,
-        "Bono ISR IMSS por Viaje": 185.06,
-        "Bono Rendimiento": 0.0,
-        "Rendimiento Camion": 2.5,
-        "Costo Diesel": 24.0,
-        "Tipo de cambio USD": 17.5,
-        "Tipo de cambio MXN": 1.0
-    }
-
-def guardar_datos_generales(valores):
-    df = pd.DataFrame(valores.items(), columns=["Parametro", "Valor"])
-    df.to_csv(RUTA_DATOS, index=False)
-
-valores = cargar_datos_generales()
-
-# Cargar valores dinámicos desde datos generales
-SUELDO_POR_VIAJE = float(valores.get("Sueldo por Viaje", 300))
-BONO_ISR_POR_VIAJE = float(valores.get("Bono ISR IMSS por Viaje", 185.06))
-BONO_RENDIMIENTO = float(valores.get("Bono Rendimiento", 0))
+PAGINA = "captura"
+
+with medir(PAGINA, "cargar datos generales"):
+    valores = cargar_datos_generales()
+valores_guardados = dict(valores)
 
 st.title("🚛 Captura de Rutas Cortas - PICUS")
 
@@ -52,21 +28,27 @@ with st.expander("⚙️ Configurar Datos Generales"):
         valores["Tipo de cambio USD"] = st.number_input("Tipo de cambio USD", value=float(valores.get("Tipo de cambio USD", 17.5)), step=0.1)
         valores["Tipo de cambio MXN"] = st.number_input("Tipo de cambio MXN", value=float(valores.get("Tipo de cambio MXN", 1.0)), step=0.1)
 
+    # Una fecha pasada corrige el historial (p. ej. el diesel subió el día 1); los
+    # tráficos se recostean desde Programación de Viajes
+    vigente_desde = st.date_input("Vigentes desde", value=datetime.today(), max_value=datetime.today())
+    recalcular = st.checkbox("Recalcular todas las rutas guardadas con estos datos", value=True)
     if st.button("Guardar Datos Generales"):
-        guardar_datos_generales(valores)
-        st.success("✅ Datos Generales guardados correctamente.")
-
-if os.path.exists(RUTA_RUTAS):
-    df_rutas = pd.read_csv(RUTA_RUTAS)
-else:
-    df_rutas = pd.DataFrame()
+        with medir(PAGINA, "guardar datos generales"):
+            vigentes = guardar_datos_generales(valores, vigente_desde)
+        st.success(f"✅ Datos Generales guardados con vigencia desde {vigente_desde:%Y-%m-%d}.")
+        if vigentes != valores:
+            st.info("ℹ️ Hay un cambio posterior a esa fecha; los valores de hoy no cambiaron.")
+        if recalcular:
+            with medir(PAGINA, "guardar repreciado del catálogo"):
+                recalculadas = repreciar_catalogo(vigentes, valores_guardados)
+            st.success(f"✅ {recalculadas} rutas recalculadas con los nuevos datos.")
 
 st.subheader("📥 Nueva Ruta Corta")
 
 if "mostrar_guardar" not in st.session_state:
     st.session_state.mostrar_guardar = False
 
-with st.form("captura_ruta_corta"):
+with medir(PAGINA, "render formulario"), st.form("captura_ruta_corta"):
     col1, col2 = st.columns(2)
 
     with col1:
@@ -104,47 +86,68 @@ with st.form("captura_ruta_corta"):
 
     revisar = st.form_submit_button("🔍 Revisar Ruta")
     if revisar:
-        tipo_cambio_flete = valores["Tipo de cambio USD"] if moneda_ingreso == "USD" else valores["Tipo de cambio MXN"]
-        tipo_cambio_cruce = valores["Tipo de cambio USD"] if moneda_cruce == "USD" else valores["Tipo de cambio MXN"]
-        tipo_cambio_costo_cruce = valores["Tipo de cambio USD"] if moneda_costo_cruce == "USD" else valores["Tipo de cambio MXN"]
-
-        ingreso_flete_convertido = ingreso_flete * tipo_cambio_flete
-        ingreso_cruce_convertido = ingreso_cruce * tipo_cambio_cruce
-        costo_cruce_convertido = costo_cruce * tipo_cambio_costo_cruce
-        ingreso_total = ingreso_flete_convertido + ingreso_cruce_convertido
-
-        costo_diesel_camion = (km / valores["Rendimiento Camion"]) * valores["Costo Diesel"]
-        extras = sum(map(safe_number, [
-            movimiento_local, puntualidad, pension, estancia,
-            pistas_extra, stop, falso, gatas, accesorios, guias
-        ]))
-
-        costo_total = costo_diesel_camion + SUELDO_POR_VIAJE + BONO_ISR_POR_VIAJE + BONO_RENDIMIENTO + casetas + extras + costo_cruce_convertido
+        with medir(PAGINA, "calcular ruta"):
+            ruta_previa = calcular_ruta({
+                "Fecha": fecha, "Tipo": tipo, "Cliente": cliente, "Origen": origen, "Destino": destino,
+                "KM": km, "Moneda": moneda_ingreso, "Ingreso_Original": ingreso_flete,
+                "Moneda_Cruce": moneda_cruce, "Cruce_Original": ingreso_cruce,
+                "Moneda Costo Cruce": moneda_costo_cruce, "Costo Cruce": costo_cruce,
+                "Casetas": casetas,
+                "Movimiento_Local": movimiento_local, "Puntualidad": puntualidad, "Pension": pension,
+                "Estancia": estancia, "Pistas Extra": pistas_extra, "Stop": stop, "Falso": falso,
+                "Gatas": gatas, "Accesorios": accesorios, "Guías": guias,
+                "Clasificacion Ruta": "RC"
+            }, valores)
 
         st.success("✅ Revisión exitosa. Verifica y guarda si todo es correcto.")
 
-        st.session_state.ruta_previa = {
-            "Fecha": fecha, "Tipo": tipo, "Cliente": cliente, "Origen": origen, "Destino": destino,
-            "KM": km, "Moneda": moneda_ingreso, "Ingreso_Original": ingreso_flete,
-            "Tipo de cambio": tipo_cambio_flete, "Ingreso Flete": ingreso_flete_convertido,
-            "Moneda_Cruce": moneda_cruce, "Cruce_Original": ingreso_cruce,
-            "Tipo cambio Cruce": tipo_cambio_cruce, "Ingreso Cruce": ingreso_cruce_convertido,
-            "Moneda Costo Cruce": moneda_costo_cruce, "Costo Cruce": costo_cruce,
-            "Costo Cruce Convertido": costo_cruce_convertido, "Ingreso Total": ingreso_total,
-            "Sueldo_Operador": SUELDO_POR_VIAJE, "Bono": BONO_ISR_POR_VIAJE,
-            "Bono Rendimiento": BONO_RENDIMIENTO, "Casetas": casetas,
-            "Movimiento_Local": movimiento_local, "Puntualidad": puntualidad, "Pension": pension,
-            "Estancia": estancia, "Pistas Extra": pistas_extra, "Stop": stop, "Falso": falso,
-            "Gatas": gatas, "Accesorios": accesorios, "Guías": guias,
-            "Costo_Diesel_Camion": costo_diesel_camion, "Costo_Extras": extras,
-            "Costo_Total_Ruta": costo_total, "Clasificacion Ruta": "RC"
-        }
+        st.session_state.ruta_previa = ruta_previa
         st.session_state.mostrar_guardar = True
 
 if st.session_state.get("mostrar_guardar") and "ruta_previa" in st.session_state:
     if st.button("✅ Guardar Ruta"):
-        df_rutas = pd.concat([df_rutas, pd.DataFrame([st.session_state.ruta_previa])], ignore_index=True)
-        df_rutas.to_csv(RUTA_RUTAS, index=False)
+        with medir(PAGINA, "guardar ruta"):
+            agregar_ruta(st.session_state.ruta_previa)
         st.success("🚛 Ruta guardada exitosamente.")
         st.session_state.mostrar_guardar = False
         st.rerun()
+
+# ============================
+# Importación masiva
+# ============================
+st.markdown("---")
+st.subheader("📤 Importación Masiva de Rutas")
+st.download_button("Descargar plantilla CSV", data=plantilla_csv(), file_name="plantilla_rutas.csv", mime="text/csv")
+
+# Tras importar se cambia la llave del cargador: el archivo se quita y el
+# botón no puede volver a guardar las mismas rutas
+if "importacion_n" not in st.session_state:
+    st.session_state.importacion_n = 0
+if "importadas" in st.session_state:
+    st.success(f"🚛 {st.session_state.pop('importadas')} rutas importadas exitosamente.")
+archivo = st.file_uploader("Subir tarifario (CSV o XLSX)", type=["csv", "xlsx"],
+                           key=f"importar_rutas_{st.session_state.importacion_n}")
+if archivo:
+    try:
+        with medir(PAGINA, "cargar archivo de importación"):
+            validas, errores = validar(leer_archivo(archivo, archivo.name))
+    except Exception as e:
+        st.error(f"❌ No se pudo leer el archivo: {e}")
+        st.stop()
+
+    st.write(f"**Filas válidas:** {len(validas)} | **Filas con errores:** {len(errores)}")
+    if not errores.empty:
+        st.warning("⚠️ Las filas con errores no se importarán.")
+        st.dataframe(errores, width="stretch", hide_index=True)
+
+    if not validas.empty:
+        with medir(PAGINA, "calcular importación"):
+            nuevas = preparar_rutas(validas, valores)
+        with medir(PAGINA, "render vista previa"):
+            st.dataframe(nuevas.head(50), width="stretch")
+        if st.button(f"✅ Importar {len(nuevas)} rutas"):
+            with medir(PAGINA, "guardar importación"):
+                agregar_rutas(nuevas)
+            st.session_state.importadas = len(nuevas)
+            st.session_state.importacion_n += 1
+            st.rerun()
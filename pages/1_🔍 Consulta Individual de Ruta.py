@@ -1,44 +1,50 @@
 import streamlit as st
 import pandas as pd
-import os
 
-RUTA_RUTAS = "rutas_guardadas.csv"
-RUTA_DATOS = "datos_generales.csv"
+from picus.busqueda import buscar_rutas
+from picus.metricas import medir
+from picus.rentabilidad import UMBRAL_UTILIDAD_BRUTA, UMBRAL_UTILIDAD_NETA, rentabilidad_vuelta
+from picus.repositorio import rutas_rc
 
-SUELDO_POR_VIAJE = 1500 / 5  # $300
-BONO_ISR_POR_VIAJE = 925.32 / 5  # $185.06
-BONO_RENDIMIENTO = 0.0
+PAGINA = "consulta"
 
 st.title("🔍 Consulta Individual de Ruta - PICUS RC")
 
 def safe(x):
     return 0 if pd.isna(x) or x is None else x
 
-if os.path.exists(RUTA_RUTAS):
-    df = pd.read_csv(RUTA_RUTAS)
-    df = df[df["Clasificacion Ruta"] == "RC"]  # Solo rutas cortas
+with medir(PAGINA, "cargar rutas"):
+    df = rutas_rc()  # Solo rutas cortas
+if df is not None:
 
     if df.empty:
         st.warning("⚠️ No hay rutas clasificadas como RC registradas.")
         st.stop()
 
     st.subheader("📌 Selecciona una Ruta")
-    index_sel = st.selectbox(
-        "Selecciona índice",
-        df.index.tolist(),
-        format_func=lambda x: f"{df.loc[x, 'Tipo']} - {df.loc[x, 'Cliente']} - {df.loc[x, 'Origen']} → {df.loc[x, 'Destino']}"
-    )
+    texto = st.text_input("Buscar por cliente, origen o destino", placeholder="Ej. acme qro")
+    with medir(PAGINA, "filtrar búsqueda"):
+        opciones, total = buscar_rutas(texto)
+    if total == 0:
+        st.info("No hay rutas que coincidan con la búsqueda.")
+        st.stop()
+    if total > len(opciones):
+        st.caption(f"Mostrando {len(opciones)} de {total} coincidencias; escribe más para acotar.")
+    etiquetas = df.loc[opciones, "Etiqueta"].to_dict()
+    index_sel = st.selectbox("Selecciona índice", opciones.tolist(), format_func=etiquetas.get)
 
     ruta = df.loc[index_sel]
 
     ingreso_total = safe(ruta.get("Ingreso Total", 0))
     costo_total = safe(ruta.get("Costo_Total_Ruta", 0))
-    utilidad_bruta = ingreso_total - costo_total
-    costos_indirectos = ingreso_total * 0.35
-    utilidad_neta = utilidad_bruta - costos_indirectos
+    with medir(PAGINA, "calcular rentabilidad"):
+        margen = rentabilidad_vuelta(ingreso_total, costo_total)
+    utilidad_bruta = margen["Utilidad Bruta"]
+    costos_indirectos = margen["Costos Indirectos"]
+    utilidad_neta = margen["Utilidad Neta"]
 
-    porcentaje_bruta = (utilidad_bruta / ingreso_total * 100) if ingreso_total > 0 else 0
-    porcentaje_neta = (utilidad_neta / ingreso_total * 100) if ingreso_total > 0 else 0
+    porcentaje_bruta = margen["% Utilidad Bruta"]
+    porcentaje_neta = margen["% Utilidad Neta"]
 
     def colored_bold(label, value, condition):
         color = "green" if condition else "red"
@@ -49,10 +55,10 @@ if os.path.exists(RUTA_RUTAS):
     st.write(f"**Ingreso Total:** ${ingreso_total:,.2f}")
     st.write(f"**Costo Total:** ${costo_total:,.2f}")
     st.markdown(colored_bold("Utilidad Bruta", f"${utilidad_bruta:,.2f}", utilidad_bruta >= 0), unsafe_allow_html=True)
-    st.markdown(colored_bold("% Utilidad Bruta", f"{porcentaje_bruta:.2f}%", porcentaje_bruta >= 50), unsafe_allow_html=True)
+    st.markdown(colored_bold("% Utilidad Bruta", f"{porcentaje_bruta:.2f}%", porcentaje_bruta >= UMBRAL_UTILIDAD_BRUTA), unsafe_allow_html=True)
     st.write(f"**Costos Indirectos (35%):** ${costos_indirectos:,.2f}")
     st.markdown(colored_bold("Utilidad Neta", f"${utilidad_neta:,.2f}", utilidad_neta >= 0), unsafe_allow_html=True)
-    st.markdown(colored_bold("% Utilidad Neta", f"{porcentaje_neta:.2f}%", porcentaje_neta >= 15), unsafe_allow_html=True)
+    st.markdown(colored_bold("% Utilidad Neta", f"{porcentaje_neta:.2f}%", porcentaje_neta >= UMBRAL_UTILIDAD_NETA), unsafe_allow_html=True)
 
     st.markdown("---")
     st.subheader("📋 Detalles y Costos de la Ruta")
@@ -79,9 +85,9 @@ if os.path.exists(RUTA_RUTAS):
         f"Costo Cruce Original: ${safe(ruta['Costo Cruce']):,.2f}",
         f"Costo Cruce Convertido: ${safe(ruta['Costo Cruce Convertido']):,.2f}",
         f"Diesel Camion: ${costo_diesel:,.2f}",
-        f"Sueldo Operador (fijo): ${SUELDO_POR_VIAJE:,.2f}",
-        f"Bono ISR IMSS (fijo): ${BONO_ISR_POR_VIAJE:,.2f}",
-        f"Bono Rendimiento: ${BONO_RENDIMIENTO:,.2f}",
+        f"Sueldo Operador: ${safe(ruta.get('Sueldo_Operador', 0)):,.2f}",
+        f"Bono ISR IMSS: ${safe(ruta.get('Bono', 0)):,.2f}",
+        f"Bono Rendimiento: ${safe(ruta.get('Bono Rendimiento', 0)):,.2f}",
         f"Casetas: ${casetas:,.2f}",
         "---",
         "**🧾 Desglose Extras:**",
@@ -94,11 +100,14 @@ if os.path.exists(RUTA_RUTAS):
         f"- Falso: ${safe(ruta['Falso']):,.2f}",
         f"- Gatas: ${safe(ruta['Gatas']):,.2f}",
         f"- Accesorios: ${safe(ruta['Accesorios']):,.2f}",
-        f"- Guías: ${safe(ruta['Guías']):,.2f}"
+        f"- Guías: ${safe(ruta['Guías']):,.2f}",
+        "---",
+        f"Versión de parámetros: {ruta.get('Version_Parametros', 'sin registrar')}"
     ]
 
-    for line in detalles:
-        st.write(line)
+    with medir(PAGINA, "render detalle"):
+        for line in detalles:
+            st.write(line)
 
 else:
     st.warning("⚠️ No hay rutas guardadas todavía.")
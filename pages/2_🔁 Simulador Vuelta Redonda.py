@@ -1,11 +1,21 @@
 import streamlit as st
 import pandas as pd
-import os
 
-RUTA_RUTAS = "rutas_guardadas.csv"
-SUELDO_POR_VIAJE = 1500 / 5  # $300
-BONO_ISR_POR_VIAJE = 925.32 / 5  # $185.06
-BONO_RENDIMIENTO = 0.0
+from picus.busqueda import LIMITE_OPCIONES, buscar_rutas
+from picus.grafo import MAX_TRAMOS, obtener_grafo
+from picus.metricas import medir
+from picus.parametros import cargar_datos_generales
+from picus.ranking import ranking_vueltas
+from picus.rentabilidad import rentabilidad_vuelta
+from picus.repositorio import rutas_rc
+
+PAGINA = "simulador"
+
+with medir(PAGINA, "cargar datos generales"):
+    valores = cargar_datos_generales()
+SUELDO_POR_VIAJE = valores["Sueldo por Viaje"]
+BONO_ISR_POR_VIAJE = valores["Bono ISR IMSS por Viaje"]
+BONO_RENDIMIENTO = valores["Bono Rendimiento"]
 
 st.title("🔁 Simulador Vuelta Redonda - PICUS RC")
 
@@ -13,21 +23,56 @@ def safe(x):
     return 0 if pd.isna(x) or x is None else x
 
 def cargar_rutas():
-    if os.path.exists(RUTA_RUTAS):
-        df = pd.read_csv(RUTA_RUTAS)
-        df = df[df["Clasificacion Ruta"] == "RC"]
+    with medir(PAGINA, "cargar rutas"):
+        df = rutas_rc()
+    if df is not None:
         if df.empty:
             st.warning("No hay rutas clasificadas como RC registradas.")
             st.stop()
-        df["Ruta"] = df["Origen"] + " → " + df["Destino"]
-        df["Utilidad"] = df["Ingreso Total"] - df["Costo_Total_Ruta"]
-        df["% Utilidad"] = (df["Utilidad"] / df["Ingreso Total"] * 100).round(2)
         return df
     st.error("❌ No se encontró rutas_guardadas.csv")
     st.stop()
 
 df_rutas = cargar_rutas()
 
+with st.expander("🏆 Ranking de vueltas redondas de toda la red"):
+    with medir(PAGINA, "calcular ranking"):
+        ranking = ranking_vueltas()
+    if ranking.empty:
+        st.info("No hay combinaciones de ida y regreso disponibles.")
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            tipos_ranking = st.multiselect("Tipo de ruta inicial", ["IMPO", "EXPO"], default=["IMPO", "EXPO"], key="ranking_tipos")
+        with col2:
+            top_n = st.number_input("Mostrar las mejores", min_value=10, max_value=1000, value=50, step=10, key="ranking_top")
+        vista = ranking[ranking["Tipo"].isin(tipos_ranking)].head(int(top_n))
+        st.caption("Costo por tramo = Costo_Total_Ruta; indirectos 35% sobre el ingreso de la vuelta.")
+        with medir(PAGINA, "render ranking"):
+            st.dataframe(vista, width="stretch", hide_index=True)
+
+with st.expander("🧭 Cadenas multi-tramo desde un patio"):
+    # La búsqueda recorre el grafo completo: solo corre con el interruptor
+    # encendido, no en cada cambio de los pasos de abajo
+    if st.toggle("Buscar cadenas", key="cadena_buscar"):
+        with medir(PAGINA, "cargar grafo"):
+            grafo = obtener_grafo()
+        ubicaciones = sorted(grafo.nodos.tolist())
+        col1, col2 = st.columns(2)
+        with col1:
+            patio = st.selectbox("Patio de salida", ubicaciones, key="cadena_patio")
+            max_tramos = st.slider("Máximo de tramos", min_value=2, max_value=MAX_TRAMOS, value=MAX_TRAMOS, key="cadena_tramos")
+        with col2:
+            cercanas = st.multiselect("Ubicaciones válidas para terminar (además del patio)", ubicaciones, key="cadena_cercanas")
+            k_cadenas = st.number_input("Cadenas a mostrar", min_value=1, max_value=5, value=5, key="cadena_k")
+        with medir(PAGINA, "calcular cadenas"):
+            cadenas = grafo.tabla_cadenas(patio, cercanas, max_tramos, int(k_cadenas))
+        if cadenas.empty:
+            st.info("No hay cadenas que regresen al patio con esos criterios.")
+        else:
+            with medir(PAGINA, "render cadenas"):
+                st.dataframe(cadenas.drop(columns=["Índices"]), width="stretch", hide_index=True)
+
 st.subheader("📌 Paso 1: Selecciona tipo de ruta principal")
 tipo_principal = st.selectbox("Tipo de ruta inicial", ["IMPO", "EXPO", "VACIO"])
 rutas_principales = df_rutas[df_rutas["Tipo"] == tipo_principal].copy()
@@ -36,12 +81,18 @@ if rutas_principales.empty:
     st.warning(f"No hay rutas tipo {tipo_principal} registradas.")
     st.stop()
 
-ruta_sel = st.selectbox("Selecciona una ruta", rutas_principales["Ruta"].unique())
+texto = st.text_input("Buscar ruta (cliente, origen o destino)", key="buscar_ruta_principal")
+with medir(PAGINA, "filtrar búsqueda"):
+    coincidencias, total = buscar_rutas(texto, tipos=[tipo_principal], limite=None)
+if total == 0:
+    st.info("No hay rutas que coincidan con la búsqueda; se muestran todas las del tipo.")
+    coincidencias = rutas_principales.index
+ruta_sel = st.selectbox("Selecciona una ruta", pd.unique(df_rutas.loc[coincidencias, "Ruta"])[:LIMITE_OPCIONES])
 rutas_filtradas = rutas_principales[rutas_principales["Ruta"] == ruta_sel].copy()
 rutas_filtradas = rutas_filtradas.sort_values(by="% Utilidad", ascending=False)
 
-cliente_idx = st.selectbox("Cliente (ordenado por % utilidad)", rutas_filtradas.index,
-    format_func=lambda x: f"{rutas_filtradas.loc[x, 'Cliente']} ({rutas_filtradas.loc[x, '% Utilidad']:.2f}%)")
+etiquetas_cliente = (rutas_filtradas["Cliente"].astype(str) + " (" + rutas_filtradas["% Utilidad"].map("{:.2f}%".format) + ")").to_dict()
+cliente_idx = st.selectbox("Cliente (ordenado por % utilidad)", rutas_filtradas.index, format_func=etiquetas_cliente.get)
 ruta1 = rutas_filtradas.loc[cliente_idx]
 
 st.subheader("📌 Paso 2: Ruta intermedia sugerida (opcional)")
@@ -51,8 +102,8 @@ vacios = df_rutas[(df_rutas["Tipo"] == "VACIO") & (df_rutas["Origen"] == destino
 opcion_intermedia = None
 if not vacios.empty:
     vacios = vacios.sort_values(by="% Utilidad", ascending=False)
-    idx = st.selectbox("Ruta vacía sugerida", vacios.index,
-        format_func=lambda x: f"{vacios.loc[x, 'Ruta']} ({vacios.loc[x, 'Cliente']})")
+    etiquetas_vacio = (vacios["Ruta"] + " (" + vacios["Cliente"].astype(str) + ")").to_dict()
+    idx = st.selectbox("Ruta vacía sugerida", vacios.index, format_func=etiquetas_vacio.get)
     opcion_intermedia = vacios.loc[idx]
 
 st.subheader("📌 Paso 3: Ruta final sugerida")
@@ -69,8 +120,8 @@ rutas_finales = df_rutas[(df_rutas["Tipo"] == tipo_final) & (df_rutas["Origen"]
 ruta3 = None
 if not rutas_finales.empty:
     rutas_finales = rutas_finales.sort_values(by="% Utilidad", ascending=False)
-    idx = st.selectbox("Ruta final sugerida", rutas_finales.index,
-        format_func=lambda x: f"{rutas_finales.loc[x, 'Cliente']} - {rutas_finales.loc[x, 'Ruta']}")
+    etiquetas_final = (rutas_finales["Cliente"].astype(str) + " - " + rutas_finales["Ruta"]).to_dict()
+    idx = st.selectbox("Ruta final sugerida", rutas_finales.index, format_func=etiquetas_final.get)
     ruta3 = rutas_finales.loc[idx]
 
 rutas_seleccionadas = [ruta1]
@@ -114,16 +165,16 @@ for r in rutas_seleccionadas:
         "Total Ruta": total_costos
     })
 
-utilidad_bruta = ingreso_total - costo_total
-costos_indirectos = ingreso_total * 0.35
-utilidad_neta = utilidad_bruta - costos_indirectos
+with medir(PAGINA, "calcular rentabilidad"):
+    margen = rentabilidad_vuelta(ingreso_total, costo_total)
 
 st.header("📊 Resultados Generales")
 st.metric("Ingreso Total", f"${ingreso_total:,.2f}")
 st.metric("Costo Total", f"${costo_total:,.2f}")
-st.metric("Utilidad Bruta", f"${utilidad_bruta:,.2f} ({(utilidad_bruta/ingreso_total*100):.2f}%)")
-st.metric("Costos Indirectos (35%)", f"${costos_indirectos:,.2f}")
-st.metric("Utilidad Neta", f"${utilidad_neta:,.2f} ({(utilidad_neta/ingreso_total*100):.2f}%)")
+st.metric("Utilidad Bruta", f"${margen['Utilidad Bruta']:,.2f} ({margen['% Utilidad Bruta']:.2f}%)")
+st.metric("Costos Indirectos (35%)", f"${margen['Costos Indirectos']:,.2f}")
+st.metric("Utilidad Neta", f"${margen['Utilidad Neta']:,.2f} ({margen['% Utilidad Neta']:.2f}%)")
 
 st.subheader("📋 Detalle por Ruta")
-st.dataframe(pd.DataFrame(detalle), use_container_width=True)
+with medir(PAGINA, "render detalle"):
+    st.dataframe(pd.DataFrame(detalle), width="stretch")
@@ -1,37 +1,40 @@
 import streamlit as st
 import pandas as pd
-import os
 from datetime import datetime
 
-RUTA_RUTAS = "rutas_guardadas.csv"
-RUTA_PROG = "viajes_programados.csv"
-
-SUELDO_POR_VIAJE = 1500 / 5  # $300
-BONO_ISR_POR_VIAJE = 925.32 / 5  # $185.06
-BONO_RENDIMIENTO = 0.0
+from picus.almacenamiento import obtener_almacen
+from picus.asignacion import asignar, confirmar_asignacion, datos_del_dia
+from picus.busqueda import LIMITE_OPCIONES, buscar_rutas
+from picus.indice_viajes import CONCLUIDO, PENDIENTE, ids_con_estado
+from picus.metricas import medir
+from picus.parametros import datos_generales_vigentes
+from picus.ranking import obtener_ranking
+from picus.repositorio import existe_rutas, rutas_rc, sin_derivadas
+from picus.rentabilidad import rentabilidad_vuelta
+from picus.retornos import cadenas_regreso, filas_de_cierre, opciones_regreso, tramos_de_cadena
+from picus.viajes import (comparar_recosteo, costear_por_fecha, parchar_tramo, recostear_viajes, resumen_traficos,
+                          tramos_con_cambios)
+
+PAGINA = "programacion"
 
 st.title("🚚 Programación de Viajes - PICUS RC")
 
 def safe(x): return 0 if pd.isna(x) or x is None else x
 
 def cargar_rutas():
-    if not os.path.exists(RUTA_RUTAS):
+    with medir(PAGINA, "cargar rutas"):
+        df = rutas_rc()
+    if df is None:
         st.error("❌ No se encontró rutas_guardadas.csv")
         st.stop()
-    df = pd.read_csv(RUTA_RUTAS)
-    df = df[df["Clasificacion Ruta"] == "RC"]
-    df["Utilidad"] = df["Ingreso Total"] - df["Costo_Total_Ruta"]
-    df["% Utilidad"] = (df["Utilidad"] / df["Ingreso Total"] * 100).round(2)
-    df["Ruta"] = df["Origen"] + " → " + df["Destino"]
     return df
 
+almacen = obtener_almacen()
+
 def guardar_programacion(df_nueva):
-    if os.path.exists(RUTA_PROG):
-        df_prog = pd.read_csv(RUTA_PROG)
-        df_total = pd.concat([df_prog, df_nueva], ignore_index=True)
-    else:
-        df_total = df_nueva
-    df_total.to_csv(RUTA_PROG, index=False)
+    with medir(PAGINA, "guardar tramos"):
+        # Sin las columnas calculadas del catálogo: así el anexo coincide con el encabezado
+        almacen.agregar_viajes(sin_derivadas(df_nueva))
 
 # ==============================
 # Registro de tráfico
@@ -45,11 +48,17 @@ if rutas_tipo.empty:
     st.info("No hay rutas registradas de este tipo.")
     st.stop()
 
-ruta_sel = st.selectbox("Selecciona una ruta", rutas_tipo["Ruta"].unique())
+texto = st.text_input("Buscar ruta (cliente, origen o destino)", key="buscar_ruta_ida")
+with medir(PAGINA, "filtrar búsqueda"):
+    coincidencias, total = buscar_rutas(texto, tipos=[tipo], limite=None)
+if total == 0:
+    st.info("No hay rutas que coincidan con la búsqueda; se muestran todas las del tipo.")
+    coincidencias = rutas_tipo.index
+ruta_sel = st.selectbox("Selecciona una ruta", pd.unique(rutas_df.loc[coincidencias, "Ruta"])[:LIMITE_OPCIONES])
 rutas_filtradas = rutas_tipo[rutas_tipo["Ruta"] == ruta_sel].sort_values(by="% Utilidad", ascending=False)
 
-cliente_idx = st.selectbox("Cliente", rutas_filtradas.index,
-    format_func=lambda x: f"{rutas_filtradas.loc[x, 'Cliente']} ({rutas_filtradas.loc[x, '% Utilidad']:.2f}%)")
+etiquetas_cliente = (rutas_filtradas["Cliente"].astype(str) + " (" + rutas_filtradas["% Utilidad"].map("{:.2f}%".format) + ")").to_dict()
+cliente_idx = st.selectbox("Cliente", rutas_filtradas.index, format_func=etiquetas_cliente.get)
 ruta_ida = rutas_filtradas.loc[cliente_idx]
 
 with st.form("registro_trafico"):
@@ -80,18 +89,18 @@ with st.form("registro_trafico"):
 st.markdown("---")
 st.header("🛠️ Gestión de Tráficos Programados")
 
-if os.path.exists(RUTA_PROG):
-    df_prog = pd.read_csv(RUTA_PROG)
-    df_prog = df_prog[df_prog["Clasificacion Ruta"] == "RC"] if "Clasificacion Ruta" in df_prog.columns else df_prog
+# El estado de cada tráfico sale del índice; los tramos se leen solo cuando se necesitan
+with medir(PAGINA, "cargar índice de viajes"):
+    indice = almacen.indice_viajes()
 
+if almacen.existe_viajes():
     # Mostrar solo tráficos con un tramo (IDA)
-    incompletos = df_prog.groupby("ID_Programacion").size().reset_index(name="Tramos")
-    incompletos = incompletos[incompletos["Tramos"] == 1]["ID_Programacion"]
-    ids = incompletos.tolist()
+    ids = ids_con_estado(indice, PENDIENTE).tolist()
 
     if ids:
         id_edit = st.selectbox("Selecciona un tráfico para editar", ids)
-        df_filtrado = df_prog[df_prog["ID_Programacion"] == id_edit].reset_index()
+        with medir(PAGINA, "cargar tráfico"):
+            df_filtrado = almacen.leer_programaciones([id_edit]).reset_index()
         st.write("**Vista previa del tráfico seleccionado:**")
         st.dataframe(df_filtrado)
 
@@ -130,17 +139,9 @@ if os.path.exists(RUTA_PROG):
                         "Accesorios": accesorios,
                         "Guías": guias
                     }
-                    for col, val in columnas.items():
-                        df_prog.loc[(df_prog["ID_Programacion"] == id_edit) & (df_prog["Tramo"] == "IDA"), col] = val
-
-                    # Recalcular costo total
-                    extras = sum([safe(x) for x in columnas.values() if isinstance(x, (int, float))])
-                    base = tramo_ida.get("Costo_Total_Ruta", 0) - tramo_ida.get("Costo_Extras", 0)
-                    total = base + extras
-                    df_prog.loc[(df_prog["ID_Programacion"] == id_edit) & (df_prog["Tramo"] == "IDA"), "Costo_Extras"] = extras
-                    df_prog.loc[(df_prog["ID_Programacion"] == id_edit) & (df_prog["Tramo"] == "IDA"), "Costo_Total_Ruta"] = total
-
-                    df_prog.to_csv(RUTA_PROG, index=False)
+                    # Un solo tramo: se recalculan extras y costo total y se guarda solo ese registro
+                    with medir(PAGINA, "guardar edición de tramo"):
+                        parchar_tramo(id_edit, "IDA", columnas)
                     st.success("✅ Cambios guardados correctamente.")
 
 # =====================================
@@ -149,84 +150,143 @@ if os.path.exists(RUTA_PROG):
 st.markdown("---")
 st.title("🔁 Completar y Simular Tráfico Detallado")
 
-if not os.path.exists(RUTA_PROG) or not os.path.exists(RUTA_RUTAS):
+if not almacen.existe_viajes() or not existe_rutas():
     st.error("❌ Faltan archivos necesarios para continuar.")
     st.stop()
 
-df_prog = pd.read_csv(RUTA_PROG)
 df_rutas = cargar_rutas()
-
-incompletos = df_prog.groupby("ID_Programacion").size().reset_index(name="count")
-incompletos = incompletos[incompletos["count"] == 1]["ID_Programacion"]
+incompletos = ids_con_estado(indice, PENDIENTE)
 
 if not incompletos.empty:
     id_sel = st.selectbox("Selecciona un tráfico pendiente", incompletos)
-    ida = df_prog[df_prog["ID_Programacion"] == id_sel].iloc[0]
-    destino_ida = ida["Destino"]
-    tipo_ida = ida["Tipo"]
-
-    tipo_regreso = "EXPO" if tipo_ida == "IMPO" else "IMPO"
-    directas = df_rutas[(df_rutas["Tipo"] == tipo_regreso) & (df_rutas["Origen"] == destino_ida)].copy()
-
-    if not directas.empty:
-        directas = directas.sort_values(by="% Utilidad", ascending=False)
-        idx = st.selectbox("Cliente sugerido (por utilidad)", directas.index,
-            format_func=lambda x: f"{directas.loc[x, 'Cliente']} - {directas.loc[x, 'Ruta']} ({directas.loc[x, '% Utilidad']:.2f}%)")
-        rutas = [ida, directas.loc[idx]]
+    with medir(PAGINA, "cargar tráfico"):
+        ida = almacen.leer_programaciones([id_sel]).iloc[0]
+
+    with medir(PAGINA, "calcular regresos"):
+        opciones = opciones_regreso(ida, df_rutas)
+    if opciones.empty:
+        st.warning("No se encontraron rutas de regreso disponibles.")
     else:
-        vacios = df_rutas[(df_rutas["Tipo"] == "VACIO") & (df_rutas["Origen"] == destino_ida)].copy()
-        mejor_combo = None
-        mejor_utilidad = -999999
-
-        for _, vacio in vacios.iterrows():
-            origen_expo = vacio["Destino"]
-            expo = df_rutas[(df_rutas["Tipo"] == tipo_regreso) & (df_rutas["Origen"] == origen_expo)]
-            if not expo.empty:
-                expo = expo.sort_values(by="% Utilidad", ascending=False).iloc[0]
-                ingreso_total = safe(ida["Ingreso Total"]) + safe(expo["Ingreso Total"])
-                costo_total = safe(ida["Costo_Total_Ruta"]) + safe(vacio["Costo_Total_Ruta"]) + safe(expo["Costo_Total_Ruta"])
-                utilidad = ingreso_total - costo_total
-                if utilidad > mejor_utilidad:
-                    mejor_utilidad = utilidad
-                    mejor_combo = (vacio, expo)
-
-        if mejor_combo:
-            vacio, expo = mejor_combo
-            rutas = [ida, vacio, expo]
+        def describir_cadena(x):
+            c = opciones.loc[x]
+            via = f"VACIO {c['Origen_vacio']} → {c['Destino_vacio']} + " if pd.notna(c["idx_vacio"]) else ""
+            return f"{via}{c['Cliente_regreso']} - {c['Origen_regreso']} → {c['Destino_regreso']} (${c['Utilidad']:,.2f}, {c['% Utilidad']:.2f}%)"
+
+        idx = st.selectbox("Regreso sugerido (por utilidad de la vuelta completa)", opciones.index, format_func=describir_cadena)
+        rutas = [ida] + tramos_de_cadena(opciones.loc[idx], df_rutas)
+
+        st.header("🛤️ Resumen de Tramos Utilizados")
+        for tramo in rutas:
+            st.markdown(f"**{tramo['Tipo']}** | {tramo['Origen']} → {tramo['Destino']} | Cliente: {tramo.get('Cliente', 'Sin cliente')}")
+
+        ingreso = sum(safe(r["Ingreso Total"]) for r in rutas)
+        costo = sum(safe(r["Costo_Total_Ruta"]) for r in rutas)
+        margen = rentabilidad_vuelta(ingreso, costo)
+
+        st.header("📊 Ingresos y Utilidades")
+        st.metric("Ingreso Total", f"${ingreso:,.2f}")
+        st.metric("Costo Total", f"${costo:,.2f}")
+        st.metric("Utilidad Bruta", f"${margen['Utilidad Bruta']:,.2f} ({margen['% Utilidad Bruta']:.2f}%)")
+        st.metric("Costos Indirectos (35%)", f"${margen['Costos Indirectos']:,.2f}")
+        st.metric("Utilidad Neta", f"${margen['Utilidad Neta']:,.2f} ({margen['% Utilidad Neta']:.2f}%)")
+
+        if st.button("💾 Guardar y cerrar tráfico"):
+            guardar_programacion(filas_de_cierre(pd.DataFrame([ida]), opciones.loc[[idx]], df_rutas))
+            st.success("✅ Tráfico cerrado exitosamente.")
+
+    # =====================================
+    # Cierre masivo de tráficos pendientes
+    # =====================================
+    st.markdown("---")
+    st.header("📦 Cierre Masivo de Tráficos Pendientes")
+
+    with medir(PAGINA, "cargar pendientes"):
+        idas_pendientes = almacen.leer_programaciones(incompletos).drop_duplicates("ID_Programacion")
+    idas_pendientes.index = idas_pendientes["ID_Programacion"].to_numpy()
+    with medir(PAGINA, "calcular cierre masivo"):
+        mejores = cadenas_regreso(idas_pendientes, df_rutas, k=1)
+
+    sin_regreso = len(idas_pendientes) - len(mejores)
+    if sin_regreso:
+        st.caption(f"{sin_regreso} tráfico(s) pendiente(s) sin regreso disponible.")
+
+    if not mejores.empty:
+        propuestas = pd.DataFrame({
+            "Cerrar": True,
+            "ID_Programacion": mejores["clave"],
+            "Ida": mejores["clave"].map(idas_pendientes["Origen"]).astype(str) + " → " + mejores["Destino_ida"],
+            "Vacío": (mejores["Origen_vacio"] + " → " + mejores["Destino_vacio"]).fillna("-"),
+            "Regreso": mejores["Cliente_regreso"] + " - " + mejores["Origen_regreso"] + " → " + mejores["Destino_regreso"],
+            "Ingreso Total": mejores["Ingreso Total"].round(2),
+            "Costo Total": mejores["Costo Total"].round(2),
+            "Utilidad": mejores["Utilidad"].round(2),
+            "% Utilidad": mejores["% Utilidad"],
+        }).sort_values("Utilidad", ascending=False)
+
+        with medir(PAGINA, "render cierre masivo"):
+            editadas = st.data_editor(
+                propuestas,
+                hide_index=True,
+                width="stretch",
+                disabled=[c for c in propuestas.columns if c != "Cerrar"],
+                key="cierre_masivo",
+            )
+        aceptadas = editadas.loc[editadas["Cerrar"], "ID_Programacion"]
+        st.write(f"**Cierres seleccionados:** {len(aceptadas)} | **Utilidad total:** ${editadas.loc[editadas['Cerrar'], 'Utilidad'].sum():,.2f}")
+
+        if st.button("💾 Cerrar tráficos seleccionados") and not aceptadas.empty:
+            elegidas = mejores[mejores["clave"].isin(aceptadas)]
+            guardar_programacion(filas_de_cierre(idas_pendientes, elegidas, df_rutas))
+            st.success(f"✅ {len(aceptadas)} tráficos cerrados exitosamente.")
+            st.rerun()
+
+    # =====================================
+    # Asignación de unidades del día
+    # =====================================
+    st.markdown("---")
+    st.header("🧮 Asignación de Unidades del Día")
+    st.caption("Propone qué unidad y operador toma cada tráfico pendiente del día: minimiza el vacío hasta el origen "
+               "y prioriza los tráficos con mejor utilidad de vuelta redonda.")
+
+    if st.toggle("Calcular asignación", key="calcular_asignacion"):
+        dia = st.date_input("Día a asignar", value=datetime.today(), key="dia_asignacion")
+        with medir(PAGINA, "cargar asignación"):
+            idas_dia, flota, ocupadas = datos_del_dia(dia)
+
+        if idas_dia.empty:
+            st.info(f"No hay tráficos pendientes el {dia:%d/%m/%Y}.")
         else:
-            st.warning("No se encontraron rutas de regreso disponibles.")
-            st.stop()
-
-    st.header("🛤️ Resumen de Tramos Utilizados")
-    for tramo in rutas:
-        st.markdown(f"**{tramo['Tipo']}** | {tramo['Origen']} → {tramo['Destino']} | Cliente: {tramo.get('Cliente', 'Sin cliente')}")
-
-    ingreso = sum(safe(r["Ingreso Total"]) for r in rutas)
-    costo = sum(safe(r["Costo_Total_Ruta"]) for r in rutas)
-    utilidad = ingreso - costo
-    indirectos = ingreso * 0.35
-    utilidad_neta = utilidad - indirectos
-
-    st.header("📊 Ingresos y Utilidades")
-    st.metric("Ingreso Total", f"${ingreso:,.2f}")
-    st.metric("Costo Total", f"${costo:,.2f}")
-    st.metric("Utilidad Bruta", f"${utilidad:,.2f} ({(utilidad/ingreso*100):.2f}%)")
-    st.metric("Costos Indirectos (35%)", f"${indirectos:,.2f}")
-    st.metric("Utilidad Neta", f"${utilidad_neta:,.2f} ({(utilidad_neta/ingreso*100):.2f}%)")
-
-    if st.button("💾 Guardar y cerrar tráfico"):
-        nuevos_tramos = []
-        for tramo in rutas[1:]:
-            datos = tramo.copy()
-            datos["Fecha"] = ida["Fecha"]
-            datos["Número_Trafico"] = ida["Número_Trafico"]
-            datos["Unidad"] = ida["Unidad"]
-            datos["Operador"] = ida["Operador"]
-            datos["ID_Programacion"] = ida["ID_Programacion"]
-            datos["Tramo"] = "VUELTA"
-            nuevos_tramos.append(datos)
-        guardar_programacion(pd.DataFrame(nuevos_tramos))
-        st.success("✅ Tráfico cerrado exitosamente.")
+            st.write(f"**Tráficos del día:** {len(idas_dia)} | **Unidades disponibles:** {len(flota)}")
+            if not ocupadas.empty:
+                with st.expander(f"🚫 {len(ocupadas)} unidad(es) ocupadas ese día"):
+                    st.dataframe(ocupadas, hide_index=True, width="stretch")
+            # La flota sale del historial; aquí se pueden quitar unidades en taller o agregar nuevas
+            flota = st.data_editor(flota, num_rows="dynamic", hide_index=True, width="stretch",
+                                   key="flota_asignacion")
+
+            with medir(PAGINA, "calcular asignación"):
+                asignaciones, sin_unidad, libres = asignar(idas_dia, flota, df_rutas, datos_generales_vigentes(),
+                                                           obtener_ranking())
+            if asignaciones.empty:
+                st.warning("⚠️ No hay unidades disponibles para asignar.")
+            else:
+                with medir(PAGINA, "render asignación"):
+                    st.dataframe(asignaciones, hide_index=True, width="stretch")
+                st.write(f"**KM vacío total:** {asignaciones['KM Vacío'].sum():,.0f} | "
+                         f"**Costo vacío:** ${asignaciones['Costo Vacío'].sum():,.2f} | "
+                         f"**Unidades sin tráfico:** {len(libres)}")
+                if asignaciones["Vacío Estimado"].any():
+                    km_estimado = asignaciones.loc[asignaciones["Vacío Estimado"], "KM Vacío"].max()
+                    st.caption(f"KM Vacío estimado en {km_estimado:,.0f} km donde el catálogo no conecta ubicación y origen.")
+                if not sin_unidad.empty:
+                    st.warning(f"⚠️ {len(sin_unidad)} tráfico(s) sin unidad: "
+                               + ", ".join(sin_unidad["ID_Programacion"].astype(str).head(20)))
+
+                if st.button("💾 Aplicar asignación"):
+                    with medir(PAGINA, "guardar asignación"):
+                        n = confirmar_asignacion(asignaciones)
+                    st.success(f"✅ {n} tráficos con unidad y operador asignados.")
+                    st.rerun()
 else:
     st.info("No hay tráficos pendientes.")
 
@@ -235,50 +295,78 @@ else:
 # =====================================
 st.title("✅ Tráficos Concluidos con Filtro de Fechas")
 
-if not os.path.exists(RUTA_PROG):
+if not almacen.existe_viajes():
     st.error("❌ No se encontró el archivo de viajes programados.")
     st.stop()
 
-df = pd.read_csv(RUTA_PROG)
-
 # Verificamos que haya tráfico cerrado (IDA + VUELTA o más)
-programaciones = df.groupby("ID_Programacion").size().reset_index(name="Tramos")
-concluidos = programaciones[programaciones["Tramos"] >= 2]["ID_Programacion"]
-
+with medir(PAGINA, "cargar índice de viajes"):
+    indice = almacen.indice_viajes()
+concluidos = indice[indice["Estado"] == CONCLUIDO]
 if concluidos.empty:
     st.info("Aún no hay tráficos concluidos.")
+    st.stop()
+
+fechas_concluidos = pd.to_datetime(concluidos["Fecha"])
+st.subheader("📅 Filtro por Fecha")
+fecha_inicio = st.date_input("Fecha inicio", value=fechas_concluidos.min().date())
+fecha_fin = st.date_input("Fecha fin", value=fechas_concluidos.max().date())
+
+# Solo se leen las fechas del rango y las columnas del resumen; los tramos de
+# un mismo tráfico comparten fecha, así que el rango no parte ningún tráfico
+COLUMNAS_RESUMEN = ["ID_Programacion", "Número_Trafico", "Fecha", "Ingreso Total", "Costo_Total_Ruta"]
+with medir(PAGINA, "cargar concluidos"):
+    df = almacen.leer_viajes(desde=fecha_inicio, hasta=fecha_fin, columnas=COLUMNAS_RESUMEN)
+with medir(PAGINA, "filtrar concluidos"):
+    df_filtrado = df[df["ID_Programacion"].isin(concluidos["ID_Programacion"])]
+
+if df_filtrado.empty:
+    st.warning("No hay tráficos concluidos en ese rango de fechas.")
 else:
-    df_concluidos = df[df["ID_Programacion"].isin(concluidos)].copy()
-    df_concluidos["Fecha"] = pd.to_datetime(df_concluidos["Fecha"])
+    with medir(PAGINA, "calcular resumen"):
+        resumen = resumen_traficos(df_filtrado)
 
-    st.subheader("📅 Filtro por Fecha")
-    fecha_inicio = st.date_input("Fecha inicio", value=df_concluidos["Fecha"].min().date())
-    fecha_fin = st.date_input("Fecha fin", value=df_concluidos["Fecha"].max().date())
+    st.subheader("📋 Resumen de Viajes Concluidos")
+    with medir(PAGINA, "render resumen"):
+        st.dataframe(resumen, width="stretch")
 
-    filtro = (df_concluidos["Fecha"] >= pd.to_datetime(fecha_inicio)) & (df_concluidos["Fecha"] <= pd.to_datetime(fecha_fin))
-    df_filtrado = df_concluidos[filtro]
+    csv = resumen.to_csv(index=False).encode("utf-8")
+    st.download_button(
+        "📥 Descargar Resumen en CSV",
+        data=csv,
+        file_name="resumen_traficos_concluidos.csv",
+        mime="text/csv"
+    )
 
-    if df_filtrado.empty:
-        st.warning("No hay tráficos concluidos en ese rango de fechas.")
+# =====================================
+# 5. RECOSTEO CON LOS DATOS GENERALES DE CADA FECHA
+# =====================================
+st.markdown("---")
+st.header("🧾 Recosteo con Datos Generales Históricos")
+st.caption("Cada tramo del rango se compara contra los Datos Generales vigentes en su fecha "
+           "(historial de vigencias que se captura en Captura de Rutas).")
+
+if st.toggle("Comparar tráficos del rango", key="comparar_recosteo"):
+    with medir(PAGINA, "cargar recosteo"):
+        tramos_rango = almacen.leer_viajes(desde=fecha_inicio, hasta=fecha_fin)
+    if tramos_rango is None or tramos_rango.empty:
+        st.info("No hay tráficos en ese rango de fechas.")
     else:
-        resumen = df_filtrado.groupby(["ID_Programacion", "Número_Trafico", "Fecha"]).agg({
-            "Ingreso Total": "sum",
-            "Costo_Total_Ruta": "sum"
-        }).reset_index()
-
-        resumen["Utilidad Bruta"] = resumen["Ingreso Total"] - resumen["Costo_Total_Ruta"]
-        resumen["% Utilidad Bruta"] = (resumen["Utilidad Bruta"] / resumen["Ingreso Total"] * 100).round(2)
-        resumen["Costos Indirectos (35%)"] = (resumen["Ingreso Total"] * 0.35).round(2)
-        resumen["Utilidad Neta"] = resumen["Utilidad Bruta"] - resumen["Costos Indirectos (35%)"]
-        resumen["% Utilidad Neta"] = (resumen["Utilidad Neta"] / resumen["Ingreso Total"] * 100).round(2)
-
-        st.subheader("📋 Resumen de Viajes Concluidos")
-        st.dataframe(resumen, use_container_width=True)
-
-        csv = resumen.to_csv(index=False).encode("utf-8")
-        st.download_button(
-            "📥 Descargar Resumen en CSV",
-            data=csv,
-            file_name="resumen_traficos_concluidos.csv",
-            mime="text/csv"
-        )
+        with medir(PAGINA, "calcular recosteo"):
+            costeados = costear_por_fecha(tramos_rango)
+            cambian = tramos_con_cambios(tramos_rango, costeados)
+            comparacion = comparar_recosteo(tramos_rango, costeados)
+        distintos = comparacion[comparacion["Diferencia Utilidad"] != 0]
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Tramos a recostear", f"{int(cambian.sum())} de {len(tramos_rango)}")
+        col2.metric("Tráficos con otra utilidad", len(distintos))
+        col3.metric("Diferencia de utilidad", f"${comparacion['Diferencia Utilidad'].sum():,.2f}")
+        with medir(PAGINA, "render recosteo"):
+            st.dataframe(distintos.sort_values("Diferencia Utilidad", key=abs, ascending=False),
+                         hide_index=True, width="stretch")
+
+        if cambian.any() and st.button("💾 Aplicar costos históricos"):
+            with medir(PAGINA, "guardar recosteo"):
+                n = recostear_viajes(fecha_inicio, fecha_fin)
+            st.success(f"✅ {n} tramos recosteados con los Datos Generales de su fecha.")
+            st.rerun()
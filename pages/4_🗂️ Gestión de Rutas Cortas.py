@@ -1,48 +1,108 @@
+import hashlib
+
 import streamlit as st
+import numpy as np
 import pandas as pd
-import os
 from datetime import datetime
 
-RUTA_RUTAS = "rutas_guardadas.csv"
+from picus.consultas import COLUMNAS_ORDEN, ordenar_rutas, pagina_rutas, total_paginas
+from picus.costos import calcular_ruta
+from picus.metricas import medir
+from picus.parametros import cargar_datos_generales
+from picus.repositorio import COLUMNAS_IDENTIDAD_RUTA, actualizar_ruta, eliminar_rutas, rutas_rc
 
-SUELDO_POR_VIAJE = 1500 / 5  # $300
-BONO_ISR_POR_VIAJE = 925.32 / 5  # $185.06
-BONO_RENDIMIENTO = 0.0
+PAGINA = "gestion"
 
 st.title("🗂️ Gestión de Rutas Cortas - PICUS RC")
 
-def safe_number(x):
-    return 0 if (x is None or (isinstance(x, float) and pd.isna(x))) else x
-
-if os.path.exists(RUTA_RUTAS):
-    df = pd.read_csv(RUTA_RUTAS)
-    df = df[df["Clasificacion Ruta"] == "RC"]
+with medir(PAGINA, "cargar rutas"):
+    df = rutas_rc()
+if df is not None:
 
     if df.empty:
         st.warning("⚠️ No hay rutas cortas registradas todavía.")
         st.stop()
 
     st.subheader("📋 Rutas Registradas")
-    st.dataframe(df, use_container_width=True)
     st.markdown(f"**Total de rutas registradas:** {len(df)}")
+
+    # Filtros y orden se resuelven en el servidor; al navegador solo llega la página visible
+    with st.expander("🔎 Buscar y filtrar", expanded=True):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            f_cliente = st.text_input("Cliente contiene")
+            f_tipos = st.multiselect("Tipo", ["IMPO", "EXPO", "VACIO"])
+        with col2:
+            f_origen = st.text_input("Origen contiene")
+            f_margen_min = st.number_input("% Utilidad mínimo", value=None, step=1.0)
+        with col3:
+            f_destino = st.text_input("Destino contiene")
+            f_margen_max = st.number_input("% Utilidad máximo", value=None, step=1.0)
+        f_por_fecha = st.checkbox("Filtrar por fecha")
+        f_desde, f_hasta = None, None
+        if f_por_fecha:
+            col4, col5 = st.columns(2)
+            f_desde = col4.date_input("Desde", value=datetime.today().replace(day=1))
+            f_hasta = col5.date_input("Hasta", value=datetime.today())
+
+    filtros = {
+        "cliente": f_cliente.strip(), "tipos": f_tipos, "origen": f_origen.strip(), "destino": f_destino.strip(),
+        "desde": f_desde, "hasta": f_hasta, "margen_min": f_margen_min, "margen_max": f_margen_max,
+    }
+
+    col6, col7, col8 = st.columns(3)
+    orden = col6.selectbox("Ordenar por", COLUMNAS_ORDEN)
+    descendente = col7.selectbox("Sentido", ["Descendente", "Ascendente"]) == "Descendente"
+    por_pagina = col8.selectbox("Filas por página", [25, 50, 100, 200], index=1)
+
+    with medir(PAGINA, "filtrar y ordenar"):
+        indices = ordenar_rutas(filtros, orden, descendente)
+    paginas = total_paginas(len(indices), por_pagina)
+    pagina = st.number_input(f"Página (de {paginas})", min_value=1, max_value=paginas, value=1, step=1)
+    st.caption(f"{len(indices)} ruta(s) encontradas")
+
+    visibles = pagina_rutas(indices, pagina, por_pagina)
+    # El editor guarda las casillas por posición de fila: la llave cambia con las
+    # rutas visibles (filtro, orden o página) para que no pasen a otras rutas
+    firma_visibles = hashlib.sha1(np.asarray(visibles.index, dtype=np.int64).tobytes()).hexdigest()[:12]
+    with medir(PAGINA, "render tabla"):
+        seleccion = st.data_editor(
+            visibles.assign(Seleccionar=False),
+            width="stretch",
+            disabled=list(visibles.columns),
+            key=f"grid_rutas_{firma_visibles}",
+        )
+    # Las rutas marcadas se toman por su ID, el índice de las rutas en pantalla
+    marcadas = seleccion["Seleccionar"].reindex(visibles.index, fill_value=False).to_numpy(dtype=bool)
+    seleccionadas = visibles.index[marcadas].tolist()
     st.markdown("---")
 
     st.subheader("🗑️ Eliminar rutas")
-    indices = st.multiselect("Selecciona los índices a eliminar", df.index.tolist())
-    if st.button("Eliminar rutas seleccionadas") and indices:
-        df.drop(index=indices, inplace=True)
-        df.reset_index(drop=True, inplace=True)
-        df.to_csv(RUTA_RUTAS, index=False)
-        st.success("✅ Rutas eliminadas correctamente.")
-        st.experimental_rerun()
+    st.write(f"**Rutas seleccionadas en la página:** {len(seleccionadas)}")
+    if st.button("Eliminar rutas seleccionadas") and seleccionadas:
+        try:
+            # Se manda la ruta tal como se ve para rechazar la baja si otra sesión ya la movió
+            with medir(PAGINA, "guardar eliminación"):
+                eliminar_rutas(seleccionadas, df.loc[seleccionadas, COLUMNAS_IDENTIDAD_RUTA])
+        except ValueError as e:
+            st.error(f"❌ No se eliminaron las rutas: {e}")
+        else:
+            st.success("✅ Rutas eliminadas correctamente.")
+            st.rerun()
 
     st.markdown("---")
     st.subheader("✏️ Editar Ruta Existente")
-    indice_editar = st.selectbox("Selecciona el índice a editar", df.index.tolist())
+    # Se elige entre las rutas de la búsqueda actual (página visible)
+    opciones_editar = seleccionadas or visibles.index.tolist()
+    etiquetas = df.loc[opciones_editar, "Etiqueta"].to_dict()
+    indice_editar = st.selectbox(
+        "Selecciona la ruta a editar", opciones_editar,
+        format_func=lambda i: f"{i} · {etiquetas[i]}"
+    )
     if indice_editar is not None:
         ruta = df.loc[indice_editar]
         st.markdown("### Modifica los valores de la ruta:")
-        with st.form("editar_ruta"):
+        with medir(PAGINA, "render formulario"), st.form("editar_ruta"):
             col1, col2 = st.columns(2)
             with col1:
                 fecha = st.date_input("Fecha", pd.to_datetime(ruta.get("Fecha", pd.Timestamp.now())))
@@ -79,64 +139,39 @@ if os.path.exists(RUTA_RUTAS):
             guardar = st.form_submit_button("📅 Guardar cambios")
 
             if guardar:
-                tc_usd = 17.5
-                tc_mxn = 1.0
-                tipo_cambio_flete = tc_usd if moneda_ingreso == "USD" else tc_mxn
-                tipo_cambio_cruce = tc_usd if moneda_cruce == "USD" else tc_mxn
-                tipo_cambio_costo_cruce = tc_usd if moneda_costo_cruce == "USD" else tc_mxn
-
-                ingreso_flete_convertido = ingreso_original * tipo_cambio_flete
-                ingreso_cruce_convertido = ingreso_cruce * tipo_cambio_cruce
-                ingreso_total = ingreso_flete_convertido + ingreso_cruce_convertido
-                costo_cruce_convertido = costo_cruce * tipo_cambio_costo_cruce
-
-                costo_diesel_camion = (km / 2.5) * 24.0
-                extras = sum(map(safe_number, [
-                    movimiento_local, puntualidad, pension, estancia,
-                    pistas_extra, stop, falso, gatas, accesorios, guias
-                ]))
-
-                costo_total = costo_diesel_camion + SUELDO_POR_VIAJE + BONO_ISR_POR_VIAJE + BONO_RENDIMIENTO + casetas + extras + costo_cruce_convertido
-
-                # Guardar cambios
-                df.at[indice_editar, "Fecha"] = fecha
-                df.at[indice_editar, "Tipo"] = tipo
-                df.at[indice_editar, "Cliente"] = cliente
-                df.at[indice_editar, "Origen"] = origen
-                df.at[indice_editar, "Destino"] = destino
-                df.at[indice_editar, "KM"] = km
-                df.at[indice_editar, "Moneda"] = moneda_ingreso
-                df.at[indice_editar, "Ingreso_Original"] = ingreso_original
-                df.at[indice_editar, "Tipo de cambio"] = tipo_cambio_flete
-                df.at[indice_editar, "Ingreso Flete"] = ingreso_flete_convertido
-                df.at[indice_editar, "Moneda_Cruce"] = moneda_cruce
-                df.at[indice_editar, "Cruce_Original"] = ingreso_cruce
-                df.at[indice_editar, "Tipo cambio Cruce"] = tipo_cambio_cruce
-                df.at[indice_editar, "Ingreso Cruce"] = ingreso_cruce_convertido
-                df.at[indice_editar, "Ingreso Total"] = ingreso_total
-                df.at[indice_editar, "Moneda Costo Cruce"] = moneda_costo_cruce
-                df.at[indice_editar, "Costo Cruce"] = costo_cruce
-                df.at[indice_editar, "Costo Cruce Convertido"] = costo_cruce_convertido
-                df.at[indice_editar, "Sueldo_Operador"] = SUELDO_POR_VIAJE
-                df.at[indice_editar, "Bono"] = BONO_ISR_POR_VIAJE
-                df.at[indice_editar, "Bono Rendimiento"] = BONO_RENDIMIENTO
-                df.at[indice_editar, "Casetas"] = casetas
-                df.at[indice_editar, "Movimiento_Local"] = movimiento_local
-                df.at[indice_editar, "Puntualidad"] = puntualidad
-                df.at[indice_editar, "Pension"] = pension
-                df.at[indice_editar, "Estancia"] = estancia
-                df.at[indice_editar, "Pistas Extra"] = pistas_extra
-                df.at[indice_editar, "Stop"] = stop
-                df.at[indice_editar, "Falso"] = falso
-                df.at[indice_editar, "Gatas"] = gatas
-                df.at[indice_editar, "Accesorios"] = accesorios
-                df.at[indice_editar, "Guías"] = guias
-                df.at[indice_editar, "Costo_Diesel_Camion"] = costo_diesel_camion
-                df.at[indice_editar, "Costo_Extras"] = extras
-                df.at[indice_editar, "Costo_Total_Ruta"] = costo_total
-
-                df.to_csv(RUTA_RUTAS, index=False)
-                st.success("✅ Ruta actualizada exitosamente.")
-                st.stop()
+                # Guardar cambios (solo se actualiza la fila editada)
+                cambios = calcular_ruta({
+                    "Fecha": fecha,
+                    "Tipo": tipo,
+                    "Cliente": cliente,
+                    "Origen": origen,
+                    "Destino": destino,
+                    "KM": km,
+                    "Moneda": moneda_ingreso,
+                    "Ingreso_Original": ingreso_original,
+                    "Moneda_Cruce": moneda_cruce,
+                    "Cruce_Original": ingreso_cruce,
+                    "Moneda Costo Cruce": moneda_costo_cruce,
+                    "Costo Cruce": costo_cruce,
+                    "Casetas": casetas,
+                    "Movimiento_Local": movimiento_local,
+                    "Puntualidad": puntualidad,
+                    "Pension": pension,
+                    "Estancia": estancia,
+                    "Pistas Extra": pistas_extra,
+                    "Stop": stop,
+                    "Falso": falso,
+                    "Gatas": gatas,
+                    "Accesorios": accesorios,
+                    "Guías": guias
+                }, cargar_datos_generales())
+                try:
+                    with medir(PAGINA, "guardar edición"):
+                        actualizar_ruta(indice_editar, cambios, ruta[COLUMNAS_IDENTIDAD_RUTA])
+                except ValueError as e:
+                    st.error(f"❌ No se guardó la edición: {e}")
+                else:
+                    st.success("✅ Ruta actualizada exitosamente.")
+                    st.stop()
 else:
     st.warning("⚠️ No hay rutas guardadas todavía.")
@@ -1,57 +1,105 @@
 import streamlit as st
-import pandas as pd
 import os
 
+from picus.almacenamiento import AlmacenCSV, AlmacenParquet, AlmacenSQLite, migrar, obtener_almacen
+from picus.constantes import RUTA_RESPALDOS
+from picus.metricas import medir
+from picus.repositorio import invalidar
+from picus.respaldos import crear_respaldo, importar_respaldo, listar_respaldos, restaurar_csv, restaurar_respaldo
+
+PAGINA = "administracion"
+
 st.title("📂 Administración de Archivos - PICUS RC")
 
-# Archivos
-RUTA_RUTAS = "rutas_guardadas.csv"
-RUTA_DATOS = "datos_generales.csv"
-
-st.subheader("📥 Descargar respaldos")
-
-# Descargar rutas_guardadas.csv
-if os.path.exists(RUTA_RUTAS):
-    rutas = pd.read_csv(RUTA_RUTAS)
-    rutas_rc = rutas[rutas["Clasificacion Ruta"] == "RC"] if "Clasificacion Ruta" in rutas.columns else rutas
-    st.download_button(
-        label="Descargar rutas_guardadas.csv (RC)",
-        data=rutas_rc.to_csv(index=False),
-        file_name="rutas_guardadas_RC.csv",
-        mime="text/csv"
-    )
-
-# Descargar datos_generales.csv
-if os.path.exists(RUTA_DATOS):
-    datos = pd.read_csv(RUTA_DATOS)
-    st.download_button(
-        label="Descargar datos_generales.csv",
-        data=datos.to_csv(index=False),
-        file_name="datos_generales.csv",
-        mime="text/csv"
-    )
+st.subheader("💾 Respaldos")
+st.caption(f"Archivos comprimidos en la carpeta `{RUTA_RESPALDOS}/` con rutas, viajes programados, datos generales "
+           "y la base del motor activo. El incremental guarda solo lo que cambió desde el último respaldo.")
+
+col1, col2 = st.columns(2)
+with col1:
+    if st.button("🗜️ Crear respaldo incremental"):
+        with medir(PAGINA, "guardar respaldo"), st.spinner("Comprimiendo..."):
+            nombre, manifiesto = crear_respaldo(incremental=True)
+        st.success(f"✅ Respaldo {manifiesto['tipo']} creado: {nombre}")
+with col2:
+    if st.button("📦 Crear respaldo completo"):
+        with medir(PAGINA, "guardar respaldo"), st.spinner("Comprimiendo..."):
+            nombre, manifiesto = crear_respaldo(incremental=False)
+        st.success(f"✅ Respaldo completo creado: {nombre}")
+
+with medir(PAGINA, "cargar respaldos"):
+    respaldos = listar_respaldos()
+if respaldos.empty:
+    st.info("Todavía no hay respaldos.")
+else:
+    st.dataframe(respaldos, width="stretch", hide_index=True)
+    elegido = st.selectbox("Respaldo", respaldos["Respaldo"])
+    if respaldos.loc[respaldos["Respaldo"] == elegido, "Tipo"].iloc[0] == "incremental":
+        st.caption("Es incremental: para restaurarlo en otro equipo se necesitan también sus respaldos base.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        with open(os.path.join(RUTA_RESPALDOS, elegido), "rb") as archivo:
+            st.download_button("📥 Descargar respaldo", data=archivo, file_name=elegido, mime="application/zip")
+    with col2:
+        if st.button("♻️ Restaurar este respaldo"):
+            try:
+                with medir(PAGINA, "guardar restauración de respaldo"), st.spinner("Restaurando..."):
+                    restaurados = restaurar_respaldo(elegido)
+                st.success(f"✅ Restaurados {len(restaurados)} archivos desde {elegido}.")
+            except ValueError as e:
+                st.error(f"❌ No se restauró nada: {e}")
 
 st.markdown("---")
 st.subheader("📤 Restaurar desde archivos")
+st.caption("Cada archivo se valida completo por bloques antes de reemplazar los datos vivos; si algo falla no se toca nada.")
 
-# Subir rutas_guardadas.csv
-rutas_file = st.file_uploader("Subir rutas_guardadas.csv", type="csv", key="rutas_upload")
-if rutas_file:
-    try:
-        rutas_df = pd.read_csv(rutas_file)
-        rutas_df.to_csv(RUTA_RUTAS, index=False)
-        st.success("✅ Rutas restauradas correctamente.")
-        st.rerun()
-    except Exception as e:
-        st.error(f"❌ Error al cargar rutas: {e}")
-
-# Subir datos_generales.csv
-datos_file = st.file_uploader("Subir datos_generales.csv", type="csv", key="datos_upload")
-if datos_file:
+respaldo_file = st.file_uploader("Subir respaldo (picus_*.zip)", type="zip", key="respaldo_upload")
+if respaldo_file and st.button("♻️ Restaurar respaldo subido"):
     try:
-        datos_df = pd.read_csv(datos_file)
-        datos_df.to_csv(RUTA_DATOS, index=False)
-        st.success("✅ Datos generales restaurados correctamente.")
-        st.rerun()
-    except Exception as e:
-        st.error(f"❌ Error al cargar datos generales: {e}")
+        with medir(PAGINA, "guardar restauración de respaldo"), st.spinner("Restaurando..."):
+            nombre = importar_respaldo(respaldo_file, respaldo_file.name)
+            restaurados = restaurar_respaldo(nombre)
+        st.success(f"✅ Restaurados {len(restaurados)} archivos desde {nombre}.")
+    except ValueError as e:
+        st.error(f"❌ No se restauró nada: {e}")
+
+# Un CSV suelto por tabla; el motor activo lo toma por bloques
+for tabla, etiqueta in [("rutas", "rutas_guardadas.csv"), ("viajes", "viajes_programados.csv"),
+                        ("datos", "datos_generales.csv"), ("historial", "historial_datos_generales.csv")]:
+    archivo = st.file_uploader(f"Subir {etiqueta}", type="csv", key=f"{tabla}_upload")
+    if archivo and st.button(f"♻️ Restaurar {etiqueta}", key=f"restaurar_{tabla}"):
+        try:
+            with medir(PAGINA, f"guardar restauración de {tabla}"), st.spinner("Validando y restaurando..."):
+                filas = restaurar_csv(archivo, tabla)
+            st.success(f"✅ {etiqueta} restaurado: {filas} filas.")
+        except ValueError as e:
+            st.error(f"❌ Error al restaurar {etiqueta}: {e}")
+
+st.markdown("---")
+st.subheader("🗄️ Motor de almacenamiento")
+st.write(f"**Motor activo:** {obtener_almacen().nombre.upper()} (variable de entorno `PICUS_ALMACEN`)")
+
+col1, col2 = st.columns(2)
+with col1:
+    if st.button("Migrar CSV → SQLite"):
+        n_rutas, n_viajes = migrar(AlmacenCSV(), AlmacenSQLite())
+        invalidar()
+        st.success(f"✅ Migradas {n_rutas} rutas y {n_viajes} tramos programados a SQLite.")
+with col2:
+    if st.button("Exportar SQLite → CSV"):
+        n_rutas, n_viajes = migrar(AlmacenSQLite(), AlmacenCSV())
+        invalidar()
+        st.success(f"✅ Exportadas {n_rutas} rutas y {n_viajes} tramos programados a CSV.")
+
+col3, col4 = st.columns(2)
+with col3:
+    if st.button("Migrar viajes CSV → Parquet mensual"):
+        n_rutas, n_viajes = migrar(AlmacenCSV(), AlmacenParquet())
+        invalidar()
+        st.success(f"✅ Migrados {n_viajes} tramos programados a archivos Parquet por mes.")
+with col4:
+    if st.button("Exportar viajes Parquet → CSV"):
+        n_rutas, n_viajes = migrar(AlmacenParquet(), AlmacenCSV())
+        invalidar()
+        st.success(f"✅ Exportados {n_viajes} tramos programados a CSV.")
@@ -0,0 +1,48 @@
+import streamlit as st
+
+from picus import escritura
+from picus.almacenamiento import obtener_almacen
+from picus.metricas import activas, archivo_log, configurar, reiniciar, resumen, resumen_por_etapa
+from picus.repositorio import rutas_rc, version_rutas
+
+st.title("🩺 Diagnóstico - PICUS RC")
+
+# Las métricas son del proceso del servidor: se comparten entre todas las sesiones
+st.subheader("⏱️ Tiempos por página")
+col1, col2 = st.columns(2)
+with col1:
+    medir_tiempos = st.toggle("Medir tiempos", value=activas(), help="También con la variable de entorno `PICUS_METRICAS=1`")
+    if medir_tiempos != activas():
+        configurar(activo=medir_tiempos)
+with col2:
+    log = st.text_input("Archivo JSONL (vacío = sin archivo)", value=archivo_log() or "",
+                        help="También con la variable de entorno `PICUS_METRICAS_LOG`")
+    if (log or None) != archivo_log():
+        configurar(log=log or None)
+
+if not activas():
+    st.info("La medición está apagada; actívala y navega por las páginas para ver sus tiempos.")
+
+tabla = resumen()
+if tabla.empty:
+    st.caption("Sin mediciones todavía.")
+else:
+    st.write("**Tiempo total por tipo de etapa (ms)**")
+    por_etapa = resumen_por_etapa(tabla)
+    st.bar_chart(por_etapa)
+    st.write("**Detalle por paso** (últimas mediciones de cada uno)")
+    st.dataframe(tabla, width="stretch", hide_index=True)
+    st.download_button("📥 Descargar métricas en CSV", data=tabla.to_csv(index=False),
+                       file_name="metricas_picus.csv", mime="text/csv")
+
+if st.button("🧹 Reiniciar métricas"):
+    reiniciar()
+    st.rerun()
+
+st.markdown("---")
+st.subheader("🧠 Estado del proceso")
+rutas = rutas_rc()
+cola = escritura._cola
+st.write(f"**Motor de almacenamiento:** {obtener_almacen().nombre.upper()}")
+st.write(f"**Rutas RC en memoria:** {0 if rutas is None else len(rutas)} (versión `{version_rutas()}`)")
+st.write(f"**Escrituras:** {cola.operaciones} operaciones en {cola.flushes} flushes del hilo escritor")
@@ -0,0 +1,90 @@
+import streamlit as st
+import numpy as np
+import pandas as pd
+
+from picus.metricas import medir
+from picus.parametros import cargar_datos_generales
+from picus.rentabilidad import UMBRAL_UTILIDAD_NETA
+from picus.repositorio import rutas_rc, version_rutas
+from picus.sensibilidad import CORRELACION_DIESEL_TC, N_ESCENARIOS, PARAMETROS_RIESGO, VOLATILIDAD, analizar_portafolio
+
+PAGINA = "sensibilidad"
+MAX_FILAS_RUTAS = 500
+
+st.title("🎲 Sensibilidad a Diesel y Tipo de Cambio - PICUS RC")
+
+with medir(PAGINA, "cargar rutas"):
+    valores = cargar_datos_generales()
+    df = rutas_rc()
+if df is None or df.empty:
+    st.warning("⚠️ No hay rutas cortas registradas todavía.")
+    st.stop()
+
+st.caption(
+    f"Valores vigentes: Diesel ${valores['Costo Diesel']:,.2f} | Tipo de cambio USD {valores['Tipo de cambio USD']:,.2f} | "
+    f"Rendimiento {valores['Rendimiento Camion']:,.2f} km/l. Cada escenario mueve los tres a la vez sobre las {len(df)} rutas."
+)
+
+with st.form("sensibilidad"):
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        n_escenarios = st.number_input("Escenarios", min_value=1000, max_value=50000, value=N_ESCENARIOS, step=1000)
+        umbral = st.number_input("% Utilidad Neta mínima", value=float(UMBRAL_UTILIDAD_NETA), step=1.0)
+    with col2:
+        volatilidad = {
+            p: st.slider(f"Volatilidad {p} (%)", min_value=0, max_value=50, value=int(VOLATILIDAD[p] * 100)) / 100
+            for p in PARAMETROS_RIESGO
+        }
+    with col3:
+        correlacion = st.slider("Correlación diesel / tipo de cambio", min_value=-1.0, max_value=1.0,
+                                value=CORRELACION_DIESEL_TC, step=0.05)
+        semilla = st.number_input("Semilla", min_value=0, value=0, step=1)
+    simular = st.form_submit_button("▶️ Simular escenarios")
+
+if simular:
+    with medir(PAGINA, "calcular escenarios"), st.spinner("Simulando escenarios..."):
+        resultados = analizar_portafolio(df, valores, int(n_escenarios), volatilidad, correlacion, umbral, int(semilla))
+    st.session_state.resultado_sensibilidad = {"version": version_rutas(), "umbral": umbral, "resultados": resultados}
+
+guardado = st.session_state.get("resultado_sensibilidad")
+if guardado is None:
+    st.info("Ajusta los supuestos y presiona **Simular escenarios**.")
+    st.stop()
+if guardado["version"] != version_rutas():
+    st.caption("⚠️ El catálogo cambió desde esta simulación; vuelve a simular para actualizarla.")
+
+por_ruta, por_cliente, portafolio = guardado["resultados"]
+umbral = guardado["umbral"]
+
+# ============================
+# Portafolio completo
+# ============================
+st.subheader("📊 Portafolio completo")
+margen = portafolio["% Utilidad Neta"]
+p5, p50, p95 = np.nanpercentile(margen, [5, 50, 95])
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("% Utilidad Neta P5", f"{p5:.2f}%")
+col2.metric("% Utilidad Neta P50", f"{p50:.2f}%")
+col3.metric("% Utilidad Neta P95", f"{p95:.2f}%")
+col4.metric(f"Prob. bajo {umbral:g}%", f"{(margen < umbral).mean() * 100:.1f}%")
+
+with medir(PAGINA, "render distribución"):
+    conteo, bordes = np.histogram(margen.dropna(), bins=40)
+    st.bar_chart(pd.DataFrame({"Escenarios": conteo}, index=np.round((bordes[:-1] + bordes[1:]) / 2, 2)))
+
+# ============================
+# Por cliente y por ruta
+# ============================
+st.subheader("👥 Riesgo por cliente")
+st.caption(f"Prob. Bajo Umbral = fracción de escenarios con % Utilidad Neta menor a {umbral:g}%.")
+with medir(PAGINA, "render clientes"):
+    st.dataframe(por_cliente.sort_values(["Prob. Bajo Umbral", "% Utilidad Neta P5"], ascending=[False, True]),
+                 width="stretch", hide_index=True)
+
+st.subheader("🛣️ Rutas más expuestas")
+riesgosas = por_ruta.sort_values(["Prob. Bajo Umbral", "% Utilidad Neta P5"], ascending=[False, True])
+st.caption(f"Se muestran {min(MAX_FILAS_RUTAS, len(riesgosas))} de {len(riesgosas)} rutas; la descarga incluye todas.")
+with medir(PAGINA, "render rutas"):
+    st.dataframe(riesgosas.head(MAX_FILAS_RUTAS), width="stretch")
+    st.download_button("📥 Descargar sensibilidad por ruta (CSV)", data=riesgosas.to_csv().encode("utf-8"),
+                       file_name="sensibilidad_rutas.csv", mime="text/csv")
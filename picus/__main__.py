@@ -0,0 +1,73 @@
+import argparse
+import sys
+import time
+
+import pandas as pd
+
+from picus.constantes import RUTA_DATOS
+from picus.cotizador import cotizar_carriles
+from picus.importacion import leer_archivo
+from picus.parametros import cargar_datos_generales
+
+# ============================
+# Línea de comandos: python -m picus <comando>
+# ============================
+
+
+def _cotizar(args):
+    inicio = time.perf_counter()
+    carriles = leer_archivo(args.entrada, args.entrada)
+    rutas = None
+    if args.regreso:
+        if args.rutas:
+            from picus.costos import aplicar_costos
+            rutas = aplicar_costos(pd.read_csv(args.rutas), cargar_datos_generales(args.datos))
+        else:
+            from picus.repositorio import rutas_rc
+            rutas = rutas_rc()
+    resultado, errores = cotizar_carriles(carriles, cargar_datos_generales(args.datos), rutas, args.regreso)
+
+    if args.salida == "-":
+        resultado.to_csv(sys.stdout, index=False)
+    else:
+        resultado.to_csv(args.salida, index=False)
+    if args.errores and not errores.empty:
+        errores.to_csv(args.errores, index=False)
+
+    segundos = time.perf_counter() - inicio
+    print(f"✅ {len(resultado)} carril(es) cotizados en {segundos:.2f} s; {len(errores)} con errores", file=sys.stderr)
+    return 0 if errores.empty else 2
+
+
+def _servir(args):
+    from picus.servidor import servir
+    print(f"🚚 Servicio de cotización en http://{args.host}:{args.puerto}", file=sys.stderr)
+    servir(args.host, args.puerto, args.datos)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="picus", description="Herramientas de PICUS sin interfaz")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    cotizar = comandos.add_parser("cotizar", help="Cotiza un CSV/XLSX de carriles hipotéticos")
+    cotizar.add_argument("entrada", help="Archivo con columnas de la plantilla de importación")
+    cotizar.add_argument("-o", "--salida", default="-", help="CSV de salida ('-' = salida estándar)")
+    cotizar.add_argument("--datos", default=RUTA_DATOS, help="CSV de Datos Generales")
+    cotizar.add_argument("--regreso", action="store_true", help="Agrega el mejor regreso del catálogo")
+    cotizar.add_argument("--rutas", help="CSV de rutas para buscar regresos (por defecto el almacén)")
+    cotizar.add_argument("--errores", help="CSV donde guardar las filas rechazadas")
+    cotizar.set_defaults(funcion=_cotizar)
+
+    servidor = comandos.add_parser("servir", help="Servicio HTTP local de cotización")
+    servidor.add_argument("--host", default="127.0.0.1")
+    servidor.add_argument("--puerto", type=int, default=8765)
+    servidor.add_argument("--datos", default=RUTA_DATOS, help="CSV de Datos Generales")
+    servidor.set_defaults(funcion=_servir)
+
+    args = parser.parse_args(argv)
+    return args.funcion(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
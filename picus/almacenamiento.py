@@ -0,0 +1,890 @@
+import contextlib
+import datetime
+import functools
+import glob
+import os
+import shutil
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from picus import indice_viajes
+from picus.constantes import RUTA_INDICE_VIAJES, RUTA_PROG, RUTA_RUTAS, RUTA_SQLITE, RUTA_VIAJES_MES
+from picus.escritura import AlmacenSerializado, bloqueo, en_serie, reemplazar_atomico
+from picus.esquema import AlmacenTipado
+
+# ============================
+# Motores de almacenamiento
+# ============================
+# "csv" (por defecto) conserva los archivos rutas_guardadas.csv y
+# viajes_programados.csv. "sqlite" guarda ambas tablas en un archivo local
+# con índices, de modo que altas, ediciones y bajas tocan solo sus filas.
+# "parquet" deja las rutas en CSV y guarda los viajes en un archivo Parquet
+# por mes. Se elige con la variable de entorno PICUS_ALMACEN.
+
+MOTORES = ["csv", "sqlite", "parquet"]
+# Filas por bloque al restaurar un CSV grande sin cargarlo completo
+FILAS_BLOQUE = 50_000
+
+TABLA_RUTAS = "rutas"
+TABLA_VIAJES = "viajes"
+TABLA_INDICE_VIAJES = "indice_viajes"
+
+INDICES = {
+    TABLA_RUTAS: [("idx_rutas_tipo_origen", ["Tipo", "Origen"]), ("idx_rutas_cliente", ["Cliente"])],
+    TABLA_VIAJES: [("idx_viajes_programacion_tramo", ["ID_Programacion", "Tramo"]), ("idx_viajes_fecha", ["Fecha"])],
+}
+
+
+def _firma_archivo(ruta):
+    try:
+        info = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+    return (info.st_mtime_ns, info.st_size)
+
+
+def _escribir_csv(ruta, df):
+    reemplazar_atomico(ruta, lambda temporal: df.to_csv(temporal, index=False))
+
+
+def _anexar_csv(ruta, df_nuevo):
+    # Si las columnas coinciden se agrega al final del archivo sin reescribirlo
+    if df_nuevo.empty:
+        return
+    if not os.path.exists(ruta) or os.path.getsize(ruta) == 0:
+        _escribir_csv(ruta, df_nuevo)
+        return
+    encabezado = pd.read_csv(ruta, nrows=0).columns.tolist()
+    if set(df_nuevo.columns) <= set(encabezado):
+        df_nuevo.reindex(columns=encabezado).to_csv(ruta, mode="a", header=False, index=False)
+    else:
+        _escribir_csv(ruta, pd.concat([pd.read_csv(ruta), df_nuevo], ignore_index=True))
+
+
+def _con_bloqueo(atributo):
+    # Lectura-modificación-escritura bajo el candado del archivo indicado por `atributo`
+    def decorador(metodo):
+        @functools.wraps(metodo)
+        def envoltura(self, *args, **kwargs):
+            with bloqueo(getattr(self, atributo)):
+                return metodo(self, *args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def _texto_fecha(valor):
+    return None if valor is None else str(_normalizar_valor(valor))[:10]
+
+
+def _filtrar_fechas(df, desde, hasta):
+    # Las fechas se guardan como texto ISO (AAAA-MM-DD), así que se comparan como texto
+    if desde is None and hasta is None:
+        return df
+    fecha = df["Fecha"].astype(str).str[:10]
+    mascara = pd.Series(True, index=df.index)
+    if desde is not None:
+        mascara &= fecha >= _texto_fecha(desde)
+    if hasta is not None:
+        mascara &= fecha <= _texto_fecha(hasta)
+    return df[mascara]
+
+
+def _aplicar_cambios(df, id_programacion, tramo, cambios):
+    # Localiza el tramo una sola vez y escribe todos los campos sobre esa fila
+    posiciones = ((df["ID_Programacion"] == id_programacion) & (df["Tramo"] == tramo)).to_numpy().nonzero()[0]
+    if len(posiciones) == 0:
+        raise KeyError(f"No existe el tramo {tramo} de {id_programacion}")
+    for col, val in cambios.items():
+        val = _normalizar_valor(val)
+        if col not in df.columns:
+            df[col] = None
+        elif isinstance(val, str) and not pd.api.types.is_object_dtype(df[col]):
+            df[col] = df[col].astype(object)
+        df.iloc[posiciones, df.columns.get_loc(col)] = val
+    return df
+
+
+def _aplicar_cambios_lote(df, cambios):
+    # Varios tramos en una pasada; `cambios` trae ID_Programacion, Tramo y las columnas a escribir.
+    # Un tráfico puede repetir Tramo (VACIO + regreso son VUELTA): la n-ésima
+    # fila de una llave en `cambios` va a la n-ésima de esa llave en `df`
+    llaves = ["ID_Programacion", "Tramo"]
+    cruce = _con_ocurrencia(df[llaves]).reset_index(names="_fila").merge(
+        _con_ocurrencia(cambios[llaves]).reset_index(names="_cambio"), on=llaves + ["_n"])
+    faltantes = len(cambios) - cruce["_cambio"].nunique()
+    if faltantes:
+        raise KeyError(f"No existen {faltantes} de los tramos a actualizar")
+    filas = cruce["_fila"].to_numpy()
+    for col in [c for c in cambios.columns if c not in llaves]:
+        serie = cambios[col]
+        if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+            # Montos tal cual: un arreglo object no entra en una columna float64
+            valores = serie.to_numpy()[cruce["_cambio"].to_numpy()]
+        else:
+            valores = serie.map(_normalizar_valor).to_numpy(dtype=object)[cruce["_cambio"].to_numpy()]
+        if col not in df.columns:
+            df[col] = None
+        elif valores.dtype != object and pd.api.types.is_numeric_dtype(df[col]):
+            if df[col].dtype != valores.dtype:
+                df[col] = df[col].astype(np.result_type(df[col].dtype, valores.dtype))
+        elif any(isinstance(v, str) for v in valores) and not pd.api.types.is_object_dtype(df[col]):
+            df[col] = df[col].astype(object)
+        df.iloc[filas, df.columns.get_loc(col)] = valores
+    return df
+
+
+def _con_ocurrencia(llaves):
+    llaves = llaves.reset_index(drop=True)
+    return llaves.assign(_n=llaves.groupby(list(llaves.columns), sort=False).cumcount())
+
+
+# Columnas con que se comprueba que un índice de ruta sigue siendo la ruta que se mostró
+COLUMNAS_IDENTIDAD_RUTA = ["Fecha", "Tipo", "Cliente", "Origen", "Destino"]
+
+
+def _identidad(fila):
+    # Texto comparable de las columnas de identidad (la fecha como AAAA-MM-DD)
+    texto = []
+    for col in COLUMNAS_IDENTIDAD_RUTA:
+        valor = fila.get(col)
+        valor = "" if valor is None or (pd.api.types.is_scalar(valor) and pd.isna(valor)) else str(_normalizar_valor(valor)).strip()
+        texto.append(valor[:10] if col == "Fecha" else valor)
+    return tuple(texto)
+
+
+def _verificar_rutas(actuales, esperadas):
+    # Las escrituras van en cola: una baja previa recorre las posiciones del
+    # CSV. Si un índice ya no es la ruta que se mostró, no se escribe nada
+    if esperadas is None:
+        return
+    distintas = [i for i, fila in esperadas.iterrows()
+                 if i not in actuales.index or _identidad(actuales.loc[i]) != _identidad(fila)]
+    if distintas:
+        raise ValueError(f"{len(distintas)} ruta(s) cambiaron desde que se mostraron "
+                         f"(índices {', '.join(map(str, distintas[:10]))}); vuelve a cargar la página")
+
+
+def _ampliar_columna(df, col, valor):
+    # Pandas ya no sube el tipo al asignar (int con decimales, texto en una
+    # columna numérica): la columna pasa antes al tipo común con el valor
+    if col not in df.columns:
+        df[col] = None
+        return
+    muestra = pd.Series([np.nan if valor is None else valor])
+    comun = pd.concat([df[col].iloc[:0], muestra]).dtype
+    if comun != df[col].dtype:
+        df[col] = df[col].astype(comun)
+
+
+def _normalizar_valor(valor):
+    if valor is None:
+        return None
+    if isinstance(valor, (datetime.date, datetime.datetime, pd.Timestamp)):
+        return valor.strftime("%Y-%m-%d")
+    if hasattr(valor, "item"):
+        valor = valor.item()
+    if isinstance(valor, float) and pd.isna(valor):
+        return None
+    return valor
+
+
+class AlmacenCSV:
+    nombre = "csv"
+
+    def __init__(self, ruta_rutas=RUTA_RUTAS, ruta_viajes=RUTA_PROG, ruta_indice=RUTA_INDICE_VIAJES):
+        self.ruta_rutas = ruta_rutas
+        self.ruta_viajes = ruta_viajes
+        self.ruta_indice = ruta_indice
+        # Archivo cuyo candado protege viajes + índice
+        self.bloqueo_viajes = ruta_viajes
+
+    # ---------- Rutas ----------
+    def existe_rutas(self):
+        return os.path.exists(self.ruta_rutas)
+
+    def firma_rutas(self):
+        return _firma_archivo(self.ruta_rutas)
+
+    def leer_rutas(self):
+        if not self.existe_rutas():
+            return None
+        return pd.read_csv(self.ruta_rutas)
+
+    @_con_bloqueo("ruta_rutas")
+    def guardar_rutas(self, df):
+        _escribir_csv(self.ruta_rutas, df)
+
+    @_con_bloqueo("ruta_rutas")
+    def agregar_rutas(self, df_nuevo):
+        _anexar_csv(self.ruta_rutas, df_nuevo)
+
+    @_con_bloqueo("ruta_rutas")
+    def actualizar_ruta(self, indice, cambios, esperada=None):
+        # `esperada`: columnas de identidad de la ruta tal como se mostró
+        df = self.leer_rutas()
+        _verificar_rutas(df, None if esperada is None else pd.DataFrame([esperada], index=[indice]))
+        for col, val in cambios.items():
+            val = _normalizar_valor(val)
+            _ampliar_columna(df, col, val)
+            df.at[indice, col] = val
+        self.guardar_rutas(df)
+
+    @_con_bloqueo("ruta_rutas")
+    def eliminar_rutas(self, indices, esperadas=None):
+        # `esperadas`: DataFrame con las columnas de identidad, indexado como `indices`
+        df = self.leer_rutas()
+        _verificar_rutas(df, esperadas)
+        self.guardar_rutas(df.drop(index=indices).reset_index(drop=True))
+
+    @_con_bloqueo("ruta_rutas")
+    def restaurar_rutas_csv(self, ruta_csv):
+        # `ruta_csv` ya validado y en la misma carpeta: el cambio es un rename
+        os.replace(ruta_csv, self.ruta_rutas)
+
+    def buscar_rutas(self, **filtros):
+        df = self.leer_rutas()
+        if df is None:
+            return pd.DataFrame()
+        for col, val in filtros.items():
+            df = df[df[col] == val]
+        return df
+
+    # ---------- Viajes programados ----------
+    def existe_viajes(self):
+        return os.path.exists(self.ruta_viajes)
+
+    def leer_viajes(self, desde=None, hasta=None, columnas=None):
+        if not self.existe_viajes():
+            return None
+        usar = None
+        if columnas is not None:
+            encabezado = pd.read_csv(self.ruta_viajes, nrows=0).columns
+            usar = [c for c in encabezado if c in set(columnas) | {"Fecha"}]
+        df = _filtrar_fechas(pd.read_csv(self.ruta_viajes, usecols=usar), desde, hasta)
+        if columnas is not None:
+            df = df[[c for c in columnas if c in df.columns]]
+        return df.reset_index(drop=True)
+
+    @_con_bloqueo("bloqueo_viajes")
+    def guardar_viajes(self, df):
+        self._escribir_viajes(df)
+        self._escribir_indice(indice_viajes.resumir(df))
+
+    @_con_bloqueo("bloqueo_viajes")
+    def agregar_viajes(self, df_nuevo):
+        if df_nuevo.empty:
+            return
+        indice = self._indice_vigente()
+        self._anexar_viajes(df_nuevo)
+        if indice is None:
+            self._reconstruir_indice()
+        else:
+            self._escribir_indice(indice_viajes.fusionar(indice, df_nuevo))
+
+    @_con_bloqueo("bloqueo_viajes")
+    def restaurar_viajes_csv(self, ruta_csv):
+        # El índice queda más viejo que los viajes y se reconstruye en la siguiente lectura
+        os.replace(ruta_csv, self.ruta_viajes)
+
+    def _escribir_viajes(self, df):
+        _escribir_csv(self.ruta_viajes, df)
+
+    def _anexar_viajes(self, df_nuevo):
+        _anexar_csv(self.ruta_viajes, df_nuevo)
+
+    def _firma_viajes(self):
+        firma = _firma_archivo(self.ruta_viajes)
+        return None if firma is None else firma[0]
+
+    def leer_tramo(self, id_programacion, tramo):
+        df = self.leer_programaciones([id_programacion])
+        if df.empty:
+            return None
+        fila = df[df["Tramo"] == tramo]
+        return None if fila.empty else fila.iloc[0]
+
+    @_con_bloqueo("bloqueo_viajes")
+    def actualizar_tramo(self, id_programacion, tramo, cambios):
+        # En CSV no hay escritura por fila: se aplica el cambio en una pasada y se reescribe el archivo
+        indice = self._indice_vigente()
+        self._escribir_viajes(_aplicar_cambios(self.leer_viajes(), id_programacion, tramo, cambios))
+        self._actualizar_cabecera(indice, id_programacion, tramo, cambios)
+
+    @_con_bloqueo("bloqueo_viajes")
+    def actualizar_tramos(self, cambios):
+        # Varios tramos con una sola reescritura del archivo y del índice
+        if cambios.empty:
+            return
+        indice = self._indice_vigente()
+        self._escribir_viajes(_aplicar_cambios_lote(self.leer_viajes(), cambios))
+        self._actualizar_cabeceras(indice, cambios)
+
+    # ---------- Índice de estado de tráficos ----------
+    def _indice_vigente(self):
+        # El índice se escribe siempre después de los viajes; si es más viejo
+        # que ellos (o no existe) alguien tocó los viajes por fuera y no sirve
+        firma_indice = _firma_archivo(self.ruta_indice)
+        firma_viajes = self._firma_viajes()
+        if firma_indice is None or firma_viajes is None or firma_indice[0] < firma_viajes:
+            return None
+        return pd.read_csv(self.ruta_indice, dtype={"ID_Programacion": str, "Número_Trafico": str})
+
+    def _escribir_indice(self, indice):
+        _escribir_csv(self.ruta_indice, indice)
+
+    def _actualizar_cabecera(self, indice, id_programacion, tramo, cambios):
+        self._actualizar_cabeceras(indice, pd.DataFrame([{"ID_Programacion": id_programacion, "Tramo": tramo, **cambios}]))
+
+    def _actualizar_cabeceras(self, indice, cambios):
+        # Siempre se reescribe para que el índice quede más nuevo que los viajes
+        if indice is None:
+            self._reconstruir_indice()
+            return
+        idas = cambios[cambios["Tramo"] == "IDA"].drop_duplicates("ID_Programacion", keep="last")
+        idas = idas.set_index("ID_Programacion")
+        filas = indice["ID_Programacion"].isin(idas.index)
+        for col in indice_viajes.COLUMNAS_CABECERA:
+            if col in idas.columns and filas.any():
+                indice[col] = indice[col].astype(object)
+                indice.loc[filas, col] = indice.loc[filas, "ID_Programacion"].map(idas[col].map(_normalizar_valor))
+        self._escribir_indice(indice)
+
+    def _reconstruir_indice(self):
+        columnas = ["ID_Programacion", "Tramo"] + indice_viajes.COLUMNAS_CABECERA
+        indice = indice_viajes.resumir(self.leer_viajes(columnas=columnas))
+        self._escribir_indice(indice)
+        return indice
+
+    def indice_viajes(self):
+        if not self.existe_viajes():
+            return indice_viajes.indice_vacio()
+        indice = self._indice_vigente()
+        # Reconstruirlo es una escritura: va al hilo escritor y bajo el candado de viajes
+        return en_serie(self._reconstruir_si_vencido) if indice is None else indice
+
+    @_con_bloqueo("bloqueo_viajes")
+    def _reconstruir_si_vencido(self):
+        # Otra escritura pudo dejarlo al día mientras se esperaba el turno
+        indice = self._indice_vigente()
+        return self._reconstruir_indice() if indice is None else indice
+
+    def leer_programaciones(self, ids):
+        # Tramos de los tráficos indicados; el índice da sus fechas y con eso
+        # solo se leen los meses/filas de ese rango
+        ids = pd.Index(ids)
+        indice = self.indice_viajes()
+        fechas = indice.loc[indice["ID_Programacion"].isin(ids), "Fecha"]
+        if fechas.empty:
+            return pd.DataFrame()
+        desde, hasta = (None, None) if fechas.isna().any() else (fechas.min(), fechas.max())
+        df = self.leer_viajes(desde=desde, hasta=hasta)
+        return df[df["ID_Programacion"].isin(ids)].reset_index(drop=True)
+
+
+def _tipo_sql(serie):
+    if pd.api.types.is_bool_dtype(serie) or pd.api.types.is_integer_dtype(serie):
+        return "INTEGER"
+    if pd.api.types.is_numeric_dtype(serie):
+        return "REAL"
+    return "TEXT"
+
+
+def _q(nombre):
+    return '"' + str(nombre).replace('"', '""') + '"'
+
+
+class AlmacenSQLite:
+    nombre = "sqlite"
+
+    def __init__(self, ruta_db=RUTA_SQLITE):
+        self.ruta_db = ruta_db
+
+    @contextlib.contextmanager
+    def _conexion(self):
+        # Una transacción por operación: commit al salir, rollback si falla
+        con = sqlite3.connect(self.ruta_db, timeout=30)
+        try:
+            # WAL: las lecturas no esperan a la escritura en curso
+            con.execute("PRAGMA journal_mode=WAL")
+            with con:
+                con.execute("CREATE TABLE IF NOT EXISTS _versiones (tabla TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+                yield con
+        finally:
+            con.close()
+
+    def _columnas(self, con, tabla):
+        return [fila[1] for fila in con.execute(f"PRAGMA table_info({_q(tabla)})")]
+
+    def _asegurar_tabla(self, con, tabla, df):
+        existentes = self._columnas(con, tabla)
+        if not existentes:
+            definicion = ", ".join(f"{_q(c)} {_tipo_sql(df[c])}" for c in df.columns)
+            con.execute(f"CREATE TABLE {_q(tabla)} (id INTEGER PRIMARY KEY, {definicion})")
+            existentes = ["id"] + list(df.columns)
+        for col in df.columns:
+            if col not in existentes:
+                con.execute(f"ALTER TABLE {_q(tabla)} ADD COLUMN {_q(col)} {_tipo_sql(df[col])}")
+        for nombre, columnas in INDICES[tabla]:
+            if all(c in df.columns or c in existentes for c in columnas):
+                lista = ", ".join(_q(c) for c in columnas)
+                con.execute(f"CREATE INDEX IF NOT EXISTS {nombre} ON {_q(tabla)} ({lista})")
+
+    def _incrementar_version(self, con, tabla):
+        con.execute(
+            "INSERT INTO _versiones (tabla, version) VALUES (?, 1) "
+            "ON CONFLICT(tabla) DO UPDATE SET version = version + 1",
+            (tabla,),
+        )
+
+    def _insertar(self, con, tabla, df, con_id=False):
+        if df.empty:
+            return
+        columnas = list(df.columns)
+        if con_id:
+            columnas = ["id"] + columnas
+        lista = ", ".join(_q(c) for c in columnas)
+        marcas = ", ".join("?" for _ in columnas)
+        filas = []
+        for indice, fila in zip(df.index, df.itertuples(index=False, name=None)):
+            valores = [_normalizar_valor(v) for v in fila]
+            filas.append([int(indice)] + valores if con_id else valores)
+        con.executemany(f"INSERT INTO {_q(tabla)} ({lista}) VALUES ({marcas})", filas)
+
+    def _leer(self, tabla, donde="", parametros=(), columnas=None):
+        if not os.path.exists(self.ruta_db):
+            return None
+        with self._conexion() as con:
+            existentes = self._columnas(con, tabla)
+            if not existentes:
+                return None
+            seleccion = "*"
+            if columnas is not None:
+                seleccion = ", ".join(_q(c) for c in ["id"] + [c for c in columnas if c in existentes])
+            df = pd.read_sql_query(
+                f"SELECT {seleccion} FROM {_q(tabla)} {donde} ORDER BY id", con, params=parametros, index_col="id"
+            )
+        df.index.name = None
+        return df
+
+    def _reemplazar(self, con, tabla, df):
+        con.execute(f"DROP TABLE IF EXISTS {_q(tabla)}")
+        self._asegurar_tabla(con, tabla, df)
+        ids_validos = pd.api.types.is_integer_dtype(df.index) and df.index.is_unique
+        self._insertar(con, tabla, df, con_id=ids_validos)
+        self._incrementar_version(con, tabla)
+
+    def _anexar(self, con, tabla, df):
+        self._asegurar_tabla(con, tabla, df)
+        self._insertar(con, tabla, df)
+        self._incrementar_version(con, tabla)
+
+    def _reemplazar_por_bloques(self, con, tabla, ruta_csv, filas_bloque):
+        # Dentro de la transacción de `con`: si un bloque falla la tabla queda como estaba.
+        # read_csv numera las filas de forma continua entre bloques, así que los ids
+        # quedan igual que con _reemplazar
+        con.execute(f"DROP TABLE IF EXISTS {_q(tabla)}")
+        for bloque in pd.read_csv(ruta_csv, chunksize=filas_bloque):
+            self._asegurar_tabla(con, tabla, bloque)
+            self._insertar(con, tabla, bloque, con_id=True)
+        self._incrementar_version(con, tabla)
+
+    # ---------- Rutas ----------
+    def existe_rutas(self):
+        return self.firma_rutas() is not None
+
+    def firma_rutas(self):
+        if not os.path.exists(self.ruta_db):
+            return None
+        with self._conexion() as con:
+            if not self._columnas(con, TABLA_RUTAS):
+                return None
+            fila = con.execute("SELECT version FROM _versiones WHERE tabla = ?", (TABLA_RUTAS,)).fetchone()
+        return fila[0] if fila else 0
+
+    def leer_rutas(self):
+        return self._leer(TABLA_RUTAS)
+
+    def guardar_rutas(self, df):
+        with self._conexion() as con:
+            self._reemplazar(con, TABLA_RUTAS, df)
+
+    def agregar_rutas(self, df_nuevo):
+        with self._conexion() as con:
+            self._anexar(con, TABLA_RUTAS, df_nuevo)
+
+    def _verificar_rutas(self, con, esperadas):
+        # Los id de SQLite no se recorren, pero la ruta pudo borrarse o reemplazarse
+        if esperadas is None:
+            return
+        columnas = [c for c in COLUMNAS_IDENTIDAD_RUTA if c in self._columnas(con, TABLA_RUTAS)]
+        ids = [int(i) for i in esperadas.index]
+        marcas = ", ".join("?" for _ in ids)
+        actuales = pd.read_sql_query(
+            f"SELECT id, {', '.join(_q(c) for c in columnas)} FROM {_q(TABLA_RUTAS)} WHERE id IN ({marcas})",
+            con, params=ids, index_col="id")
+        _verificar_rutas(actuales, esperadas)
+
+    def actualizar_ruta(self, indice, cambios, esperada=None):
+        with self._conexion() as con:
+            self._verificar_rutas(con, None if esperada is None else pd.DataFrame([esperada], index=[indice]))
+            self._asegurar_tabla(con, TABLA_RUTAS, pd.DataFrame([cambios]))
+            asignaciones = ", ".join(f"{_q(c)} = ?" for c in cambios)
+            valores = [_normalizar_valor(v) for v in cambios.values()] + [int(indice)]
+            con.execute(f"UPDATE {_q(TABLA_RUTAS)} SET {asignaciones} WHERE id = ?", valores)
+            self._incrementar_version(con, TABLA_RUTAS)
+
+    def eliminar_rutas(self, indices, esperadas=None):
+        with self._conexion() as con:
+            self._verificar_rutas(con, esperadas)
+            con.executemany(f"DELETE FROM {_q(TABLA_RUTAS)} WHERE id = ?", [(int(i),) for i in indices])
+            self._incrementar_version(con, TABLA_RUTAS)
+
+    def restaurar_rutas_csv(self, ruta_csv, filas_bloque=FILAS_BLOQUE):
+        with self._conexion() as con:
+            self._reemplazar_por_bloques(con, TABLA_RUTAS, ruta_csv, filas_bloque)
+
+    def buscar_rutas(self, **filtros):
+        donde = " AND ".join(f"{_q(c)} = ?" for c in filtros)
+        df = self._leer(TABLA_RUTAS, f"WHERE {donde}" if donde else "", tuple(filtros.values()))
+        return pd.DataFrame() if df is None else df
+
+    # ---------- Viajes programados ----------
+    def existe_viajes(self):
+        if not os.path.exists(self.ruta_db):
+            return False
+        with self._conexion() as con:
+            return bool(self._columnas(con, TABLA_VIAJES))
+
+    def leer_viajes(self, desde=None, hasta=None, columnas=None):
+        condiciones, parametros = [], []
+        if desde is not None:
+            condiciones.append('"Fecha" >= ?')
+            parametros.append(_texto_fecha(desde))
+        if hasta is not None:
+            condiciones.append('substr("Fecha", 1, 10) <= ?')
+            parametros.append(_texto_fecha(hasta))
+        donde = "WHERE " + " AND ".join(condiciones) if condiciones else ""
+        df = self._leer(TABLA_VIAJES, donde, tuple(parametros), columnas)
+        return None if df is None else df.reset_index(drop=True)
+
+    def guardar_viajes(self, df):
+        with self._conexion() as con:
+            self._reemplazar(con, TABLA_VIAJES, df.reset_index(drop=True))
+            con.execute(f"DROP TABLE IF EXISTS {_q(TABLA_INDICE_VIAJES)}")
+            self._asegurar_indice(con)
+
+    def restaurar_viajes_csv(self, ruta_csv, filas_bloque=FILAS_BLOQUE):
+        with self._conexion() as con:
+            self._reemplazar_por_bloques(con, TABLA_VIAJES, ruta_csv, filas_bloque)
+            con.execute(f"DROP TABLE IF EXISTS {_q(TABLA_INDICE_VIAJES)}")
+            self._asegurar_indice(con)
+
+    def agregar_viajes(self, df_nuevo):
+        if df_nuevo.empty:
+            return
+        # Viajes e índice se actualizan en la misma transacción
+        with self._conexion() as con:
+            self._asegurar_indice(con)
+            self._anexar(con, TABLA_VIAJES, df_nuevo)
+            self._registrar_en_indice(con, indice_viajes.resumir(df_nuevo))
+
+    def leer_tramo(self, id_programacion, tramo):
+        if not self.existe_viajes():
+            return None
+        df = self._leer(TABLA_VIAJES, 'WHERE "ID_Programacion" = ? AND "Tramo" = ?', (id_programacion, tramo))
+        return None if df.empty else df.reset_index(drop=True).iloc[0]
+
+    def actualizar_tramo(self, id_programacion, tramo, cambios):
+        with self._conexion() as con:
+            self._asegurar_tabla(con, TABLA_VIAJES, pd.DataFrame([cambios]))
+            asignaciones = ", ".join(f"{_q(c)} = ?" for c in cambios)
+            valores = [_normalizar_valor(v) for v in cambios.values()]
+            cursor = con.execute(
+                f'UPDATE {_q(TABLA_VIAJES)} SET {asignaciones} WHERE "ID_Programacion" = ? AND "Tramo" = ?',
+                valores + [id_programacion, tramo],
+            )
+            if cursor.rowcount == 0:
+                raise KeyError(f"No existe el tramo {tramo} de {id_programacion}")
+            cabecera = {c: v for c, v in cambios.items() if c in indice_viajes.COLUMNAS_CABECERA}
+            if tramo == "IDA" and cabecera:
+                self._asegurar_indice(con)
+                asignaciones = ", ".join(f"{_q(c)} = ?" for c in cabecera)
+                con.execute(
+                    f'UPDATE {_q(TABLA_INDICE_VIAJES)} SET {asignaciones} WHERE "ID_Programacion" = ?',
+                    [_normalizar_valor(v) for v in cabecera.values()] + [id_programacion],
+                )
+            self._incrementar_version(con, TABLA_VIAJES)
+
+    def actualizar_tramos(self, cambios):
+        # Todos los UPDATE en una sola transacción
+        if cambios.empty:
+            return
+        llaves = ["ID_Programacion", "Tramo"]
+        columnas = [c for c in cambios.columns if c not in llaves]
+        with self._conexion() as con:
+            self._asegurar_tabla(con, TABLA_VIAJES, cambios[columnas])
+            asignaciones = ", ".join(f"{_q(c)} = ?" for c in columnas)
+            # Tramos repetidos en un tráfico: la n-ésima fila de la llave, en orden de id
+            filas = [[_normalizar_valor(v) for v in fila]
+                     for fila in _con_ocurrencia(cambios[llaves]).join(cambios[columnas].reset_index(drop=True))
+                     [columnas + llaves + ["_n"]].itertuples(index=False, name=None)]
+            cursor = con.executemany(
+                f'UPDATE {_q(TABLA_VIAJES)} SET {asignaciones} WHERE id = (SELECT id FROM {_q(TABLA_VIAJES)} '
+                f'WHERE "ID_Programacion" = ? AND "Tramo" = ? ORDER BY id LIMIT 1 OFFSET ?)', filas)
+            if cursor.rowcount < len(cambios):
+                raise KeyError(f"No existen {len(cambios) - cursor.rowcount} de los tramos a actualizar")
+            cabecera = [c for c in columnas if c in indice_viajes.COLUMNAS_CABECERA]
+            idas = cambios[cambios["Tramo"] == "IDA"]
+            if cabecera and not idas.empty:
+                self._asegurar_indice(con)
+                asignaciones = ", ".join(f"{_q(c)} = ?" for c in cabecera)
+                con.executemany(
+                    f'UPDATE {_q(TABLA_INDICE_VIAJES)} SET {asignaciones} WHERE "ID_Programacion" = ?',
+                    [[_normalizar_valor(v) for v in fila]
+                     for fila in idas[cabecera + ["ID_Programacion"]].itertuples(index=False, name=None)],
+                )
+            self._incrementar_version(con, TABLA_VIAJES)
+
+    # ---------- Índice de estado de tráficos ----------
+    def _asegurar_indice(self, con):
+        # Si la tabla no existe (base creada antes del índice) se arma una vez
+        # desde los viajes; de ahí en adelante solo se actualiza por altas
+        if self._columnas(con, TABLA_INDICE_VIAJES):
+            return
+        definicion = ", ".join(f"{_q(c)} TEXT" for c in indice_viajes.COLUMNAS_CABECERA)
+        con.execute(
+            f"CREATE TABLE {_q(TABLA_INDICE_VIAJES)} (\"ID_Programacion\" TEXT PRIMARY KEY, "
+            f"\"Tramos\" INTEGER NOT NULL, \"Estado\" TEXT NOT NULL, {definicion})"
+        )
+        existentes = self._columnas(con, TABLA_VIAJES)
+        if "ID_Programacion" in existentes:
+            columnas = [c for c in ["ID_Programacion", "Tramo"] + indice_viajes.COLUMNAS_CABECERA if c in existentes]
+            lista = ", ".join(_q(c) for c in columnas)
+            tramos = pd.read_sql_query(f"SELECT {lista} FROM {_q(TABLA_VIAJES)} ORDER BY id", con)
+            self._registrar_en_indice(con, indice_viajes.resumir(tramos))
+
+    def _registrar_en_indice(self, con, resumen):
+        if resumen.empty:
+            return
+        columnas = indice_viajes.COLUMNAS_INDICE
+        lista = ", ".join(_q(c) for c in columnas)
+        marcas = ", ".join("?" for _ in columnas)
+        con.executemany(
+            f"INSERT INTO {_q(TABLA_INDICE_VIAJES)} ({lista}) VALUES ({marcas}) "
+            "ON CONFLICT(\"ID_Programacion\") DO UPDATE SET "
+            "\"Tramos\" = \"Tramos\" + excluded.\"Tramos\", "
+            f"\"Estado\" = CASE WHEN \"Tramos\" + excluded.\"Tramos\" >= 2 "
+            f"THEN '{indice_viajes.CONCLUIDO}' ELSE '{indice_viajes.PENDIENTE}' END",
+            [[_normalizar_valor(v) for v in fila] for fila in resumen[columnas].itertuples(index=False, name=None)],
+        )
+
+    def indice_viajes(self):
+        if not self.existe_viajes():
+            return indice_viajes.indice_vacio()
+        with self._conexion() as con:
+            self._asegurar_indice(con)
+            return pd.read_sql_query(f"SELECT * FROM {_q(TABLA_INDICE_VIAJES)} ORDER BY rowid", con)
+
+    def leer_programaciones(self, ids):
+        ids = [_normalizar_valor(i) for i in ids]
+        if not ids or not self.existe_viajes():
+            return pd.DataFrame()
+        partes = []
+        # Por bloques para no rebasar el límite de parámetros de SQLite
+        for inicio in range(0, len(ids), 500):
+            bloque = ids[inicio:inicio + 500]
+            marcas = ", ".join("?" for _ in bloque)
+            partes.append(self._leer(TABLA_VIAJES, f"WHERE \"ID_Programacion\" IN ({marcas})", tuple(bloque)))
+        return pd.concat(partes).sort_index().reset_index(drop=True)
+
+
+SIN_FECHA = "sin_fecha"
+
+
+def _mes(fechas):
+    mes = fechas.astype("string").str[:7]
+    return mes.where(mes.str.fullmatch(r"\d{4}-\d{2}").fillna(False), SIN_FECHA)
+
+
+def _preparar_parquet(df):
+    # Parquet exige un tipo por columna: lo que siga como object tras inferir se guarda como texto
+    df = df.infer_objects()
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].astype("string")
+    return df
+
+
+class AlmacenParquet(AlmacenCSV):
+    # Rutas en CSV (igual que el motor "csv"); viajes en un archivo Parquet por
+    # mes dentro de `carpeta_viajes`. Una consulta por rango de fechas abre solo
+    # los meses del rango y solo las columnas pedidas, y una alta reescribe
+    # únicamente el mes al que pertenece.
+    nombre = "parquet"
+
+    def __init__(self, ruta_rutas=RUTA_RUTAS, carpeta_viajes=RUTA_VIAJES_MES):
+        super().__init__(ruta_rutas=ruta_rutas, ruta_indice=os.path.join(carpeta_viajes, "indice.csv"))
+        self.carpeta_viajes = carpeta_viajes
+        self.bloqueo_viajes = carpeta_viajes
+
+    def _ruta_mes(self, mes):
+        return os.path.join(self.carpeta_viajes, f"{mes}.parquet")
+
+    def _meses(self):
+        archivos = glob.glob(os.path.join(self.carpeta_viajes, "*.parquet"))
+        return sorted(os.path.splitext(os.path.basename(a))[0] for a in archivos)
+
+    def _escribir_mes(self, mes, df):
+        os.makedirs(self.carpeta_viajes, exist_ok=True)
+        datos = _preparar_parquet(df.reset_index(drop=True))
+        reemplazar_atomico(self._ruta_mes(mes), lambda temporal: datos.to_parquet(temporal, index=False))
+
+    def _leer_mes(self, mes, columnas=None):
+        ruta = self._ruta_mes(mes)
+        if columnas is not None:
+            import pyarrow.parquet as pq
+            disponibles = pq.read_schema(ruta).names
+            columnas = [c for c in disponibles if c in columnas]
+        return pd.read_parquet(ruta, columns=columnas)
+
+    # ---------- Viajes programados ----------
+    def existe_viajes(self):
+        return bool(self._meses())
+
+    def leer_viajes(self, desde=None, hasta=None, columnas=None):
+        meses = self._meses()
+        if not meses:
+            return None
+        # Poda por partición: el nombre del archivo es el mes (AAAA-MM)
+        if desde is not None or hasta is not None:
+            inicio = _texto_fecha(desde)[:7] if desde is not None else ""
+            fin = _texto_fecha(hasta)[:7] if hasta is not None else "9999-99"
+            meses = [m for m in meses if m != SIN_FECHA and inicio <= m <= fin]
+        leer = None if columnas is None else set(columnas) | {"Fecha"}
+        partes = [self._leer_mes(m, leer) for m in meses]
+        if not partes:
+            return pd.DataFrame(columns=list(columnas or []))
+        df = _filtrar_fechas(pd.concat(partes, ignore_index=True), desde, hasta)
+        if columnas is not None:
+            df = df[[c for c in columnas if c in df.columns]]
+        return df.reset_index(drop=True)
+
+    def _firma_viajes(self):
+        firmas = [_firma_archivo(self._ruta_mes(m)) for m in self._meses()]
+        firmas = [f[0] for f in firmas if f is not None]
+        return max(firmas) if firmas else None
+
+    def _escribir_viajes(self, df):
+        os.makedirs(self.carpeta_viajes, exist_ok=True)
+        meses = _mes(df["Fecha"]) if "Fecha" in df.columns else pd.Series(SIN_FECHA, index=df.index)
+        nuevos = set()
+        for mes, parte in df.groupby(meses.to_numpy(), sort=True):
+            self._escribir_mes(mes, parte)
+            nuevos.add(mes)
+        for mes in set(self._meses()) - nuevos:
+            os.remove(self._ruta_mes(mes))
+
+    @_con_bloqueo("bloqueo_viajes")
+    def restaurar_viajes_csv(self, ruta_csv, filas_bloque=FILAS_BLOQUE):
+        # Los bloques se reparten en un CSV por mes dentro de una carpeta aparte;
+        # luego cada mes (uno a la vez en memoria) pasa a Parquet y al final se
+        # intercambian las carpetas. El índice no viaja: se reconstruye al leer
+        nueva = self.carpeta_viajes + ".restaurando"
+        anterior = self.carpeta_viajes + ".anterior"
+        shutil.rmtree(nueva, ignore_errors=True)
+        os.makedirs(nueva)
+        try:
+            for bloque in pd.read_csv(ruta_csv, chunksize=filas_bloque):
+                meses = _mes(bloque["Fecha"]) if "Fecha" in bloque.columns else pd.Series(SIN_FECHA, index=bloque.index)
+                for mes, parte in bloque.groupby(meses.to_numpy(), sort=True):
+                    ruta_mes = os.path.join(nueva, f"{mes}.csv")
+                    parte.to_csv(ruta_mes, mode="a", header=not os.path.exists(ruta_mes), index=False)
+            for ruta_mes in glob.glob(os.path.join(nueva, "*.csv")):
+                datos = _preparar_parquet(pd.read_csv(ruta_mes))
+                datos.to_parquet(os.path.splitext(ruta_mes)[0] + ".parquet", index=False)
+                os.remove(ruta_mes)
+            if os.path.exists(self.carpeta_viajes):
+                os.replace(self.carpeta_viajes, anterior)
+            try:
+                os.replace(nueva, self.carpeta_viajes)
+            except OSError:
+                if os.path.exists(anterior):
+                    os.replace(anterior, self.carpeta_viajes)
+                raise
+        finally:
+            shutil.rmtree(nueva, ignore_errors=True)
+            shutil.rmtree(anterior, ignore_errors=True)
+
+    @_con_bloqueo("bloqueo_viajes")
+    def actualizar_tramo(self, id_programacion, tramo, cambios):
+        # Solo se reescribe el mes del tráfico; si cambia la fecha puede moverse
+        # de partición y se usa el camino completo
+        indice = self._indice_vigente()
+        fecha = None
+        if indice is not None:
+            fechas = indice.loc[indice["ID_Programacion"] == id_programacion, "Fecha"].dropna()
+            fecha = fechas.iloc[0] if not fechas.empty else None
+        if fecha is None or "Fecha" in cambios:
+            super().actualizar_tramo(id_programacion, tramo, cambios)
+            return
+        mes = _mes(pd.Series([fecha])).iloc[0]
+        self._escribir_mes(mes, _aplicar_cambios(self._leer_mes(mes), id_programacion, tramo, cambios))
+        self._actualizar_cabecera(indice, id_programacion, tramo, cambios)
+
+    @_con_bloqueo("bloqueo_viajes")
+    def actualizar_tramos(self, cambios):
+        # Solo se reescriben los meses de los tráficos tocados
+        if cambios.empty:
+            return
+        indice = self._indice_vigente()
+        fechas = None
+        if indice is not None:
+            por_id = indice.drop_duplicates("ID_Programacion").set_index("ID_Programacion")["Fecha"]
+            fechas = cambios["ID_Programacion"].map(por_id)
+        if fechas is None or fechas.isna().any() or "Fecha" in cambios.columns:
+            super().actualizar_tramos(cambios)
+            return
+        for mes, parte in cambios.groupby(_mes(fechas).to_numpy(), sort=True):
+            self._escribir_mes(mes, _aplicar_cambios_lote(self._leer_mes(mes), parte))
+        self._actualizar_cabeceras(indice, cambios)
+
+    def _anexar_viajes(self, df_nuevo):
+        existentes = set(self._meses())
+        meses = _mes(df_nuevo["Fecha"]) if "Fecha" in df_nuevo.columns else pd.Series(SIN_FECHA, index=df_nuevo.index)
+        for mes, parte in df_nuevo.groupby(meses.to_numpy(), sort=True):
+            if mes in existentes:
+                parte = pd.concat([self._leer_mes(mes), parte], ignore_index=True)
+            self._escribir_mes(mes, parte)
+
+
+def crear_almacen(nombre=None):
+    nombre = (nombre or os.environ.get("PICUS_ALMACEN", "csv")).lower()
+    if nombre == "sqlite":
+        return AlmacenSQLite()
+    if nombre == "parquet":
+        return AlmacenParquet()
+    return AlmacenCSV()
+
+
+# Todas las escrituras de la app pasan por el hilo escritor único; las lecturas
+# salen con el esquema tipado (categorías, fechas) de picus.esquema
+_almacen = AlmacenSerializado(AlmacenTipado(crear_almacen()))
+
+
+def obtener_almacen():
+    return _almacen
+
+
+# ============================
+# Migración / exportación entre motores
+# ============================
+def migrar(origen, destino):
+    rutas = origen.leer_rutas()
+    if rutas is not None:
+        destino.guardar_rutas(rutas)
+    viajes = origen.leer_viajes()
+    if viajes is not None:
+        destino.guardar_viajes(viajes)
+    return (0 if rutas is None else len(rutas), 0 if viajes is None else len(viajes))
@@ -0,0 +1,197 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from picus.almacenamiento import obtener_almacen
+from picus.grafo import km_mas_cortos
+from picus.indice_viajes import PENDIENTE
+from picus.viajes import actualizar_tramos
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # scipy es opcional; sin él se usa el húngaro de abajo
+    linear_sum_assignment = None
+
+# ============================
+# Asignación de unidades y operadores a los tráficos del día
+# ============================
+# Cada unidad disponible está donde terminó su último tramo. Asignarla a un
+# tráfico cuesta el vacío hasta el origen (KM del camino más corto por las
+# rutas del catálogo entre ambos puntos × costo de diesel por km) y rinde la utilidad de la
+# vuelta redonda del tráfico (IDA + mejor cierre del ranking). Se resuelve
+# una asignación de costo mínimo (húngaro) sobre la matriz unidades ×
+# tráficos; si hay menos unidades que tráficos quedan sin unidad los que
+# menos aportan. El resultado se guarda con una sola escritura.
+
+DIAS_UBICACION = 90
+# Vacío mínimo supuesto cuando el catálogo no conecta los dos puntos; crece
+# hasta el recorrido más largo conocido para no premiar lo desconocido
+KM_DESCONOCIDO = 500
+COLUMNAS_FLOTA = ["Unidad", "Operador", "Ubicación", "Último Tramo"]
+
+
+def _hungaro(costo):
+    # Camino de aumento más corto con potenciales (O(n²·m)); filas <= columnas
+    n, m = costo.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    asignada = np.zeros(m + 1, dtype=int)  # fila (1..n) asignada a cada columna; 0 = libre
+    camino = np.zeros(m + 1, dtype=int)
+    for fila in range(1, n + 1):
+        asignada[0] = fila
+        j0 = 0
+        minimo = np.full(m + 1, np.inf)
+        usada = np.zeros(m + 1, dtype=bool)
+        while True:
+            usada[j0] = True
+            i0 = asignada[j0]
+            libres = np.flatnonzero(~usada[1:]) + 1
+            reducido = costo[i0 - 1, libres - 1] - u[i0] - v[libres]
+            mejora = reducido < minimo[libres]
+            minimo[libres[mejora]] = reducido[mejora]
+            camino[libres[mejora]] = j0
+            j1 = libres[np.argmin(minimo[libres])]
+            delta = minimo[j1]
+            u[asignada[usada]] += delta
+            v[usada] -= delta
+            minimo[libres] -= delta
+            j0 = j1
+            if asignada[j0] == 0:
+                break
+        while j0:
+            j1 = camino[j0]
+            asignada[j0] = asignada[j1]
+            j0 = j1
+    columnas = np.flatnonzero(asignada[1:]) + 1
+    filas = asignada[columnas] - 1
+    orden = np.argsort(filas)
+    return filas[orden], columnas[orden] - 1
+
+
+def resolver_asignacion(costo):
+    # (filas, columnas) de la asignación de costo mínimo, como scipy
+    costo = np.asarray(costo, dtype=float)
+    if costo.size == 0:
+        return np.array([], dtype=int), np.array([], dtype=int)
+    if linear_sum_assignment is not None:
+        return linear_sum_assignment(costo)
+    if costo.shape[0] > costo.shape[1]:
+        columnas, filas = _hungaro(costo.T)
+        orden = np.argsort(filas)
+        return filas[orden], columnas[orden]
+    return _hungaro(costo)
+
+
+def flota_disponible(historial, dia, ids_a_asignar=()):
+    # Última ubicación y operador de cada unidad; fuera las que ya trabajan ese día
+    # en otros tráficos (o cuyo operador ya trabaja)
+    if historial is None or historial.empty:
+        return pd.DataFrame(columns=COLUMNAS_FLOTA), pd.DataFrame(columns=["Unidad", "Operador", "Motivo"])
+    tramos = historial.dropna(subset=["Unidad"]).copy()
+    tramos["Unidad"] = tramos["Unidad"].astype(str)
+    tramos["Operador"] = tramos["Operador"].astype(str)
+    fecha = tramos["Fecha"].astype(str).str[:10]
+    dia = str(dia)[:10]
+    del_dia = (fecha == dia) & ~tramos["ID_Programacion"].isin(list(ids_a_asignar))
+
+    # Orden del archivo dentro de la misma fecha: los tramos de vuelta van después de la IDA
+    anteriores = tramos[fecha < dia].assign(_fecha=fecha[fecha < dia], _orden=np.arange((fecha < dia).sum()))
+    ultimos = anteriores.sort_values(["_fecha", "_orden"]).groupby("Unidad").tail(1)
+    flota = pd.DataFrame({
+        "Unidad": ultimos["Unidad"].to_numpy(),
+        "Operador": ultimos["Operador"].to_numpy(),
+        "Ubicación": ultimos["Destino"].to_numpy(),
+        "Último Tramo": ultimos["_fecha"].to_numpy(),
+    })
+
+    unidades_ocupadas = set(tramos.loc[del_dia, "Unidad"])
+    operadores_ocupados = set(tramos.loc[del_dia, "Operador"])
+    ocupada = flota["Unidad"].isin(unidades_ocupadas)
+    sin_operador = ~ocupada & flota["Operador"].isin(operadores_ocupados)
+    ocupadas = pd.concat([
+        flota.loc[ocupada, ["Unidad", "Operador"]].assign(Motivo="Unidad con otro tráfico ese día"),
+        flota.loc[sin_operador, ["Unidad", "Operador"]].assign(Motivo="Operador con otro tráfico ese día"),
+    ], ignore_index=True)
+    disponibles = flota[~(ocupada | sin_operador)].sort_values("Unidad", ignore_index=True)
+    return disponibles, ocupadas
+
+
+def km_vacio(rutas, ubicaciones, origenes):
+    # Matriz len(ubicaciones) × len(origenes) con los KM del camino más corto por el catálogo; NaN si no hay camino
+    return km_mas_cortos(rutas, ubicaciones, origenes)
+
+
+def km_sin_camino(rutas, km):
+    # Penalización de los pares sin camino: el mayor recorrido conocido (ruta o camino), al menos KM_DESCONOCIDO
+    conocidos = [KM_DESCONOCIDO, pd.to_numeric(rutas["KM"], errors="coerce").max()]
+    if np.isfinite(km).any():
+        conocidos.append(np.nanmax(km))
+    return float(np.nanmax(conocidos))
+
+
+def utilidad_vuelta(idas, ranking):
+    # Utilidad de la IDA más la del mejor cierre disponible desde su destino.
+    # Sin ranking (catálogo vacío) no hay cierre: cuenta solo la IDA
+    ida = (pd.to_numeric(idas["Ingreso Total"], errors="coerce").fillna(0)
+           - pd.to_numeric(idas["Costo_Total_Ruta"], errors="coerce").fillna(0)).to_numpy()
+    if ranking is None:
+        return ida, np.full(len(idas), None, dtype=object)
+    cierre = ranking.cierres(idas["Destino"].astype(str).to_numpy(), idas["Tipo"].to_numpy())
+    regreso = (cierre["Ingreso"] - cierre["Costo"]).fillna(0).to_numpy()
+    return ida + regreso, cierre["Regreso"].to_numpy()
+
+
+def asignar(idas, flota, rutas, valores, ranking):
+    # (asignaciones, tráficos sin unidad, unidades sin tráfico)
+    idas = idas.reset_index(drop=True)
+    flota = flota.dropna(subset=["Unidad"]).reset_index(drop=True)
+    costo_km = float(valores["Costo Diesel"]) / float(valores["Rendimiento Camion"])
+    km = km_vacio(rutas, flota["Ubicación"], idas["Origen"])
+    desconocido = np.isnan(km)
+    km = np.where(desconocido, km_sin_camino(rutas, km), km)
+    utilidad, regreso = utilidad_vuelta(idas, ranking)
+
+    filas, columnas = resolver_asignacion(km * costo_km - utilidad[None, :])
+    asignaciones = pd.DataFrame({
+        "ID_Programacion": idas.loc[columnas, "ID_Programacion"].to_numpy(),
+        "Ruta": (idas.loc[columnas, "Origen"].astype(str) + " → " + idas.loc[columnas, "Destino"].astype(str)).to_numpy(),
+        "Unidad": flota.loc[filas, "Unidad"].to_numpy(),
+        "Operador": flota.loc[filas, "Operador"].to_numpy(),
+        "Ubicación": flota.loc[filas, "Ubicación"].to_numpy(),
+        "KM Vacío": km[filas, columnas],
+        "Vacío Estimado": desconocido[filas, columnas],
+        "Costo Vacío": (km[filas, columnas] * costo_km).round(2),
+        "Utilidad Vuelta": utilidad[columnas].round(2),
+        "Regreso Sugerido": regreso[columnas],
+    }).sort_values("ID_Programacion", ignore_index=True)
+    sin_unidad = idas.drop(index=columnas)
+    libres = flota.drop(index=filas)
+    return asignaciones, sin_unidad, libres
+
+
+def datos_del_dia(dia, dias_ubicacion=DIAS_UBICACION):
+    # IDAs pendientes del día y flota disponible, leyendo solo la ventana de historial necesaria
+    almacen = obtener_almacen()
+    vacio = pd.DataFrame()
+    if not almacen.existe_viajes():
+        return vacio, *flota_disponible(None, dia)
+    indice = almacen.indice_viajes()
+    texto_dia = str(dia)[:10]
+    pendientes = indice.loc[(indice["Estado"] == PENDIENTE) & (indice["Fecha"].astype(str).str[:10] == texto_dia),
+                            "ID_Programacion"]
+    if pendientes.empty:
+        return vacio, *flota_disponible(None, dia)
+    viajes = almacen.leer_programaciones(pendientes)
+    idas = viajes[viajes["Tramo"] == "IDA"].drop_duplicates("ID_Programacion").reset_index(drop=True)
+    desde = pd.Timestamp(texto_dia) - timedelta(days=dias_ubicacion)
+    historial = almacen.leer_viajes(desde=desde, hasta=texto_dia,
+                                    columnas=["ID_Programacion", "Fecha", "Tramo", "Unidad", "Operador", "Destino"])
+    return idas, *flota_disponible(historial, texto_dia, idas["ID_Programacion"])
+
+
+def confirmar_asignacion(asignaciones):
+    # Unidad y operador en la IDA de cada tráfico, en un solo lote
+    cambios = asignaciones[["ID_Programacion", "Unidad", "Operador"]].assign(Tramo="IDA")
+    actualizar_tramos(cambios[["ID_Programacion", "Tramo", "Unidad", "Operador"]])
+    return len(cambios)
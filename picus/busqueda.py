@@ -0,0 +1,88 @@
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from picus.repositorio import rutas_rc, version_rutas
+
+# ============================
+# Índice de búsqueda por prefijo (Cliente, Origen, Destino, Ruta)
+# ============================
+# Cada texto se parte en palabras normalizadas (minúsculas, sin acentos) y se
+# guarda un arreglo ordenado de (palabra, fila). Una palabra escrita por el
+# usuario se resuelve con dos búsquedas binarias sobre ese arreglo; con varias
+# palabras se intersectan las filas. Se reconstruye solo cuando cambia la
+# versión de la tabla de rutas.
+
+COLUMNAS_BUSQUEDA = ["Cliente", "Origen", "Destino", "Ruta"]
+LIMITE_OPCIONES = 200
+_PALABRA = re.compile(r"[a-z0-9]+")
+
+
+def normalizar(serie):
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        # Solo se normalizan los valores distintos; cada fila toma el de su código (-1 = vacío)
+        categorias = normalizar(pd.Series(serie.cat.categories.astype(str)))
+        return pd.Series(np.append(categorias.to_numpy(dtype=object), "")[serie.cat.codes.to_numpy()], index=serie.index)
+    texto = serie.fillna("").astype(str).str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+    return texto.str.lower()
+
+
+class IndiceBusqueda:
+    def __init__(self, rutas):
+        self.indice_filas = rutas.index
+        self.tipos = rutas["Tipo"].to_numpy() if "Tipo" in rutas.columns else None
+        partes = []
+        for col in COLUMNAS_BUSQUEDA:
+            if col not in rutas.columns:
+                continue
+            palabras = normalizar(rutas[col]).str.findall(_PALABRA.pattern)
+            palabras = pd.Series(palabras.to_numpy(), index=np.arange(len(rutas))).explode().dropna()
+            partes.append(pd.DataFrame({"palabra": palabras.to_numpy(), "fila": palabras.index.to_numpy()}))
+        tabla = pd.concat(partes, ignore_index=True).drop_duplicates() if partes else pd.DataFrame(columns=["palabra", "fila"])
+        tabla = tabla.sort_values("palabra", kind="stable")
+        self.palabras = tabla["palabra"].to_numpy(dtype=str)
+        self.filas = tabla["fila"].to_numpy(dtype=np.int64)
+
+    def _filas_con_prefijo(self, prefijo):
+        inicio = np.searchsorted(self.palabras, prefijo, side="left")
+        fin = np.searchsorted(self.palabras, prefijo + "￿", side="left")
+        return np.unique(self.filas[inicio:fin])
+
+    def buscar(self, texto, tipos=None, limite=LIMITE_OPCIONES):
+        # Índices (del DataFrame original) de las filas que contienen todas las
+        # palabras escritas como prefijo de alguna de sus palabras
+        consulta = _PALABRA.findall(normalizar(pd.Series([texto])).iloc[0])
+        if consulta:
+            filas = self._filas_con_prefijo(consulta[0])
+            for prefijo in consulta[1:]:
+                filas = np.intersect1d(filas, self._filas_con_prefijo(prefijo), assume_unique=True)
+        else:
+            filas = np.arange(len(self.indice_filas))
+        if tipos is not None and self.tipos is not None:
+            filas = filas[np.isin(self.tipos[filas], list(tipos))]
+        total = len(filas)
+        if limite is not None:
+            filas = filas[:limite]
+        return self.indice_filas[filas], total
+
+
+_lock = threading.Lock()
+_cache = {"version": None, "indice": None}
+
+
+def obtener_indice():
+    version = version_rutas()
+    with _lock:
+        if _cache["indice"] is None or _cache["version"] != version:
+            rutas = rutas_rc()
+            _cache.update(version=version, indice=None if rutas is None else IndiceBusqueda(rutas))
+        return _cache["indice"]
+
+
+def buscar_rutas(texto, tipos=None, limite=LIMITE_OPCIONES):
+    indice = obtener_indice()
+    if indice is None:
+        return pd.Index([]), 0
+    return indice.buscar(texto, tipos=tipos, limite=limite)
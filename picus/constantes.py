@@ -0,0 +1,13 @@
+# Rutas de archivos compartidas por todas las páginas
+RUTA_RUTAS = "rutas_guardadas.csv"
+RUTA_PROG = "viajes_programados.csv"
+RUTA_DATOS = "datos_generales.csv"
+RUTA_SQLITE = "picus.db"
+# Carpeta con los viajes particionados por mes (motor "parquet")
+RUTA_VIAJES_MES = "viajes_programados"
+# Índice de estado de tráficos (motor "csv"; el motor "parquet" lo guarda en su carpeta)
+RUTA_INDICE_VIAJES = "indice_viajes.csv"
+# Carpeta de respaldos comprimidos (completos e incrementales)
+RUTA_RESPALDOS = "respaldos"
+# Historial de Datos Generales con su fecha de vigencia
+RUTA_HISTORIAL_DATOS = "historial_datos_generales.csv"
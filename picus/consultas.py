@@ -0,0 +1,96 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from picus.repositorio import rutas_rc, version_rutas
+
+# ============================
+# Consulta paginada de rutas
+# ============================
+# Filtra y ordena sobre la tabla que ya está en memoria y guarda solo el
+# orden resultante (un arreglo de índices) por versión + filtros + orden.
+# Cambiar de página solo toma el tramo de índices y materializa esas filas.
+
+COLUMNAS_ORDEN = [
+    "Fecha", "Cliente", "Tipo", "Origen", "Destino", "KM",
+    "Ingreso Total", "Costo_Total_Ruta", "Utilidad", "% Utilidad"
+]
+COLUMNAS_GRID = ["Fecha", "Tipo", "Cliente", "Origen", "Destino", "KM",
+                 "Ingreso Total", "Costo_Total_Ruta", "Utilidad", "% Utilidad"]
+MAX_CONSULTAS = 32
+
+_lock = threading.Lock()
+_cache = OrderedDict()
+
+
+def _contiene(serie, texto):
+    return serie.astype(str).str.contains(texto, case=False, regex=False, na=False).to_numpy()
+
+
+def mascara_filtros(rutas, cliente="", tipos=None, origen="", destino="",
+                    desde=None, hasta=None, margen_min=None, margen_max=None):
+    mascara = np.ones(len(rutas), dtype=bool)
+    if cliente:
+        mascara &= _contiene(rutas["Cliente"], cliente)
+    if origen:
+        mascara &= _contiene(rutas["Origen"], origen)
+    if destino:
+        mascara &= _contiene(rutas["Destino"], destino)
+    if tipos:
+        mascara &= rutas["Tipo"].isin(list(tipos)).to_numpy()
+    if desde is not None or hasta is not None:
+        # Fechas en texto ISO: se comparan como texto
+        fecha = rutas["Fecha"].astype(str).str[:10]
+        if desde is not None:
+            mascara &= (fecha >= str(desde)[:10]).to_numpy()
+        if hasta is not None:
+            mascara &= (fecha <= str(hasta)[:10]).to_numpy()
+    if margen_min is not None:
+        mascara &= (rutas["% Utilidad"] >= margen_min).fillna(False).to_numpy()
+    if margen_max is not None:
+        mascara &= (rutas["% Utilidad"] <= margen_max).fillna(False).to_numpy()
+    return mascara
+
+
+def _clave(filtros):
+    return tuple(sorted((k, tuple(v) if isinstance(v, (list, tuple, set)) else v) for k, v in filtros.items()))
+
+
+def ordenar_rutas(filtros, orden="Fecha", descendente=True):
+    # Índices de las rutas que pasan los filtros, ya ordenados
+    version = version_rutas()
+    clave = (version, _clave(filtros), orden, descendente)
+    with _lock:
+        if clave in _cache:
+            _cache.move_to_end(clave)
+            return _cache[clave]
+
+    rutas = rutas_rc()
+    if rutas is None or rutas.empty:
+        return pd.Index([])
+    filtradas = rutas[mascara_filtros(rutas, **filtros)]
+    if orden in filtradas.columns:
+        filtradas = filtradas.sort_values(orden, ascending=not descendente, kind="stable", na_position="last")
+    indices = filtradas.index
+
+    with _lock:
+        _cache[clave] = indices
+        while len(_cache) > MAX_CONSULTAS:
+            _cache.popitem(last=False)
+    return indices
+
+
+def total_paginas(total, por_pagina):
+    return max(1, -(-total // por_pagina))
+
+
+def pagina_rutas(indices, pagina=1, por_pagina=50, columnas=COLUMNAS_GRID):
+    # Solo se materializan las filas de la página pedida
+    rutas = rutas_rc()
+    inicio = (max(1, pagina) - 1) * por_pagina
+    visibles = indices[inicio:inicio + por_pagina]
+    if rutas is None or len(visibles) == 0:
+        return pd.DataFrame(columns=columnas)
+    return rutas.loc[visibles, [c for c in columnas if c in rutas.columns]]
@@ -0,0 +1,178 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+# ============================
+# Motor de costos
+# ============================
+# Una sola fórmula para captura, edición y programación. Trabaja por columnas
+# sobre un DataFrame completo; una cotización individual es un DataFrame de
+# una fila, así que ambos casos usan el mismo código.
+
+COLUMNAS_EXTRAS = [
+    "Movimiento_Local", "Puntualidad", "Pension", "Estancia",
+    "Pistas Extra", "Stop", "Falso", "Gatas", "Accesorios", "Guías"
+]
+
+# Orden de columnas con el que se guarda una ruta
+COLUMNAS_RUTA = [
+    "Fecha", "Tipo", "Cliente", "Origen", "Destino",
+    "KM", "Moneda", "Ingreso_Original",
+    "Tipo de cambio", "Ingreso Flete",
+    "Moneda_Cruce", "Cruce_Original",
+    "Tipo cambio Cruce", "Ingreso Cruce",
+    "Moneda Costo Cruce", "Costo Cruce",
+    "Costo Cruce Convertido", "Ingreso Total",
+    "Sueldo_Operador", "Bono",
+    "Bono Rendimiento", "Casetas",
+    "Movimiento_Local", "Puntualidad", "Pension",
+    "Estancia", "Pistas Extra", "Stop", "Falso",
+    "Gatas", "Accesorios", "Guías",
+    "Costo_Diesel_Camion", "Costo_Extras",
+    "Costo_Total_Ruta", "Clasificacion Ruta",
+    "Version_Parametros"
+]
+
+COLUMNAS_TIPO_CAMBIO = [
+    "Tipo de cambio", "Ingreso Flete", "Tipo cambio Cruce", "Ingreso Cruce",
+    "Costo Cruce Convertido", "Ingreso Total"
+]
+
+# Columnas que escribe calcular_costos (el resto de la fila es captura)
+COLUMNAS_COSTEADAS = COLUMNAS_TIPO_CAMBIO + [
+    "Sueldo_Operador", "Bono", "Bono Rendimiento", "Costo_Diesel_Camion",
+    "Costo_Extras", "Costo_Total_Ruta", "Version_Parametros"
+]
+
+# Columnas guardadas que dependen de cada parámetro de Datos Generales
+DEPENDENCIAS = {
+    "Tipo de cambio USD": COLUMNAS_TIPO_CAMBIO,
+    "Tipo de cambio MXN": COLUMNAS_TIPO_CAMBIO,
+    "Rendimiento Camion": ["Costo_Diesel_Camion"],
+    "Costo Diesel": ["Costo_Diesel_Camion"],
+    "Sueldo por Viaje": ["Sueldo_Operador"],
+    "Bono ISR IMSS por Viaje": ["Bono"],
+    "Bono Rendimiento": ["Bono Rendimiento"],
+}
+
+
+def version_parametros(valores):
+    # Huella corta de los valores con que se costea; identifica la versión
+    texto = "|".join(f"{k}={float(valores[k]):.6f}" for k in sorted(DEPENDENCIAS))
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()[:10]
+
+
+def _num(df, columna):
+    if columna not in df.columns:
+        return np.zeros(len(df))
+    serie = df[columna]
+    if not pd.api.types.is_numeric_dtype(serie):
+        serie = pd.to_numeric(serie, errors="coerce")
+    valores = serie.to_numpy(dtype=float, na_value=np.nan)
+    return np.where(np.isnan(valores), 0.0, valores)
+
+
+def _parametro(valores, nombre, n):
+    # Un valor para todas las filas, o uno por fila (parámetros vigentes en la fecha de cada tramo)
+    valor = np.asarray(valores[nombre], dtype=float)
+    return np.full(n, float(valor)) if valor.ndim == 0 else valor
+
+
+def _tipo_cambio(df, columna, valores):
+    monedas = df[columna].to_numpy() if columna in df.columns else np.full(len(df), "MXN")
+    return np.where(monedas == "USD", _parametro(valores, "Tipo de cambio USD", len(df)),
+                    _parametro(valores, "Tipo de cambio MXN", len(df)))
+
+
+def totalizar(df):
+    # Extras y costo total a partir de los componentes ya guardados en cada fila
+    extras = sum(_num(df, c) for c in COLUMNAS_EXTRAS)
+    total = (
+        _num(df, "Costo_Diesel_Camion") + _num(df, "Sueldo_Operador") + _num(df, "Bono")
+        + _num(df, "Bono Rendimiento") + _num(df, "Casetas") + extras + _num(df, "Costo Cruce Convertido")
+    )
+    return pd.DataFrame({"Costo_Extras": extras, "Costo_Total_Ruta": total}, index=df.index)
+
+
+def calcular_costos(df, valores):
+    # Todas las columnas derivadas (conversiones, diesel, sueldo, extras y totales).
+    # `valores` es un dict de Datos Generales o un DataFrame con un renglón por fila de `df`
+    n = len(df)
+    tc_flete = _tipo_cambio(df, "Moneda", valores)
+    tc_cruce = _tipo_cambio(df, "Moneda_Cruce", valores)
+    tc_costo_cruce = _tipo_cambio(df, "Moneda Costo Cruce", valores)
+
+    ingreso_flete = _num(df, "Ingreso_Original") * tc_flete
+    ingreso_cruce = _num(df, "Cruce_Original") * tc_cruce
+    with np.errstate(divide="ignore", invalid="ignore"):
+        diesel = _num(df, "KM") / _parametro(valores, "Rendimiento Camion", n) * _parametro(valores, "Costo Diesel", n)
+
+    derivadas = pd.DataFrame({
+        "Tipo de cambio": tc_flete,
+        "Ingreso Flete": ingreso_flete,
+        "Tipo cambio Cruce": tc_cruce,
+        "Ingreso Cruce": ingreso_cruce,
+        "Costo Cruce Convertido": _num(df, "Costo Cruce") * tc_costo_cruce,
+        "Ingreso Total": ingreso_flete + ingreso_cruce,
+        "Sueldo_Operador": _parametro(valores, "Sueldo por Viaje", n),
+        "Bono": _parametro(valores, "Bono ISR IMSS por Viaje", n),
+        "Bono Rendimiento": _parametro(valores, "Bono Rendimiento", n),
+        "Costo_Diesel_Camion": diesel,
+    }, index=df.index)
+    componentes = pd.concat([df[[c for c in df.columns if c not in derivadas.columns]], derivadas], axis=1)
+    derivadas = pd.concat([derivadas, totalizar(componentes)], axis=1)
+    if "Version_Parametros" in valores:
+        derivadas["Version_Parametros"] = np.asarray(valores["Version_Parametros"], dtype=object)
+    else:
+        derivadas["Version_Parametros"] = version_parametros(valores)
+    return derivadas
+
+
+def aplicar_costos(df, valores):
+    derivadas = calcular_costos(df, valores)
+    # Una sola concatenación en lugar de insertar columna por columna
+    base = df[[c for c in df.columns if c not in derivadas.columns]]
+    resultado = pd.concat([base, derivadas], axis=1)
+    orden = list(df.columns) + [c for c in derivadas.columns if c not in df.columns]
+    return resultado[orden]
+
+
+def calcular_ruta(registro, valores):
+    # Cotización de una sola ruta con el mismo motor vectorizado
+    fila = aplicar_costos(pd.DataFrame([registro]), valores).iloc[0].to_dict()
+    orden = [c for c in COLUMNAS_RUTA if c in fila] + [c for c in fila if c not in COLUMNAS_RUTA]
+    return {c: fila[c] for c in orden}
+
+
+def repreciar(df, valores, anteriores=None):
+    # Recalcula el catálogo con nuevos parámetros en una sola pasada.
+    # Solo toca filas costeadas con otra versión; si se conocen los parámetros
+    # anteriores, en las filas de esa versión solo cambian las columnas afectadas.
+    version = version_parametros(valores)
+    versiones = df["Version_Parametros"] if "Version_Parametros" in df.columns else pd.Series(np.nan, index=df.index)
+    pendientes = versiones.ne(version).to_numpy()
+    if not pendientes.any():
+        return df, 0
+
+    df = df.copy()
+    derivadas = calcular_costos(df[pendientes], valores)
+    todas = list(derivadas.columns)
+    afectadas = todas
+    version_anterior = None
+    if anteriores is not None:
+        version_anterior = version_parametros(anteriores)
+        cambiados = [k for k in DEPENDENCIAS if float(anteriores[k]) != float(valores[k])]
+        afectadas = sorted({c for k in cambiados for c in DEPENDENCIAS[k]})
+        afectadas += ["Costo_Total_Ruta", "Version_Parametros"]
+
+    de_anterior = (versiones[pendientes] == version_anterior).to_numpy()
+    if "Version_Parametros" in df.columns:
+        df["Version_Parametros"] = df["Version_Parametros"].astype(object)
+    filas = df.index[pendientes]
+    for col in todas:
+        if col not in df.columns:
+            df[col] = None if col == "Version_Parametros" else np.nan
+        destino = filas if col in afectadas else filas[~de_anterior]
+        df.loc[destino, col] = derivadas.loc[destino, col].to_numpy()
+    return df, int(pendientes.sum())
@@ -0,0 +1,53 @@
+import pandas as pd
+
+from picus.importacion import validar
+from picus.costos import aplicar_costos
+from picus.ranking import obtener_ranking
+from picus.rentabilidad import rentabilidad
+
+# ============================
+# Cotización en lote (sin Streamlit)
+# ============================
+# Recibe carriles hipotéticos con las mismas columnas de la plantilla de
+# importación y devuelve costo, ingreso y rentabilidad de todos en una sola
+# pasada vectorizada. Opcionalmente agrega el mejor regreso del catálogo,
+# consultando las tablas de cierre por origen del ranking de vueltas.
+
+COLUMNAS_COTIZACION = [
+    "Fecha", "Tipo", "Cliente", "Origen", "Destino", "KM",
+    "Ingreso Total", "Costo_Total_Ruta",
+    "Utilidad Bruta", "% Utilidad Bruta", "Costos Indirectos", "Utilidad Neta", "% Utilidad Neta",
+]
+COLUMNAS_VUELTA = ["Regreso", "Ingreso Vuelta", "Costo Vuelta", "Utilidad Neta Vuelta", "% Utilidad Neta Vuelta"]
+
+
+def cotizar_carriles(carriles, valores, rutas=None, con_regreso=False):
+    # Devuelve (cotización por carril, reporte de errores de validación). La
+    # cotización conserva el índice de `carriles` para ubicar cada fila.
+    # Con `con_regreso` y sin `rutas` se buscan regresos en el catálogo del almacén.
+    validas, errores = validar(carriles)
+    cotizadas = aplicar_costos(validas, valores)
+    margen = rentabilidad(cotizadas["Ingreso Total"], cotizadas["Costo_Total_Ruta"])
+    resultado = pd.concat([cotizadas, margen], axis=1)
+    resultado = resultado[[c for c in COLUMNAS_COTIZACION if c in resultado.columns]]
+
+    if con_regreso:
+        resultado = agregar_regreso(resultado, obtener_ranking(rutas))
+    return resultado, errores
+
+
+def agregar_regreso(cotizadas, ranking):
+    vuelta = pd.DataFrame(index=cotizadas.index, columns=COLUMNAS_VUELTA, dtype=float)
+    vuelta["Regreso"] = None
+    if ranking is not None and not cotizadas.empty:
+        cierre = ranking.cierres(cotizadas["Destino"], cotizadas["Tipo"])
+        ingreso = cotizadas["Ingreso Total"].to_numpy() + cierre["Ingreso"].to_numpy()
+        costo = cotizadas["Costo_Total_Ruta"].to_numpy() + cierre["Costo"].to_numpy()
+        margen = rentabilidad(ingreso, costo)
+        sin_cierre = cierre["Ingreso"].isna().to_numpy()
+        vuelta["Regreso"] = cierre["Regreso"].where(~sin_cierre, None).to_numpy()
+        vuelta["Ingreso Vuelta"] = ingreso
+        vuelta["Costo Vuelta"] = costo
+        vuelta["Utilidad Neta Vuelta"] = margen["Utilidad Neta"].where(~sin_cierre).to_numpy()
+        vuelta["% Utilidad Neta Vuelta"] = margen["% Utilidad Neta"].where(~sin_cierre).to_numpy()
+    return pd.concat([cotizadas, vuelta], axis=1)
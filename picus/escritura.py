@@ -0,0 +1,195 @@
+import contextlib
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+import pandas as pd
+
+from picus.metricas import medir
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# ============================
+# Escrituras seguras con varios usuarios a la vez
+# ============================
+# - bloqueo(ruta): candado por archivo entre hilos y entre procesos (archivo
+#   "<ruta>.lock"), reentrante dentro del mismo hilo.
+# - reemplazar_atomico(ruta, escribir): se escribe a un temporal y se renombra,
+#   así nadie lee un archivo a medio escribir.
+# - ColaEscritura: un solo hilo escritor por proceso. Las sesiones encolan su
+#   operación y esperan el resultado; los anexos consecutivos a la misma tabla
+#   se juntan en un solo flush.
+
+_candados = {}
+_candados_lock = threading.Lock()
+
+
+def _candado(ruta):
+    clave = os.path.abspath(ruta)
+    with _candados_lock:
+        if clave not in _candados:
+            _candados[clave] = {"hilos": threading.RLock(), "nivel": 0, "archivo": None}
+        return _candados[clave]
+
+
+def _bloquear_archivo(archivo):
+    if fcntl is not None:
+        fcntl.flock(archivo.fileno(), fcntl.LOCK_EX)
+    else:
+        archivo.seek(0)
+        msvcrt.locking(archivo.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _liberar_archivo(archivo):
+    if fcntl is not None:
+        fcntl.flock(archivo.fileno(), fcntl.LOCK_UN)
+    else:
+        archivo.seek(0)
+        msvcrt.locking(archivo.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextlib.contextmanager
+def bloqueo(ruta):
+    candado = _candado(ruta)
+    with candado["hilos"]:
+        # Solo la primera entrada del hilo toma el candado del archivo
+        if candado["nivel"] == 0:
+            carpeta = os.path.dirname(os.path.abspath(ruta))
+            os.makedirs(carpeta, exist_ok=True)
+            candado["archivo"] = open(ruta + ".lock", "a+")
+            _bloquear_archivo(candado["archivo"])
+        candado["nivel"] += 1
+        try:
+            yield
+        finally:
+            candado["nivel"] -= 1
+            if candado["nivel"] == 0:
+                _liberar_archivo(candado["archivo"])
+                candado["archivo"].close()
+                candado["archivo"] = None
+
+
+def reemplazar_atomico(ruta, escribir):
+    # `escribir` recibe la ruta temporal; el archivo final aparece completo o no cambia
+    temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        escribir(temporal)
+        os.replace(temporal, ruta)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+
+class ColaEscritura:
+    def __init__(self, max_lote=500):
+        self.max_lote = max_lote
+        self._cola = queue.Queue()
+        self._hilo = None
+        self._lock = threading.Lock()
+        # Contadores para diagnóstico: operaciones recibidas y flushes hechos
+        self.operaciones = 0
+        self.flushes = 0
+
+    def _asegurar_hilo(self):
+        with self._lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._trabajar, name="picus-escritor", daemon=True)
+                self._hilo.start()
+
+    def _enviar(self, clave, funcion, args, kwargs, df):
+        # Si ya estamos en el hilo escritor (una operación que llama a otra) se ejecuta directo
+        if threading.current_thread() is self._hilo:
+            return funcion(df) if clave is not None else funcion(*args, **kwargs)
+        futuro = Future()
+        self._cola.put((clave, funcion, args, kwargs, df, futuro))
+        self._asegurar_hilo()
+        return futuro.result()
+
+    def anexar(self, clave, funcion, df):
+        # Anexo combinable: los pendientes con la misma clave se concatenan y se
+        # escriben con una sola llamada a `funcion`
+        return self._enviar(clave, funcion, (), {}, df)
+
+    def ejecutar(self, funcion, *args, **kwargs):
+        return self._enviar(None, funcion, args, kwargs, None)
+
+    def _trabajar(self):
+        while True:
+            lote = [self._cola.get()]
+            while len(lote) < self.max_lote:
+                try:
+                    lote.append(self._cola.get_nowait())
+                except queue.Empty:
+                    break
+            self._procesar(lote)
+
+    def _procesar(self, lote):
+        # Se respeta el orden de llegada; solo se juntan anexos consecutivos
+        i = 0
+        while i < len(lote):
+            clave = lote[i][0]
+            j = i + 1
+            if clave is not None:
+                while j < len(lote) and lote[j][0] == clave:
+                    j += 1
+            self._escribir(clave, lote[i:j])
+            i = j
+
+    def _escribir(self, clave, grupo):
+        funcion = grupo[0][1]
+        try:
+            with medir("picus", f"guardar {getattr(funcion, '__name__', 'escritura')}"):
+                if clave is None:
+                    _, _, args, kwargs, _, _ = grupo[0]
+                    resultado = funcion(*args, **kwargs)
+                else:
+                    datos = pd.concat([g[4] for g in grupo], ignore_index=True)
+                    resultado = funcion(datos)
+        except BaseException as e:
+            self.flushes += 1
+            if len(grupo) == 1:
+                self.operaciones += 1
+                grupo[0][5].set_exception(e)
+                return
+            # Se repite anexo por anexo para que la excepción llegue solo al que la provocó
+            for g in grupo:
+                self._escribir(clave, [g])
+            return
+        for g in grupo:
+            g[5].set_result(resultado)
+        self.operaciones += len(grupo)
+        self.flushes += 1
+
+
+_cola = ColaEscritura()
+
+
+def en_serie(funcion, *args, **kwargs):
+    # Ejecuta `funcion` en el hilo escritor, en orden con el resto de escrituras
+    return _cola.ejecutar(funcion, *args, **kwargs)
+
+
+class AlmacenSerializado:
+    # Envuelve un almacén: las lecturas pasan directo y las escrituras se
+    # encolan en el hilo escritor
+    ANEXOS = ("agregar_rutas", "agregar_viajes")
+    ESCRITURAS = ("guardar_rutas", "actualizar_ruta", "eliminar_rutas", "guardar_viajes", "actualizar_tramo",
+                  "actualizar_tramos", "restaurar_rutas_csv", "restaurar_viajes_csv")
+
+    def __init__(self, almacen, cola=None):
+        self.almacen = almacen
+        self._cola = cola or _cola
+
+    def __getattr__(self, nombre):
+        atributo = getattr(self.almacen, nombre)
+        if nombre in self.ANEXOS:
+            clave = (id(self.almacen), nombre)
+            return lambda df: self._cola.anexar(clave, atributo, df)
+        if nombre in self.ESCRITURAS:
+            return lambda *args, **kwargs: self._cola.ejecutar(atributo, *args, **kwargs)
+        return atributo
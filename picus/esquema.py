@@ -0,0 +1,105 @@
+import functools
+
+import numpy as np
+import pandas as pd
+
+# ============================
+# Esquema tipado de rutas y viajes en memoria
+# ============================
+# En disco nada cambia (texto ISO y float64); lo que la app lee del almacén
+# sale con estos tipos:
+# - Texto repetido (tipo, cliente, ciudades, monedas, tramo, unidad...) como
+#   category: cada celda es un código entero, y los filtros `Tipo == ...` y los
+#   groupby comparan códigos en lugar de cadenas.
+# - Fecha como datetime64 (solo si toda la columna es AAAA-MM-DD válida; si no,
+#   se deja como texto para no perder nada al volver a escribir).
+# - Conteos como enteros chicos.
+# Los montos se quedan en float64: float32 solo guarda ~7 dígitos y
+# redondearía centavos de ingresos y costos.
+# AlmacenTipado aplica `tipar` a las lecturas y `para_guardar` a las
+# escrituras, así el formato en disco es el mismo de siempre.
+#
+# Con columnas category: concatenar texto requiere `.astype(str)` antes del
+# `+`, y asignar un valor que no está entre las categorías requiere pasar la
+# columna a texto (`a_texto`) primero.
+
+CATEGORICAS = [
+    "Tipo", "Cliente", "Origen", "Destino", "Moneda", "Moneda_Cruce", "Moneda Costo Cruce",
+    "Clasificacion Ruta", "Version_Parametros", "Tramo", "Unidad", "Operador", "Estado",
+]
+FECHAS = ["Fecha"]
+ENTEROS = {"Tramos": "int16"}
+
+
+def _fecha(serie):
+    # datetime64 solo si no se pierde nada: todas las fechas válidas y sin hora
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    fecha = pd.to_datetime(serie, errors="coerce", format="ISO8601")
+    if (fecha.isna() & serie.notna()).any() or (fecha != fecha.dt.normalize()).any():
+        return serie
+    return fecha
+
+
+def tipar(df):
+    if df is None or df.empty:
+        return df
+    cambios = {}
+    for col in CATEGORICAS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            cambios[col] = df[col].astype("category")
+    for col in FECHAS:
+        if col in df.columns:
+            fecha = _fecha(df[col])
+            if fecha is not df[col]:
+                cambios[col] = fecha
+    for col, tipo in ENTEROS.items():
+        if col in df.columns and pd.api.types.is_integer_dtype(df[col]):
+            cambios[col] = df[col].astype(tipo)
+    return df.assign(**cambios) if cambios else df
+
+
+def a_texto(serie):
+    # Columna category (o fecha) como texto normal, para concatenar o asignar valores nuevos
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.astype(object).infer_objects()
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.dt.strftime("%Y-%m-%d")
+    return serie
+
+
+def para_guardar(df):
+    # Deshace `tipar`: categorías a sus valores, fechas a AAAA-MM-DD y enteros chicos a int64
+    if df is None:
+        return df
+    cambios = {}
+    for col in df.columns:
+        serie = df[col]
+        if isinstance(serie.dtype, pd.CategoricalDtype) or pd.api.types.is_datetime64_any_dtype(serie):
+            cambios[col] = a_texto(serie)
+        elif pd.api.types.is_integer_dtype(serie) and serie.dtype != np.int64:
+            cambios[col] = serie.astype(np.int64)
+    return df.assign(**cambios) if cambios else df
+
+
+class AlmacenTipado:
+    # Envuelve un almacén: lo que se lee sale tipado y lo que se escribe vuelve al formato de disco
+    LECTURAS = ("leer_rutas", "leer_viajes", "leer_programaciones", "buscar_rutas", "indice_viajes")
+    ESCRITURAS = ("guardar_rutas", "agregar_rutas", "guardar_viajes", "agregar_viajes", "actualizar_tramos")
+
+    def __init__(self, almacen):
+        self.almacen = almacen
+
+    def __getattr__(self, nombre):
+        atributo = getattr(self.almacen, nombre)
+        if nombre in self.LECTURAS:
+            @functools.wraps(atributo)
+            def leer(*args, **kwargs):
+                return tipar(atributo(*args, **kwargs))
+            return leer
+        if nombre in self.ESCRITURAS:
+            @functools.wraps(atributo)
+            def escribir(df, *args, **kwargs):
+                return atributo(para_guardar(df), *args, **kwargs)
+            return escribir
+        return atributo
@@ -0,0 +1,195 @@
+import heapq
+import threading
+
+import numpy as np
+import pandas as pd
+
+from picus.rentabilidad import rentabilidad
+from picus.repositorio import rutas_rc, version_rutas
+
+try:
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import dijkstra
+except ImportError:  # scipy es opcional; sin él se usa el Dijkstra con heapq de abajo
+    dijkstra = None
+
+# ============================
+# Grafo de rutas (nodos = ubicaciones, aristas = rutas)
+# ============================
+# Las aristas se guardan en formato CSR (ordenadas por origen, con un arreglo
+# de offsets) para obtener los vecinos de un nodo sin filtrar la tabla. La
+# búsqueda de cadenas avanza por capas: en cada profundidad se expanden todos
+# los caminos parciales a la vez con NumPy y se conservan los k mejores que
+# llegan a cada nodo.
+
+MAX_TRAMOS = 5
+# Entre dos ubicaciones solo se indexan las mejores rutas paralelas; con
+# k <= 5 y cadenas de hasta 5 tramos nunca se necesita una peor
+MAX_PARALELAS = 10
+
+
+class GrafoRutas:
+    def __init__(self, rutas):
+        self.rutas = rutas
+        origen = rutas["Origen"].astype(str).to_numpy()
+        destino = rutas["Destino"].astype(str).to_numpy()
+        self.nodos = pd.Index(pd.unique(np.concatenate([origen, destino])))
+        cod_origen = self.nodos.get_indexer(origen)
+        cod_destino = self.nodos.get_indexer(destino)
+
+        ingreso = rutas["Ingreso Total"].fillna(0).to_numpy(dtype=float)
+        costo = rutas["Costo_Total_Ruta"].fillna(0).to_numpy(dtype=float)
+        par = cod_origen.astype(np.int64) * len(self.nodos) + cod_destino
+        orden = self._top_por_grupo(par, ingreso - costo, MAX_PARALELAS)
+        orden = orden[np.argsort(cod_origen[orden], kind="stable")]
+
+        self.origen = cod_origen[orden]
+        self.destino = cod_destino[orden]
+        self.ingreso = ingreso[orden]
+        self.costo = costo[orden]
+        self.utilidad = self.ingreso - self.costo
+        self.indice_ruta = rutas.index.to_numpy()[orden]
+        self.offsets = np.searchsorted(self.origen, np.arange(len(self.nodos) + 1))
+
+    def codigo(self, ubicacion):
+        pos = self.nodos.get_indexer([ubicacion])[0]
+        return None if pos < 0 else pos
+
+    def _expandir(self, nodos, utilidades, caminos):
+        grados = self.offsets[nodos + 1] - self.offsets[nodos]
+        total = int(grados.sum())
+        if total == 0:
+            return None
+        padre = np.repeat(np.arange(len(nodos)), grados)
+        inicio_grupo = np.repeat(np.cumsum(grados) - grados, grados)
+        aristas = np.repeat(self.offsets[nodos], grados) + (np.arange(total) - inicio_grupo)
+
+        caminos_previos = caminos[padre]
+        # Una misma ruta no se usa dos veces en la cadena
+        repetida = (caminos_previos == aristas[:, None]).any(axis=1) if caminos.shape[1] else np.zeros(total, bool)
+        validos = ~repetida
+        nuevos_caminos = np.hstack([caminos_previos[validos], aristas[validos, None]])
+        return self.destino[aristas[validos]], utilidades[padre[validos]] + self.utilidad[aristas[validos]], nuevos_caminos
+
+    @staticmethod
+    def _top_por_grupo(grupos, valores, k):
+        orden = np.lexsort((-valores, grupos))
+        g = grupos[orden]
+        inicio = np.r_[0, np.flatnonzero(g[1:] != g[:-1]) + 1]
+        rango = np.arange(len(g)) - np.repeat(inicio, np.diff(np.r_[inicio, len(g)]))
+        return orden[rango < k]
+
+    def mejores_cadenas(self, origen, destinos_cierre=None, max_tramos=MAX_TRAMOS, k=5):
+        # Devuelve (utilidad, [posiciones de arista]) de las k mejores cadenas que
+        # salen de `origen` y terminan en alguna ubicación de `destinos_cierre`.
+        inicio = self.codigo(origen)
+        if inicio is None:
+            return []
+        cierre = {origen} | set(destinos_cierre or [])
+        cierre = np.array([c for c in (self.codigo(u) for u in cierre) if c is not None])
+
+        nodos = np.array([inicio])
+        utilidades = np.zeros(1)
+        caminos = np.empty((1, 0), dtype=np.int64)
+        completas = []
+        for _ in range(max_tramos):
+            expansion = self._expandir(nodos, utilidades, caminos)
+            if expansion is None:
+                break
+            nodos, utilidades, caminos = expansion
+            if len(nodos) == 0:
+                break
+            terminan = np.isin(nodos, cierre)
+            if terminan.any():
+                top = self._top_por_grupo(np.zeros(terminan.sum(), dtype=np.int64), utilidades[terminan], k)
+                completas.extend(zip(utilidades[terminan][top], caminos[terminan][top]))
+            keep = self._top_por_grupo(nodos, utilidades, k)
+            nodos, utilidades, caminos = nodos[keep], utilidades[keep], caminos[keep]
+
+        completas.sort(key=lambda c: -c[0])
+        return completas[:k]
+
+    def tabla_cadenas(self, origen, destinos_cierre=None, max_tramos=MAX_TRAMOS, k=5):
+        filas = []
+        for _, camino in self.mejores_cadenas(origen, destinos_cierre, max_tramos, k):
+            tramos = self.rutas.loc[self.indice_ruta[camino]]
+            filas.append({
+                "Tramos": len(camino),
+                "Recorrido": " → ".join([tramos["Origen"].iloc[0]] + tramos["Destino"].astype(str).tolist()),
+                "Detalle": " | ".join(tramos["Tipo"].astype(str) + " " + tramos["Cliente"].astype(str)),
+                "Ingreso Total": float(self.ingreso[camino].sum()),
+                "Costo Total": float(self.costo[camino].sum()),
+                "Índices": list(self.indice_ruta[camino]),
+            })
+        tabla = pd.DataFrame(filas)
+        if tabla.empty:
+            return tabla
+        margen = rentabilidad(tabla["Ingreso Total"], tabla["Costo Total"]).drop(columns=["Costos Indirectos"])
+        return pd.concat([tabla.drop(columns=["Índices"]), margen, tabla[["Índices"]]], axis=1)
+
+
+def _dijkstra_heap(n, origen, destino, km, fuentes):
+    # Mismo resultado que scipy: fila por fuente, inf donde no hay camino
+    orden = np.argsort(origen, kind="stable")
+    offsets = np.searchsorted(origen[orden], np.arange(n + 1)).tolist()
+    vecinos = destino[orden].tolist()
+    pesos = km[orden].tolist()
+    resultado = np.full((len(fuentes), n), np.inf)
+    for fila, fuente in enumerate(fuentes):
+        distancia = [np.inf] * n
+        distancia[fuente] = 0.0
+        pendientes = [(0.0, fuente)]
+        while pendientes:
+            actual, nodo = heapq.heappop(pendientes)
+            if actual > distancia[nodo]:
+                continue
+            for arista in range(offsets[nodo], offsets[nodo + 1]):
+                nueva = actual + pesos[arista]
+                if nueva < distancia[vecinos[arista]]:
+                    distancia[vecinos[arista]] = nueva
+                    heapq.heappush(pendientes, (nueva, vecinos[arista]))
+        resultado[fila] = distancia
+    return resultado
+
+
+def km_mas_cortos(rutas, origenes, destinos):
+    # Matriz len(origenes) × len(destinos) con los KM del camino más corto por
+    # el catálogo, encadenando rutas si no hay una directa; NaN si no hay camino.
+    # Entre dos ubicaciones cuenta solo la ruta de menos KM
+    origenes = pd.Series(origenes, dtype=object).astype(str).to_numpy()
+    destinos = pd.Series(destinos, dtype=object).astype(str).to_numpy()
+    km = pd.to_numeric(rutas["KM"], errors="coerce")
+    validas = (km >= 0).to_numpy()
+    aristas = km[validas].groupby([rutas.loc[validas, "Origen"].astype(str),
+                                   rutas.loc[validas, "Destino"].astype(str)], sort=False).min()
+    desde = aristas.index.get_level_values(0).to_numpy(dtype=object)
+    hasta = aristas.index.get_level_values(1).to_numpy(dtype=object)
+    nodos = pd.Index(pd.unique(np.concatenate([desde, hasta, origenes, destinos])))
+    cod_desde = nodos.get_indexer(desde)
+    cod_hasta = nodos.get_indexer(hasta)
+    fuentes, cod_origenes = np.unique(nodos.get_indexer(origenes), return_inverse=True)
+
+    pesos = aristas.to_numpy(dtype=float)
+    if dijkstra is not None:
+        # Los ceros explícitos de una matriz dispersa son aristas de 0 km
+        grafo = csr_matrix((pesos, (cod_desde, cod_hasta)), shape=(len(nodos), len(nodos)))
+        distancias = dijkstra(grafo, directed=True, indices=fuentes)
+    else:
+        distancias = _dijkstra_heap(len(nodos), cod_desde, cod_hasta, pesos, fuentes)
+    tabla = np.atleast_2d(distancias)[cod_origenes][:, nodos.get_indexer(destinos)]
+    tabla[np.isinf(tabla)] = np.nan
+    return tabla
+
+
+_lock = threading.Lock()
+_cache = {"version": None, "grafo": None}
+
+
+def obtener_grafo():
+    # El índice se reconstruye solo cuando cambia la versión de la tabla de rutas
+    version = version_rutas()
+    with _lock:
+        if _cache["grafo"] is None or _cache["version"] != version:
+            rutas = rutas_rc()
+            _cache.update(version=version, grafo=None if rutas is None else GrafoRutas(rutas))
+        return _cache["grafo"]
@@ -0,0 +1,119 @@
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from picus.costos import COLUMNAS_EXTRAS, COLUMNAS_RUTA, aplicar_costos
+
+# ============================
+# Importación masiva de rutas (CSV / XLSX)
+# ============================
+# La validación se hace por columnas: cada regla produce una máscara booleana
+# sobre todo el archivo y al final se arma un reporte de errores por fila.
+
+TIPOS_RUTA = ["IMPO", "EXPO", "VACIO"]
+MONEDAS = ["MXN", "USD"]
+
+COLUMNAS_REQUERIDAS = ["Tipo", "Origen", "Destino", "KM"]
+COLUMNAS_TEXTO = ["Cliente", "Origen", "Destino"]
+COLUMNAS_MONEDA = ["Moneda", "Moneda_Cruce", "Moneda Costo Cruce"]
+COLUMNAS_NUMERICAS = ["KM", "Ingreso_Original", "Cruce_Original", "Costo Cruce", "Casetas"] + COLUMNAS_EXTRAS
+
+# Columnas que se llenan en la plantilla de importación
+COLUMNAS_PLANTILLA = [
+    "Fecha", "Tipo", "Cliente", "Origen", "Destino", "KM",
+    "Moneda", "Ingreso_Original", "Moneda_Cruce", "Cruce_Original",
+    "Moneda Costo Cruce", "Costo Cruce", "Casetas"
+] + COLUMNAS_EXTRAS
+
+
+def leer_archivo(archivo, nombre):
+    extension = os.path.splitext(nombre)[1].lower()
+    if extension in (".xlsx", ".xls"):
+        return pd.read_excel(archivo)
+    return pd.read_csv(archivo)
+
+
+def plantilla_csv():
+    return pd.DataFrame(columns=COLUMNAS_PLANTILLA).to_csv(index=False)
+
+
+def validar_columnas(df):
+    # Encabezados sin espacios; falla si falta alguna columna obligatoria
+    df = df.rename(columns=lambda c: str(c).strip())
+    faltantes = [c for c in COLUMNAS_REQUERIDAS if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas obligatorias: {', '.join(faltantes)}")
+    return df
+
+
+def validar(df):
+    # Devuelve (filas válidas normalizadas, reporte de errores por fila)
+    df = validar_columnas(df)
+
+    # Las columnas limpias se juntan en un dict y se arma el DataFrame una sola vez
+    limpio = {}
+    errores = {}
+
+    tipo = df["Tipo"].astype("string").str.strip().str.upper()
+    limpio["Tipo"] = tipo
+    errores["Tipo inválido (IMPO/EXPO/VACIO)"] = ~tipo.isin(TIPOS_RUTA).fillna(False).to_numpy(dtype=bool)
+
+    for col in COLUMNAS_TEXTO:
+        texto = df[col].astype("string").str.strip() if col in df.columns else pd.Series("", index=df.index, dtype="string")
+        limpio[col] = texto.fillna("")
+        if col in COLUMNAS_REQUERIDAS:
+            errores[f"{col} vacío"] = (limpio[col] == "").to_numpy()
+
+    for col in COLUMNAS_MONEDA:
+        if col in df.columns:
+            moneda = df[col].astype("string").str.strip().str.upper().fillna("MXN").replace("", "MXN")
+        else:
+            moneda = pd.Series("MXN", index=df.index, dtype="string")
+        limpio[col] = moneda
+        errores[f"{col} inválida (MXN/USD)"] = ~moneda.isin(MONEDAS).to_numpy(dtype=bool)
+
+    for col in COLUMNAS_NUMERICAS:
+        if col not in df.columns:
+            limpio[col] = np.zeros(len(df))
+            continue
+        crudo = df[col]
+        numero = pd.to_numeric(crudo, errors="coerce")
+        if pd.api.types.is_numeric_dtype(crudo):
+            vacio = crudo.isna()
+        else:
+            vacio = crudo.isna() | (crudo.astype("string").str.strip() == "").fillna(True)
+        if col in COLUMNAS_REQUERIDAS:
+            errores[f"{col} vacío"] = vacio.to_numpy(dtype=bool)
+        errores[f"{col} no numérico"] = (numero.isna() & ~vacio).to_numpy(dtype=bool)
+        errores[f"{col} negativo"] = (numero < 0).fillna(False).to_numpy(dtype=bool)
+        limpio[col] = numero.fillna(0.0)
+
+    hoy = datetime.today().strftime("%Y-%m-%d")
+    if "Fecha" in df.columns:
+        fecha = pd.to_datetime(df["Fecha"], errors="coerce")
+        errores["Fecha inválida"] = (fecha.isna() & df["Fecha"].notna()).to_numpy(dtype=bool)
+        limpio["Fecha"] = fecha.dt.strftime("%Y-%m-%d").fillna(hoy)
+    else:
+        limpio["Fecha"] = np.full(len(df), hoy, dtype=object)
+    limpio = pd.DataFrame(limpio, index=df.index)
+
+    mascaras = pd.DataFrame(errores, index=df.index)
+    con_error = mascaras.any(axis=1).to_numpy()
+    reporte = pd.DataFrame({
+        # Número de fila como se ve en la hoja (encabezado = fila 1)
+        "Fila": np.asarray(df.index[con_error]) + 2,
+        "Errores": [
+            "; ".join(mascaras.columns[fila])
+            for fila in mascaras.to_numpy()[con_error]
+        ],
+    })
+    return limpio[~con_error], reporte
+
+
+def preparar_rutas(validas, valores):
+    # Calcula todas las columnas de costo e ingreso en una sola pasada
+    rutas = aplicar_costos(validas, valores)
+    rutas["Clasificacion Ruta"] = "RC"
+    return rutas[[c for c in COLUMNAS_RUTA if c in rutas.columns]].reset_index(drop=True)
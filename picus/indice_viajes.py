@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+# ============================
+# Índice de estado de tráficos (una fila por ID_Programacion)
+# ============================
+# Guarda cuántos tramos tiene cada tráfico y sus datos de cabecera. Cada alta
+# o cierre lo actualiza con solo las filas nuevas, así las páginas saben qué
+# tráficos están pendientes o concluidos sin agrupar todo el historial.
+
+PENDIENTE = "PENDIENTE"
+CONCLUIDO = "CONCLUIDO"
+
+COLUMNAS_CABECERA = ["Fecha", "Número_Trafico", "Unidad", "Operador"]
+COLUMNAS_INDICE = ["ID_Programacion", "Tramos", "Estado"] + COLUMNAS_CABECERA
+
+
+def estado(tramos):
+    # Un tráfico con solo la IDA está pendiente; con IDA + VUELTA ya concluyó
+    return np.where(np.asarray(tramos) >= 2, CONCLUIDO, PENDIENTE)
+
+
+def indice_vacio():
+    return pd.DataFrame(columns=COLUMNAS_INDICE)
+
+
+def resumir(tramos):
+    if tramos is None or tramos.empty or "ID_Programacion" not in tramos.columns:
+        return indice_vacio()
+    # La cabecera se toma del tramo IDA cuando existe
+    if "Tramo" in tramos.columns:
+        tramos = tramos.iloc[np.argsort((tramos["Tramo"] != "IDA").to_numpy(), kind="stable")]
+    grupos = tramos.groupby("ID_Programacion", sort=False)
+    cabecera = [c for c in COLUMNAS_CABECERA if c in tramos.columns]
+    indice = grupos[cabecera].first() if cabecera else pd.DataFrame(index=grupos.size().index)
+    indice["Tramos"] = grupos.size()
+    indice["Estado"] = estado(indice["Tramos"])
+    return indice.reset_index().reindex(columns=COLUMNAS_INDICE)
+
+
+def fusionar(indice, tramos_nuevos):
+    nuevos = resumir(tramos_nuevos).set_index("ID_Programacion")
+    if nuevos.empty:
+        return indice
+    actual = indice.set_index("ID_Programacion")
+    comunes = nuevos.index.intersection(actual.index)
+    actual.loc[comunes, "Tramos"] = actual.loc[comunes, "Tramos"].astype(int) + nuevos.loc[comunes, "Tramos"].astype(int)
+    actual["Estado"] = estado(actual["Tramos"].astype(int))
+    partes = [p for p in (actual, nuevos.drop(index=comunes)) if not p.empty]
+    return pd.concat(partes).rename_axis("ID_Programacion").reset_index().reindex(columns=COLUMNAS_INDICE)
+
+
+def ids_con_estado(indice, valor):
+    return indice.loc[indice["Estado"] == valor, "ID_Programacion"]
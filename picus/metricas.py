@@ -0,0 +1,158 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# ============================
+# Métricas de tiempo por página y etapa
+# ============================
+# Las páginas envuelven sus pasos costosos con `medir(pagina, etapa)`; la
+# etapa empieza con uno de ETAPAS ("cargar rutas", "render ranking"...).
+# Las duraciones se guardan en memoria (últimas N por etapa) y, si se
+# configura un archivo, también como líneas JSON.
+# - PICUS_METRICAS=1 las activa al arrancar; también se prenden y apagan
+#   desde la página de Diagnóstico.
+# - PICUS_METRICAS_LOG=archivo.jsonl agrega cada medición al archivo.
+# Apagadas, `medir` devuelve siempre el mismo contexto vacío: el costo es una
+# llamada a función por paso.
+
+ETAPAS = ("cargar", "filtrar", "calcular", "render", "guardar")
+MUESTRAS_LATENCIA = 5000
+
+
+class Latencias:
+    # Últimas N duraciones por nombre, en milisegundos
+    def __init__(self, maximo=MUESTRAS_LATENCIA):
+        self.maximo = maximo
+        self._lock = threading.Lock()
+        self._muestras = {}
+        self._totales = {}
+
+    def registrar(self, nombre, ms):
+        with self._lock:
+            if nombre not in self._muestras:
+                self._muestras[nombre] = deque(maxlen=self.maximo)
+                self._totales[nombre] = 0
+            self._muestras[nombre].append(ms)
+            self._totales[nombre] += 1
+
+    def reiniciar(self):
+        with self._lock:
+            self._muestras.clear()
+            self._totales.clear()
+
+    def resumen(self):
+        with self._lock:
+            copia = {k: np.array(v) for k, v in self._muestras.items()}
+            totales = dict(self._totales)
+        resumen = {}
+        for nombre, ms in copia.items():
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            resumen[nombre] = {
+                "solicitudes": totales[nombre], "muestras": len(ms),
+                "p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3),
+                "p99_ms": round(float(p99), 3), "max_ms": round(float(ms.max()), 3),
+                "total_ms": round(float(ms.sum()), 3),
+            }
+        return resumen
+
+
+_NADA = nullcontext()
+_latencias = Latencias()
+_estado = {"activo": os.environ.get("PICUS_METRICAS", "") not in ("", "0"), "log": None, "archivo": None}
+_log_lock = threading.Lock()
+
+
+class _Medicion:
+    __slots__ = ("pagina", "etapa", "inicio")
+
+    def __init__(self, pagina, etapa):
+        self.pagina = pagina
+        self.etapa = etapa
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, error, traza):
+        ms = (time.perf_counter() - self.inicio) * 1000
+        _latencias.registrar((self.pagina, self.etapa), ms)
+        if _estado["log"] is not None:
+            _escribir_log(self.pagina, self.etapa, ms, tipo)
+        return False
+
+
+def medir(pagina, etapa):
+    if not _estado["activo"]:
+        return _NADA
+    return _Medicion(pagina, etapa)
+
+
+def _escribir_log(pagina, etapa, ms, tipo_error):
+    linea = {
+        "fecha": datetime.now().isoformat(timespec="milliseconds"),
+        "pagina": pagina, "etapa": etapa, "ms": round(ms, 3),
+        "hilo": threading.current_thread().name,
+    }
+    # st.stop() / st.rerun() salen con excepción pero no son errores
+    if tipo_error is not None and not tipo_error.__module__.startswith("streamlit"):
+        linea["error"] = tipo_error.__name__
+    with _log_lock:
+        if _estado["archivo"] is None:
+            _estado["archivo"] = open(_estado["log"], "a", encoding="utf-8")
+        _estado["archivo"].write(json.dumps(linea, ensure_ascii=False) + "\n")
+        _estado["archivo"].flush()
+
+
+def configurar(activo=None, log=""):
+    # log="" deja el archivo como está; None lo apaga
+    if activo is not None:
+        _estado["activo"] = bool(activo)
+    if log != "":
+        with _log_lock:
+            if _estado["archivo"] is not None:
+                _estado["archivo"].close()
+            _estado.update(log=log or None, archivo=None)
+
+
+def activas():
+    return _estado["activo"]
+
+
+def archivo_log():
+    return _estado["log"]
+
+
+def reiniciar():
+    _latencias.reiniciar()
+
+
+def resumen():
+    # Una fila por (página, etapa), de la más costosa a la menos costosa
+    filas = [{"Página": pagina, "Etapa": etapa, **datos}
+             for (pagina, etapa), datos in _latencias.resumen().items()]
+    if not filas:
+        return pd.DataFrame(columns=["Página", "Etapa", "solicitudes", "muestras",
+                                     "p50_ms", "p95_ms", "p99_ms", "max_ms", "total_ms"])
+    return pd.DataFrame(filas).sort_values("total_ms", ascending=False, ignore_index=True)
+
+
+def resumen_por_etapa(tabla=None):
+    # Suma por tipo de etapa (cargar / filtrar / calcular / render / guardar) y página
+    tabla = resumen() if tabla is None else tabla
+    if tabla.empty:
+        return pd.DataFrame()
+    tipo = tabla["Etapa"].str.split(" ", n=1).str[0]
+    return (tabla.assign(Tipo=tipo.where(tipo.isin(ETAPAS), "otra"))
+            .pivot_table(index="Página", columns="Tipo", values="total_ms", aggfunc="sum", fill_value=0.0)
+            .round(1))
+
+
+if os.environ.get("PICUS_METRICAS_LOG"):
+    configurar(log=os.environ["PICUS_METRICAS_LOG"])
@@ -0,0 +1,134 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from picus.constantes import RUTA_DATOS, RUTA_HISTORIAL_DATOS
+from picus.costos import version_parametros
+from picus.escritura import bloqueo, reemplazar_atomico
+
+# ============================
+# Datos Generales (parámetros de costeo)
+# ============================
+VALORES_DEFAULT = {
+    "Sueldo por Viaje": 300.0,
+    "Bono ISR IMSS por Viaje": 185.06,
+    "Bono Rendimiento": 0.0,
+    "Rendimiento Camion": 2.5,
+    "Costo Diesel": 24.0,
+    "Tipo de cambio USD": 17.5,
+    "Tipo de cambio MXN": 1.0
+}
+
+
+def cargar_datos_generales(ruta=RUTA_DATOS):
+    valores = dict(VALORES_DEFAULT)
+    if os.path.exists(ruta):
+        guardados = pd.read_csv(ruta).set_index("Parametro").to_dict()["Valor"]
+        valores.update({k: float(v) for k, v in guardados.items()})
+    return valores
+
+
+_lock = threading.Lock()
+_cache = {"firma": None, "valores": None}
+
+
+def _firma(ruta):
+    try:
+        info = os.stat(ruta)
+    except FileNotFoundError:
+        return (ruta, None)
+    return (ruta, info.st_mtime_ns, info.st_size)
+
+
+def datos_generales_vigentes(ruta=RUTA_DATOS):
+    # Para procesos largos (servicio de cotización): se relee el CSV solo
+    # cuando cambia su firma en disco
+    firma = _firma(ruta)
+    with _lock:
+        if _cache["firma"] != firma:
+            _cache.update(firma=firma, valores=cargar_datos_generales(ruta))
+        return dict(_cache["valores"])
+
+
+def guardar_datos_generales(valores, vigente_desde=None):
+    # Registra `valores` en el historial desde `vigente_desde` (hoy si no se
+    # indica) y deja en datos_generales.csv los que rigen hoy, que devuelve:
+    # una corrección con fecha pasada no pisa un cambio posterior
+    hoy = pd.Timestamp.today().normalize()
+    desde = hoy if vigente_desde is None else pd.Timestamp(vigente_desde).normalize()
+    with bloqueo(RUTA_DATOS), bloqueo(RUTA_HISTORIAL_DATOS):
+        historial = cargar_historial()
+        parametros = list(dict.fromkeys([*historial.columns.drop([VIGENCIA, "Version_Parametros"]), *valores]))
+        nuevo = pd.DataFrame([{VIGENCIA: desde, **{k: float(v) for k, v in valores.items()}}])
+        historial = pd.concat([historial[historial[VIGENCIA] != desde], nuevo], ignore_index=True)
+        historial = historial.sort_values(VIGENCIA, kind="stable")[[VIGENCIA] + parametros]
+        texto = historial.assign(**{VIGENCIA: historial[VIGENCIA].dt.strftime("%Y-%m-%d")})
+        reemplazar_atomico(RUTA_HISTORIAL_DATOS, lambda temporal: texto.to_csv(temporal, index=False))
+
+        vigentes = parametros_por_fecha([hoy], _completar(historial)).iloc[0].drop(["Version_Parametros", VIGENCIA])
+        df = pd.DataFrame(vigentes.items(), columns=["Parametro", "Valor"])
+        reemplazar_atomico(RUTA_DATOS, lambda temporal: df.to_csv(temporal, index=False))
+    return {k: float(v) for k, v in vigentes.items()}
+
+
+# ============================
+# Historial por fecha de vigencia
+# ============================
+# historial_datos_generales.csv guarda un renglón por cambio: la fecha desde
+# la que rige (Vigente_Desde) y todos los parámetros. Un tráfico se costea
+# con el último renglón vigente en su Fecha (as-of); los anteriores al
+# primer renglón toman ese primero. Sin historial, los Datos Generales
+# actuales rigen desde VIGENCIA_INICIAL, así que el primer cambio guardado
+# no altera el costo de los tráficos ya registrados.
+
+VIGENCIA = "Vigente_Desde"
+VIGENCIA_INICIAL = "2000-01-01"
+
+_cache_historial = {"firma": None, "historial": None}
+
+
+def _completar(historial):
+    # Fechas como datetime, un renglón por fecha, parámetros faltantes
+    # arrastrados del renglón anterior y la versión de cada renglón
+    historial = historial.assign(**{VIGENCIA: pd.to_datetime(historial[VIGENCIA]).dt.normalize()})
+    historial = historial.sort_values(VIGENCIA, kind="stable").drop_duplicates(VIGENCIA, keep="last")
+    parametros = list(dict.fromkeys([*VALORES_DEFAULT, *historial.columns.drop(VIGENCIA)]))
+    parametros = [p for p in parametros if p != "Version_Parametros"]
+    valores = historial.reindex(columns=parametros).apply(pd.to_numeric, errors="coerce").ffill()
+    valores = valores.fillna({k: v for k, v in VALORES_DEFAULT.items() if k in valores.columns})
+    completo = pd.concat([historial[[VIGENCIA]], valores], axis=1).reset_index(drop=True)
+    completo["Version_Parametros"] = [version_parametros(fila) for fila in completo[parametros].to_dict("records")]
+    return completo
+
+
+def cargar_historial(ruta=RUTA_HISTORIAL_DATOS, ruta_datos=RUTA_DATOS):
+    if os.path.exists(ruta):
+        historial = pd.read_csv(ruta)
+    else:
+        historial = pd.DataFrame([{VIGENCIA: VIGENCIA_INICIAL, **cargar_datos_generales(ruta_datos)}])
+    return _completar(historial)
+
+
+def historial_vigente(ruta=RUTA_HISTORIAL_DATOS, ruta_datos=RUTA_DATOS):
+    # Como datos_generales_vigentes: se relee solo cuando cambia alguno de los dos archivos
+    firma = (_firma(ruta), _firma(ruta_datos))
+    with _lock:
+        if _cache_historial["firma"] != firma:
+            _cache_historial.update(firma=firma, historial=cargar_historial(ruta, ruta_datos))
+        return _cache_historial["historial"].copy()
+
+
+def parametros_por_fecha(fechas, historial):
+    # Un renglón de parámetros por fecha, en el mismo orden, con un solo merge_asof
+    fechas = pd.to_datetime(pd.Series(np.asarray(fechas)), errors="coerce").astype("datetime64[ns]")
+    derecha = historial.assign(**{VIGENCIA: historial[VIGENCIA].astype("datetime64[ns]")})
+    # Sin fecha válida rigen los parámetros más recientes
+    izquierda = pd.DataFrame({"_fecha": fechas.fillna(derecha[VIGENCIA].iloc[-1]), "_fila": np.arange(len(fechas))})
+    izquierda = izquierda.sort_values("_fecha", kind="stable")
+    unidos = pd.merge_asof(izquierda, derecha, left_on="_fecha", right_on=VIGENCIA, direction="backward")
+    unidos = unidos.fillna(derecha.iloc[0].to_dict())
+    orden = np.empty(len(unidos), dtype=np.intp)
+    orden[unidos["_fila"].to_numpy()] = np.arange(len(unidos))
+    return unidos.iloc[orden].drop(columns=["_fecha", "_fila"]).reset_index(drop=True)
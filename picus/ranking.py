@@ -0,0 +1,217 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from picus.rentabilidad import rentabilidad
+from picus.repositorio import agregar_columnas_derivadas, rutas_rc, version_rutas
+
+# ============================
+# Ranking de vueltas redondas de toda la red
+# ============================
+# El mejor cierre de una IDA solo depende de (Destino, tipo de regreso), así
+# que se mantiene una tabla de cierres por origen:
+#   - directas: mejor IMPO/EXPO que sale de cada Origen
+#   - via: mejor VACIO + regreso que sale de cada Origen
+# Cuando cambian rutas solo se recalculan los orígenes afectados y el ranking
+# final es un merge de las IDA contra esas tablas.
+
+COLUMNAS_HUELLA = ["Tipo", "Cliente", "Origen", "Destino", "Ingreso Total", "Costo_Total_Ruta"]
+TIPOS_CARGA = ["IMPO", "EXPO"]
+
+
+def _utilidad(df):
+    return df["Ingreso Total"].fillna(0) - df["Costo_Total_Ruta"].fillna(0)
+
+
+def _claves(origenes, tipos):
+    return pd.MultiIndex.from_arrays([np.asarray(origenes), np.asarray(tipos)], names=["Origen", "Tipo"])
+
+
+class RankingVueltas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._base = None
+        self._directas = None
+        self._via = None
+        self._tabla = None
+
+    # ---------- Tablas de cierre por origen ----------
+    def _calcular_directas(self, rutas, claves=None):
+        regresos = rutas[rutas["Tipo"].isin(TIPOS_CARGA)]
+        if claves is not None:
+            regresos = regresos[_claves(regresos["Origen"], regresos["Tipo"]).isin(claves)]
+        regresos = regresos.assign(Utilidad_cierre=_utilidad(regresos))
+        mejores = regresos.sort_values("Utilidad_cierre", ascending=False, kind="stable")
+        mejores = mejores.drop_duplicates(["Origen", "Tipo"])
+        return pd.DataFrame({
+            "Cliente": mejores["Cliente"].to_numpy(),
+            "Destino": mejores["Destino"].to_numpy(),
+            "Ingreso": mejores["Ingreso Total"].fillna(0).to_numpy(),
+            "Costo": mejores["Costo_Total_Ruta"].fillna(0).to_numpy(),
+            "Utilidad_cierre": mejores["Utilidad_cierre"].to_numpy(),
+        }, index=_claves(mejores["Origen"], mejores["Tipo"]))
+
+    def _calcular_via(self, rutas, origenes=None):
+        vacios = rutas[rutas["Tipo"] == "VACIO"]
+        if origenes is not None:
+            vacios = vacios[vacios["Origen"].isin(origenes)]
+        if vacios.empty or self._directas.empty:
+            return self._directas.iloc[0:0].assign(Vacio="")
+        vacios = pd.DataFrame({
+            "Origen": vacios["Origen"].to_numpy(),
+            "Destino_vacio": vacios["Destino"].to_numpy(),
+            "Ingreso_vacio": vacios["Ingreso Total"].fillna(0).to_numpy(),
+            "Costo_vacio": vacios["Costo_Total_Ruta"].fillna(0).to_numpy(),
+        })
+        directas = self._directas.reset_index().rename(columns={"Origen": "Destino_vacio"})
+        pares = vacios.merge(directas, on="Destino_vacio")
+        pares["Ingreso"] = pares["Ingreso_vacio"] + pares["Ingreso"]
+        pares["Costo"] = pares["Costo_vacio"] + pares["Costo"]
+        pares["Utilidad_cierre"] = pares["Ingreso"] - pares["Costo"]
+        pares["Vacio"] = pares["Origen"] + " → " + pares["Destino_vacio"]
+        pares = pares.sort_values("Utilidad_cierre", ascending=False, kind="stable").drop_duplicates(["Origen", "Tipo"])
+        return pares.set_index(["Origen", "Tipo"])[["Vacio", "Cliente", "Destino", "Ingreso", "Costo", "Utilidad_cierre"]]
+
+    @staticmethod
+    def _reemplazar(tabla, claves, nuevas):
+        tabla = tabla[~tabla.index.isin(claves)]
+        return pd.concat([tabla, nuevas]) if not nuevas.empty else tabla
+
+    def _actualizar_incremental(self, rutas, base):
+        anterior = self._base
+        h_anterior = pd.util.hash_pandas_object(anterior, index=False)
+        h_nueva = pd.util.hash_pandas_object(base, index=False)
+        cambiadas = pd.concat([
+            anterior[~h_anterior.isin(h_nueva).to_numpy()],
+            base[~h_nueva.isin(h_anterior).to_numpy()],
+        ])
+        if cambiadas.empty:
+            return
+
+        cargas = cambiadas[cambiadas["Tipo"].isin(TIPOS_CARGA)]
+        claves_directas = _claves(cargas["Origen"], cargas["Tipo"]).unique()
+
+        # Orígenes cuyo mejor VACIO+regreso pudo cambiar
+        vacios = rutas[rutas["Tipo"] == "VACIO"]
+        destinos_tocados = set(cargas["Origen"])
+        origenes_via = set(cambiadas.loc[cambiadas["Tipo"] == "VACIO", "Origen"])
+        origenes_via |= set(vacios.loc[vacios["Destino"].isin(destinos_tocados), "Origen"])
+
+        if len(claves_directas):
+            self._directas = self._reemplazar(
+                self._directas, claves_directas, self._calcular_directas(rutas, claves_directas)
+            )
+        if origenes_via:
+            claves_via = self._via.index[self._via.index.get_level_values("Origen").isin(origenes_via)]
+            self._via = self._reemplazar(self._via, claves_via, self._calcular_via(rutas, origenes_via))
+
+    @staticmethod
+    def _elegir(directa, via):
+        # Por clave, el cierre vía VACIO gana solo si deja más utilidad que el directo
+        util_directa = directa["Utilidad_cierre"].to_numpy()
+        util_via = via["Utilidad_cierre"].to_numpy()
+        usar_via = np.nan_to_num(util_via, nan=-np.inf) > np.nan_to_num(util_directa, nan=-np.inf)
+        cierre = np.where(usar_via[:, None], via[["Ingreso", "Costo"]].to_numpy(), directa[["Ingreso", "Costo"]].to_numpy())
+        return usar_via, cierre
+
+    def cierres(self, destinos, tipos_ida):
+        # Mejor cierre para IDAs que no están en el catálogo (cotizaciones):
+        # solo se consultan las tablas por origen, no se recorre el catálogo
+        destinos = np.asarray(destinos)
+        tipo_regreso = np.where(np.asarray(tipos_ida) == "IMPO", "EXPO", "IMPO")
+        claves = _claves(destinos, tipo_regreso)
+        with self._lock:
+            directa = self._directas.reindex(claves)
+            via = self._via.reindex(claves)
+        usar_via, cierre = self._elegir(directa, via)
+        etiqueta_directa = directa["Cliente"] + " · " + destinos + " → " + directa["Destino"]
+        etiqueta_via = via["Vacio"] + " + " + via["Cliente"] + " → " + via["Destino"]
+        return pd.DataFrame({
+            "Regreso": np.where(usar_via, etiqueta_via.to_numpy(), etiqueta_directa.to_numpy()),
+            "Ingreso": cierre[:, 0],
+            "Costo": cierre[:, 1],
+        })
+
+    # ---------- Ranking ----------
+    def _armar_tabla(self, rutas):
+        idas = rutas[rutas["Tipo"].isin(TIPOS_CARGA)]
+        tipo_regreso = np.where(idas["Tipo"].to_numpy() == "IMPO", "EXPO", "IMPO")
+        claves = _claves(idas["Destino"], tipo_regreso)
+        directa = self._directas.reindex(claves)
+        via = self._via.reindex(claves)
+
+        ingreso_ida = idas["Ingreso Total"].fillna(0).to_numpy()
+        costo_ida = idas["Costo_Total_Ruta"].fillna(0).to_numpy()
+        util_directa = directa["Utilidad_cierre"].to_numpy()
+        util_via = via["Utilidad_cierre"].to_numpy()
+        usar_via, cierre = self._elegir(directa, via)
+
+        ingreso = ingreso_ida + cierre[:, 0]
+        costo = costo_ida + cierre[:, 1]
+        margen = rentabilidad(ingreso, costo)
+
+        tabla = pd.DataFrame({
+            "Tipo": idas["Tipo"].to_numpy(),
+            "Cliente": idas["Cliente"].to_numpy(),
+            "Ruta": idas["Ruta"].to_numpy(),
+            "Cierre Directo": (directa["Cliente"] + " - " + idas["Destino"].to_numpy() + " → " + directa["Destino"]).to_numpy(),
+            "Utilidad Directo": util_directa,
+            "Cierre Vía VACIO": (via["Vacio"] + " + " + via["Cliente"] + " → " + via["Destino"]).to_numpy(),
+            "Utilidad Vía VACIO": util_via,
+            "Mejor Cierre": np.where(usar_via, "VACIO", np.where(np.isnan(util_directa), "-", "DIRECTO")),
+            "Ingreso Total": ingreso,
+            "Costo Total": costo,
+            "Utilidad Bruta": margen["Utilidad Bruta"].to_numpy(),
+            "% Utilidad Bruta": margen["% Utilidad Bruta"].to_numpy(),
+            "Utilidad Neta": margen["Utilidad Neta"].to_numpy(),
+            "% Utilidad Neta": margen["% Utilidad Neta"].to_numpy(),
+        }, index=idas.index)
+        tabla = tabla[tabla["Mejor Cierre"] != "-"]
+        return tabla.sort_values("Utilidad Neta", ascending=False)
+
+    def actualizar(self, rutas, version):
+        with self._lock:
+            if version is not None and version == self._version:
+                return self._tabla
+            base = rutas[COLUMNAS_HUELLA].reset_index(drop=True)
+            if self._base is None:
+                self._directas = self._calcular_directas(rutas)
+                self._via = self._calcular_via(rutas)
+            else:
+                self._actualizar_incremental(rutas, base)
+            self._base = base
+            self._version = version
+            self._tabla = self._armar_tabla(rutas)
+            return self._tabla
+
+
+_ranking = RankingVueltas()
+
+
+def ranking_vueltas():
+    # La versión se lee antes que la tabla: si cambia en medio, el siguiente
+    # llamado simplemente vuelve a actualizar
+    version = version_rutas()
+    rutas = rutas_rc()
+    if rutas is None or rutas.empty:
+        return pd.DataFrame()
+    return _ranking.actualizar(rutas, version)
+
+
+def obtener_ranking(rutas=None):
+    # Sin `rutas` se usa el ranking compartido del catálogo; con `rutas` se arma
+    # uno aparte (por ejemplo, un catálogo leído desde la línea de comandos)
+    if rutas is None:
+        version = version_rutas()
+        rutas = rutas_rc()
+        if rutas is None or rutas.empty:
+            return None
+        _ranking.actualizar(rutas, version)
+        return _ranking
+    if rutas.empty:
+        return None
+    ranking = RankingVueltas()
+    ranking.actualizar(agregar_columnas_derivadas(rutas), None)
+    return ranking
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+# ============================
+# Rentabilidad (utilidad bruta / neta)
+# ============================
+# Los costos indirectos se estiman como un porcentaje fijo del ingreso. Todas
+# las páginas, el ranking, el grafo y el cotizador usan estas funciones para
+# que el cálculo sea uno solo.
+
+PORCENTAJE_INDIRECTOS = 0.35
+# Márgenes mínimos que la app marca en verde
+UMBRAL_UTILIDAD_BRUTA = 50
+UMBRAL_UTILIDAD_NETA = 15
+
+
+def rentabilidad(ingreso, costo, porcentaje_indirectos=PORCENTAJE_INDIRECTOS):
+    # Vectorizado: `ingreso` y `costo` son arreglos o Series del mismo largo
+    indice = ingreso.index if isinstance(ingreso, pd.Series) else None
+    ingreso = np.nan_to_num(np.asarray(ingreso, dtype=float))
+    costo = np.nan_to_num(np.asarray(costo, dtype=float))
+    bruta = ingreso - costo
+    indirectos = ingreso * porcentaje_indirectos
+    neta = bruta - indirectos
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct_bruta = np.where(ingreso > 0, bruta / ingreso * 100, np.nan)
+        pct_neta = np.where(ingreso > 0, neta / ingreso * 100, np.nan)
+    return pd.DataFrame({
+        "Utilidad Bruta": bruta,
+        "% Utilidad Bruta": np.round(pct_bruta, 2),
+        "Costos Indirectos": indirectos,
+        "Utilidad Neta": neta,
+        "% Utilidad Neta": np.round(pct_neta, 2),
+    }, index=indice)
+
+
+def rentabilidad_vuelta(ingreso, costo, porcentaje_indirectos=PORCENTAJE_INDIRECTOS):
+    # Un solo viaje o vuelta; los porcentajes valen 0 si no hay ingreso
+    fila = rentabilidad([ingreso], [costo], porcentaje_indirectos).iloc[0]
+    return {k: (0.0 if pd.isna(v) else float(v)) for k, v in fila.items()}
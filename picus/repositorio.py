@@ -0,0 +1,133 @@
+import threading
+
+import pandas as pd
+
+from picus.almacenamiento import COLUMNAS_IDENTIDAD_RUTA, obtener_almacen
+from picus.costos import repreciar
+from picus.escritura import en_serie
+from picus.metricas import medir
+
+# ============================
+# Repositorio de rutas en memoria
+# ============================
+# La tabla se lee una sola vez por proceso y se comparte entre sesiones y
+# reruns. Solo se vuelve a leer cuando cambia la firma del almacén
+# (mtime/tamaño del CSV o versión de la tabla en SQLite) o cuando la propia
+# app escribe a través de este módulo.
+
+COLUMNAS_DERIVADAS = ["Ruta", "Utilidad", "% Utilidad", "Etiqueta"]
+
+_lock = threading.Lock()
+_cache = {"firma": None, "completo": None, "rc": None}
+
+
+def agregar_columnas_derivadas(df):
+    df = df.copy()
+    # Origen y Destino son category (picus.esquema): se concatenan como texto
+    df["Ruta"] = df["Origen"].astype(str) + " → " + df["Destino"].astype(str)
+    df["Utilidad"] = df["Ingreso Total"] - df["Costo_Total_Ruta"]
+    df["% Utilidad"] = (df["Utilidad"] / df["Ingreso Total"] * 100).round(2)
+    # Texto de los selectores, armado una vez por carga en lugar de por opción
+    df["Etiqueta"] = df["Tipo"].astype(str) + " - " + df["Cliente"].astype(str) + " - " + df["Ruta"]
+    return df
+
+
+def _asegurar_cargado():
+    almacen = obtener_almacen()
+    firma = almacen.firma_rutas()
+    if firma is not None and firma == _cache["firma"]:
+        return
+    with _lock:
+        firma = almacen.firma_rutas()
+        if firma == _cache["firma"] and _cache["completo"] is not None:
+            return
+        with medir("picus", "cargar rutas del almacén"):
+            completo = almacen.leer_rutas()
+        if firma is None or completo is None:
+            _cache.update(firma=None, completo=None, rc=None)
+            return
+        if "Clasificacion Ruta" in completo.columns:
+            rc = completo[completo["Clasificacion Ruta"] == "RC"]
+        else:
+            rc = completo
+        with medir("picus", "calcular columnas derivadas"):
+            rc = agregar_columnas_derivadas(rc)
+        _cache.update(firma=firma, completo=completo, rc=rc)
+
+
+def existe_rutas():
+    return obtener_almacen().existe_rutas()
+
+
+def cargar_rutas():
+    # Tabla completa tal como está en disco; copia independiente para editar
+    _asegurar_cargado()
+    if _cache["completo"] is None:
+        return pd.DataFrame()
+    return _cache["completo"].copy()
+
+
+def rutas_rc():
+    # Vista de solo lectura: no modificar en sitio, usar .copy() antes de editar
+    _asegurar_cargado()
+    if _cache["rc"] is None:
+        return None
+    return _cache["rc"].copy(deep=False)
+
+
+def version_rutas():
+    # Cambia cada vez que se recarga la tabla; sirve de llave para cachés derivados
+    _asegurar_cargado()
+    return _cache["firma"]
+
+
+def sin_derivadas(df):
+    # Ruta, Utilidad, % Utilidad y Etiqueta solo viven en memoria: no se guardan
+    # en rutas ni en viajes
+    return df.drop(columns=[c for c in COLUMNAS_DERIVADAS if c in df.columns])
+
+
+def guardar_rutas(df):
+    obtener_almacen().guardar_rutas(sin_derivadas(df))
+    invalidar()
+
+
+def agregar_ruta(registro):
+    agregar_rutas(pd.DataFrame([registro]))
+
+
+def agregar_rutas(df_nuevo):
+    obtener_almacen().agregar_rutas(sin_derivadas(df_nuevo))
+    invalidar()
+
+
+def actualizar_ruta(indice, cambios, esperada=None):
+    # `esperada`: la ruta como se mostró; si otra escritura la movió, ValueError
+    obtener_almacen().actualizar_ruta(indice, cambios, esperada)
+    invalidar()
+
+
+def eliminar_rutas(indices, esperadas=None):
+    obtener_almacen().eliminar_rutas(indices, esperadas)
+    invalidar()
+
+
+def repreciar_catalogo(valores, anteriores=None):
+    # Lectura y escritura van juntas en el hilo escritor para no pisar altas concurrentes
+    return en_serie(_repreciar_catalogo, valores, anteriores)
+
+
+def _repreciar_catalogo(valores, anteriores):
+    # Recalcula todas las rutas con los parámetros vigentes y escribe una sola vez
+    df = cargar_rutas()
+    if df.empty:
+        return 0
+    df, cambiadas = repreciar(df, valores, anteriores)
+    if cambiadas:
+        guardar_rutas(df)
+    return cambiadas
+
+
+def invalidar():
+    with _lock:
+        _cache.update(firma=None, completo=None, rc=None)
@@ -0,0 +1,467 @@
+import contextlib
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+import time
+import zipfile
+from datetime import datetime
+
+import pandas as pd
+
+from picus.almacenamiento import obtener_almacen
+from picus.constantes import (RUTA_DATOS, RUTA_HISTORIAL_DATOS, RUTA_PROG, RUTA_RESPALDOS, RUTA_RUTAS, RUTA_SQLITE,
+                              RUTA_VIAJES_MES)
+from picus.escritura import bloqueo, en_serie, reemplazar_atomico
+from picus.importacion import TIPOS_RUTA
+from picus.parametros import VALORES_DEFAULT, VIGENCIA
+from picus.repositorio import invalidar
+
+# ============================
+# Respaldos comprimidos y restauración por bloques
+# ============================
+# Un respaldo es un ZIP en RUTA_RESPALDOS con los archivos de datos de todos
+# los motores que existan (rutas, viajes, datos generales, base SQLite y
+# meses Parquet) y un manifiesto.json con tamaño, fecha y SHA-256 de cada uno.
+# Los índices de viajes no se respaldan: se reconstruyen solos.
+# - Completo: copia todos los archivos.
+# - Incremental: se compara contra el manifiesto del último respaldo. Lo que
+#   no cambió solo se anota; si el archivo creció y su inicio es idéntico al
+#   anterior (viajes_programados.csv se anexa al final) se guarda solo la
+#   cola; lo demás va completo.
+# Todo se copia por bloques de bytes, sin cargar archivos en memoria.
+# Restaurar reconstruye cada archivo junto al original ("<archivo>.restaurando"),
+# verifica su SHA-256, valida el esquema leyendo por bloques y solo entonces
+# reemplaza los archivos vivos con rename, en el hilo escritor y bajo los
+# candados de datos.
+
+MANIFIESTO = "manifiesto.json"
+BYTES_BLOQUE = 1024 * 1024
+SUFIJO_RESTAURANDO = ".restaurando"
+# La validación lee todas las columnas como texto (para detectar filas con
+# columnas de más o de menos), así que usa bloques más chicos
+FILAS_VALIDACION = 10_000
+# Candados que usan las escrituras de la app, siempre en este orden
+BLOQUEOS = [RUTA_RUTAS, RUTA_PROG, RUTA_VIAJES_MES, RUTA_DATOS, RUTA_HISTORIAL_DATOS]
+
+ESQUEMAS = {
+    "rutas": {
+        "archivo": RUTA_RUTAS,
+        "requeridas": ["Tipo", "Origen", "Destino", "KM"],
+        "numericas": ["KM", "Ingreso Total", "Costo_Total_Ruta"],
+        "fechas": ["Fecha"],
+        "categorias": {"Tipo": TIPOS_RUTA},
+    },
+    "viajes": {
+        "archivo": RUTA_PROG,
+        "requeridas": ["ID_Programacion", "Tramo", "Fecha", "Tipo", "Origen", "Destino"],
+        "numericas": ["KM", "Ingreso Total", "Costo_Total_Ruta"],
+        "fechas": ["Fecha"],
+        "categorias": {"Tipo": TIPOS_RUTA},
+    },
+    "datos": {
+        "archivo": RUTA_DATOS,
+        "requeridas": ["Parametro", "Valor"],
+        "numericas": ["Valor"],
+        "fechas": [],
+        "categorias": {},
+    },
+    "historial": {
+        "archivo": RUTA_HISTORIAL_DATOS,
+        "requeridas": [VIGENCIA],
+        "numericas": list(VALORES_DEFAULT),
+        "fechas": [VIGENCIA],
+        "categorias": {},
+    },
+}
+TABLA_DE_ARCHIVO = {esquema["archivo"]: tabla for tabla, esquema in ESQUEMAS.items()}
+
+
+ARCHIVOS_FIJOS = [RUTA_RUTAS, RUTA_PROG, RUTA_DATOS, RUTA_HISTORIAL_DATOS, RUTA_SQLITE]
+# Nombre de un mes Parquet dentro de RUTA_VIAJES_MES (sin separadores ni "..")
+PATRON_MES = re.compile(r"[\w-]+\.parquet")
+
+
+def archivos_datos():
+    candidatos = ARCHIVOS_FIJOS + sorted(glob.glob(os.path.join(RUTA_VIAJES_MES, "*.parquet")))
+    return [ruta for ruta in candidatos if os.path.isfile(ruta)]
+
+
+def _destino(clave):
+    # Ruta de restauración de una clave del manifiesto: solo los archivos de
+    # archivos_datos() y siempre dentro de la carpeta de trabajo
+    destino = os.path.normpath(clave)
+    carpeta, nombre = os.path.split(destino)
+    permitido = destino in ARCHIVOS_FIJOS or (
+        carpeta == os.path.normpath(RUTA_VIAJES_MES) and PATRON_MES.fullmatch(nombre) is not None)
+    raiz = os.path.realpath(os.getcwd())
+    if not permitido or os.path.isabs(clave) or os.path.commonpath([raiz, os.path.realpath(destino)]) != raiz:
+        raise ValueError(f"El respaldo trae un archivo no permitido: {clave}")
+    return destino
+
+
+def _clave(ruta):
+    return ruta.replace(os.sep, "/")
+
+
+def _copiar(origen, destino, cantidad, suma):
+    # Copia `cantidad` bytes por bloques actualizando el hash; destino None = solo hash
+    restante = cantidad
+    while restante > 0:
+        bloque = origen.read(min(BYTES_BLOQUE, restante))
+        if not bloque:
+            raise ValueError("El archivo terminó antes de lo esperado")
+        suma.update(bloque)
+        if destino is not None:
+            destino.write(bloque)
+        restante -= len(bloque)
+
+
+# ============================
+# Crear respaldos
+# ============================
+def _copia_sqlite(ruta_copia):
+    # La API de respaldo de SQLite da una copia consistente aunque haya WAL pendiente
+    with contextlib.closing(sqlite3.connect(RUTA_SQLITE, timeout=30)) as origen, \
+            contextlib.closing(sqlite3.connect(ruta_copia)) as destino:
+        origen.backup(destino)
+
+
+def _abrir_fuentes(pila):
+    # Bajo los candados se abre cada archivo y se anota su tamaño. Las escrituras
+    # de la app reemplazan archivos completos (rename) o anexan al final, así que
+    # leer hasta ese tamaño desde el descriptor abierto da una foto consistente
+    # aunque los candados se suelten antes de terminar de comprimir.
+    fuentes = []
+    with contextlib.ExitStack() as candados:
+        for ruta in BLOQUEOS:
+            candados.enter_context(bloqueo(ruta))
+        for ruta in archivos_datos():
+            origen = ruta
+            if ruta == RUTA_SQLITE:
+                origen = f"{RUTA_SQLITE}.{os.getpid()}.respaldo.tmp"
+                pila.callback(lambda copia=origen: os.path.exists(copia) and os.remove(copia))
+                _copia_sqlite(origen)
+            archivo = pila.enter_context(open(origen, "rb"))
+            info = os.fstat(archivo.fileno())
+            fuentes.append((ruta, archivo, info.st_size, info.st_mtime_ns))
+    return fuentes
+
+
+def _escribir_miembro(zf, miembro, archivo, cantidad, suma):
+    info = zipfile.ZipInfo(miembro, date_time=time.localtime()[:6])
+    # Parquet ya viene comprimido
+    info.compress_type = zipfile.ZIP_STORED if miembro.endswith(".parquet") else zipfile.ZIP_DEFLATED
+    with zf.open(info, "w", force_zip64=True) as destino:
+        _copiar(archivo, destino, cantidad, suma)
+
+
+def _respaldar_archivo(zf, ruta, archivo, tamano, mtime_ns, previo):
+    clave = _clave(ruta)
+    entrada = {"tamano": tamano, "mtime_ns": mtime_ns}
+    if previo is not None and previo["tamano"] == tamano and previo["mtime_ns"] == mtime_ns:
+        return {**entrada, "sha256": previo["sha256"], "modo": "sin_cambios"}
+
+    suma = hashlib.sha256()
+    if previo is not None and tamano >= previo["tamano"]:
+        _copiar(archivo, None, previo["tamano"], suma)
+        if suma.hexdigest() == previo["sha256"]:
+            if tamano == previo["tamano"]:
+                return {**entrada, "sha256": previo["sha256"], "modo": "sin_cambios"}
+            # Mismo inicio: solo la cola, y el hash sigue desde donde iba
+            miembro = f"{clave}.anexo"
+            _escribir_miembro(zf, miembro, archivo, tamano - previo["tamano"], suma)
+            return {**entrada, "sha256": suma.hexdigest(), "modo": "anexo", "miembro": miembro,
+                    "desde": previo["tamano"]}
+        archivo.seek(0)
+        suma = hashlib.sha256()
+    _escribir_miembro(zf, clave, archivo, tamano, suma)
+    return {**entrada, "sha256": suma.hexdigest(), "modo": "completo", "miembro": clave}
+
+
+def _nombres_respaldos(carpeta):
+    return sorted(os.path.basename(r) for r in glob.glob(os.path.join(carpeta, "picus_*.zip")))
+
+
+def leer_manifiesto(ruta_zip):
+    with zipfile.ZipFile(ruta_zip) as zf:
+        return json.loads(zf.read(MANIFIESTO))
+
+
+def crear_respaldo(incremental=True, carpeta=RUTA_RESPALDOS):
+    # Devuelve (nombre del ZIP, manifiesto)
+    os.makedirs(carpeta, exist_ok=True)
+    existentes = _nombres_respaldos(carpeta)
+    base = existentes[-1] if incremental and existentes else None
+    previos = leer_manifiesto(os.path.join(carpeta, base))["archivos"] if base else {}
+
+    ahora = datetime.now()
+    tipo = "incremental" if base else "completo"
+    nombre = f"picus_{ahora:%Y%m%d_%H%M%S_%f}_{tipo}.zip"
+    manifiesto = {"creado": ahora.isoformat(timespec="seconds"), "tipo": tipo, "base": base,
+                  "motor": obtener_almacen().nombre, "archivos": {}}
+
+    def escribir(temporal):
+        with contextlib.ExitStack() as pila:
+            fuentes = _abrir_fuentes(pila)
+            with zipfile.ZipFile(temporal, "w", zipfile.ZIP_DEFLATED) as zf:
+                for ruta, archivo, tamano, mtime_ns in fuentes:
+                    entrada = _respaldar_archivo(zf, ruta, archivo, tamano, mtime_ns, previos.get(_clave(ruta)))
+                    manifiesto["archivos"][_clave(ruta)] = entrada
+                zf.writestr(MANIFIESTO, json.dumps(manifiesto, ensure_ascii=False, indent=1))
+
+    reemplazar_atomico(os.path.join(carpeta, nombre), escribir)
+    return nombre, manifiesto
+
+
+def listar_respaldos(carpeta=RUTA_RESPALDOS):
+    filas = []
+    for nombre in reversed(_nombres_respaldos(carpeta)):
+        ruta = os.path.join(carpeta, nombre)
+        try:
+            manifiesto = leer_manifiesto(ruta)
+        except (zipfile.BadZipFile, KeyError, ValueError):
+            continue
+        archivos = manifiesto["archivos"].values()
+        filas.append({
+            "Respaldo": nombre,
+            "Tipo": manifiesto["tipo"],
+            "Creado": manifiesto["creado"],
+            "Motor": manifiesto.get("motor", ""),
+            "Archivos copiados": sum(a["modo"] != "sin_cambios" for a in archivos),
+            "Archivos totales": len(archivos),
+            "Tamaño (MB)": round(os.path.getsize(ruta) / 1024 ** 2, 2),
+            "Base": manifiesto["base"] or "",
+        })
+    return pd.DataFrame(filas, columns=["Respaldo", "Tipo", "Creado", "Motor", "Archivos copiados",
+                                        "Archivos totales", "Tamaño (MB)", "Base"])
+
+
+def importar_respaldo(archivo, nombre, carpeta=RUTA_RESPALDOS):
+    # Copia por bloques un ZIP subido a la carpeta de respaldos; devuelve su nombre
+    nombre = os.path.basename(nombre)
+    if not nombre.startswith("picus_") or not nombre.endswith(".zip"):
+        raise ValueError("El nombre del respaldo debe ser picus_<fecha>_<tipo>.zip")
+    os.makedirs(carpeta, exist_ok=True)
+    ruta_zip = os.path.join(carpeta, nombre)
+    temporal = ruta_zip + ".tmp"
+    try:
+        with open(temporal, "wb") as salida:
+            shutil.copyfileobj(archivo, salida, BYTES_BLOQUE)
+        try:
+            leer_manifiesto(temporal)
+        except (zipfile.BadZipFile, KeyError, ValueError) as e:
+            raise ValueError(f"No es un respaldo de PICUS válido: {e}") from e
+        os.replace(temporal, ruta_zip)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+    return nombre
+
+
+# ============================
+# Validación de esquema por bloques
+# ============================
+def _errores_bloque(bloque, esquema):
+    # Máscaras por regla sobre un bloque leído como texto
+    texto = {c: bloque[c].str.strip() for c in bloque.columns}
+    for col in esquema["requeridas"]:
+        yield f"{col} vacío", texto[col] == ""
+    for col in esquema["numericas"]:
+        if col in texto:
+            yield f"{col} no numérico", (texto[col] != "") & pd.to_numeric(texto[col], errors="coerce").isna()
+    for col in esquema["fechas"]:
+        if col in texto:
+            fecha = pd.to_datetime(texto[col].str[:10], format="%Y-%m-%d", errors="coerce")
+            yield f"{col} inválida", (texto[col] != "") & fecha.isna()
+    for col, permitidos in esquema["categorias"].items():
+        if col in texto:
+            yield f"{col} inválido ({'/'.join(permitidos)})", (texto[col] != "") & ~texto[col].str.upper().isin(permitidos)
+
+
+def validar_csv(ruta, tabla, filas_bloque=FILAS_VALIDACION):
+    # Recorre el archivo por bloques; devuelve el número de filas o ValueError con el resumen
+    esquema = ESQUEMAS[tabla]
+    try:
+        encabezado = pd.read_csv(ruta, nrows=0).columns
+    except pd.errors.EmptyDataError:
+        raise ValueError("El archivo está vacío") from None
+    faltantes = [c for c in esquema["requeridas"] if c not in encabezado]
+    if faltantes:
+        raise ValueError(f"Faltan columnas obligatorias: {', '.join(faltantes)}")
+
+    errores = {}
+    filas = 0
+    try:
+        for bloque in pd.read_csv(ruta, chunksize=filas_bloque, dtype=str, keep_default_na=False):
+            for regla, mascara in _errores_bloque(bloque, esquema):
+                malas = mascara.to_numpy().nonzero()[0]
+                if len(malas):
+                    conteo, primera = errores.get(regla, (0, None))
+                    # Número de fila como se ve en la hoja (encabezado = fila 1)
+                    errores[regla] = (conteo + len(malas), primera or int(bloque.index[malas[0]]) + 2)
+            filas += len(bloque)
+    except pd.errors.ParserError as e:
+        raise ValueError(f"CSV mal formado: {e}") from None
+    if errores:
+        raise ValueError("; ".join(f"{regla} en {conteo} fila(s) (primera: fila {primera})"
+                                   for regla, (conteo, primera) in errores.items()))
+    return filas
+
+
+def _validar_parquet(ruta):
+    import pyarrow.parquet as pq
+    try:
+        columnas = pq.ParquetFile(ruta).schema_arrow.names
+    except Exception as e:
+        raise ValueError(f"Parquet ilegible: {e}") from None
+    faltantes = [c for c in ESQUEMAS["viajes"]["requeridas"] if c not in columnas]
+    if faltantes:
+        raise ValueError(f"Faltan columnas obligatorias: {', '.join(faltantes)}")
+
+
+def _validar_sqlite(ruta):
+    from picus.almacenamiento import TABLA_RUTAS, TABLA_VIAJES
+    try:
+        with contextlib.closing(sqlite3.connect(ruta)) as con:
+            if con.execute("PRAGMA quick_check").fetchone()[0] != "ok":
+                raise ValueError("La base SQLite está dañada")
+            for tabla, esquema in [(TABLA_RUTAS, ESQUEMAS["rutas"]), (TABLA_VIAJES, ESQUEMAS["viajes"])]:
+                columnas = [fila[1] for fila in con.execute(f'PRAGMA table_info("{tabla}")')]
+                faltantes = [c for c in esquema["requeridas"] if columnas and c not in columnas]
+                if faltantes:
+                    raise ValueError(f"A la tabla {tabla} le faltan columnas: {', '.join(faltantes)}")
+    except sqlite3.DatabaseError as e:
+        raise ValueError(f"No es una base SQLite válida: {e}") from None
+
+
+def _validar_archivo(destino, temporal):
+    try:
+        if destino in TABLA_DE_ARCHIVO:
+            validar_csv(temporal, TABLA_DE_ARCHIVO[destino])
+        elif destino.endswith(".parquet"):
+            _validar_parquet(temporal)
+        elif destino == RUTA_SQLITE:
+            _validar_sqlite(temporal)
+        else:
+            raise ValueError("archivo no permitido en un respaldo")
+    except ValueError as e:
+        raise ValueError(f"{destino}: {e}") from None
+
+
+# ============================
+# Restaurar
+# ============================
+def _cadena(carpeta, nombre):
+    # Manifiestos desde `nombre` hacia atrás hasta el respaldo completo
+    cadena = []
+    while nombre:
+        if os.path.basename(nombre) != nombre:
+            raise ValueError(f"Nombre de respaldo base inválido: {nombre}")
+        ruta = os.path.join(carpeta, nombre)
+        if not os.path.exists(ruta):
+            raise ValueError(f"Falta el respaldo base {nombre}")
+        manifiesto = leer_manifiesto(ruta)
+        cadena.append((ruta, manifiesto))
+        nombre = manifiesto["base"]
+    return cadena
+
+
+def _reconstruir(cadena, clave, temporal):
+    # Copia completa más los anexos posteriores, en orden
+    tramos = []
+    for ruta_zip, manifiesto in cadena:
+        entrada = manifiesto["archivos"].get(clave)
+        if entrada is None:
+            raise ValueError(f"{clave} no aparece en {os.path.basename(ruta_zip)}")
+        if entrada["modo"] == "sin_cambios":
+            continue
+        tramos.append((ruta_zip, entrada))
+        if entrada["modo"] == "completo":
+            break
+    else:
+        raise ValueError(f"Falta la copia completa de {clave} en la cadena de respaldos")
+
+    objetivo = cadena[0][1]["archivos"][clave]
+    suma = hashlib.sha256()
+    with open(temporal, "wb") as salida:
+        for ruta_zip, entrada in reversed(tramos):
+            if entrada["modo"] == "anexo" and salida.tell() != entrada["desde"]:
+                raise ValueError(f"{clave}: el anexo de {os.path.basename(ruta_zip)} no continúa la copia anterior")
+            with zipfile.ZipFile(ruta_zip) as zf, zf.open(entrada["miembro"]) as origen:
+                _copiar(origen, salida, zf.getinfo(entrada["miembro"]).file_size, suma)
+    if os.path.getsize(temporal) != objetivo["tamano"] or suma.hexdigest() != objetivo["sha256"]:
+        raise ValueError(f"{clave}: el contenido restaurado no coincide con el manifiesto")
+
+
+def _intercambiar(preparados, sobrantes):
+    with contextlib.ExitStack() as candados:
+        for ruta in BLOQUEOS:
+            candados.enter_context(bloqueo(ruta))
+        for destino, temporal in preparados:
+            if destino == RUTA_SQLITE:
+                # Un WAL viejo junto a la base nueva la corrompería
+                for extra in (f"{RUTA_SQLITE}-wal", f"{RUTA_SQLITE}-shm"):
+                    if os.path.exists(extra):
+                        os.remove(extra)
+            os.replace(temporal, destino)
+        for ruta in sobrantes:
+            os.remove(ruta)
+    invalidar()
+
+
+def restaurar_respaldo(nombre, carpeta=RUTA_RESPALDOS):
+    # Devuelve la lista de archivos restaurados; si algo no valida no se toca nada
+    cadena = _cadena(carpeta, nombre)
+    # Todas las claves se revisan antes de reconstruir nada
+    destinos = {clave: _destino(clave) for clave in cadena[0][1]["archivos"]}
+    preparados = []
+    try:
+        for clave, destino in destinos.items():
+            temporal = destino + SUFIJO_RESTAURANDO
+            os.makedirs(os.path.dirname(destino) or ".", exist_ok=True)
+            preparados.append((destino, temporal))
+            _reconstruir(cadena, clave, temporal)
+            _validar_archivo(destino, temporal)
+        # Los meses Parquet que no estaban en el respaldo sobran; los demás
+        # archivos que no venían (p. ej. de otro motor) se dejan como están
+        sobrantes = []
+        if any(destino.endswith(".parquet") for destino, _ in preparados):
+            restaurados = {destino for destino, _ in preparados}
+            sobrantes = [r for r in glob.glob(os.path.join(RUTA_VIAJES_MES, "*.parquet")) if r not in restaurados]
+        en_serie(_intercambiar, preparados, sobrantes)
+    finally:
+        for _, temporal in preparados:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+    return [destino for destino, _ in preparados]
+
+
+def _reemplazar_archivo(temporal, destino):
+    with bloqueo(destino):
+        os.replace(temporal, destino)
+
+
+def restaurar_csv(archivo, tabla):
+    # Un CSV suelto (rutas, viajes, datos o historial): se copia por bloques junto al
+    # archivo vivo, se valida por bloques y el motor activo lo toma
+    temporal = ESQUEMAS[tabla]["archivo"] + SUFIJO_RESTAURANDO
+    try:
+        with open(temporal, "wb") as salida:
+            shutil.copyfileobj(archivo, salida, BYTES_BLOQUE)
+        filas = validar_csv(temporal, tabla)
+        almacen = obtener_almacen()
+        if tabla == "rutas":
+            almacen.restaurar_rutas_csv(temporal)
+        elif tabla == "viajes":
+            almacen.restaurar_viajes_csv(temporal)
+        else:
+            en_serie(_reemplazar_archivo, temporal, ESQUEMAS[tabla]["archivo"])
+        invalidar()
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+    return filas
@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+
+from picus.repositorio import sin_derivadas
+
+# ============================
+# Motor de regresos (IDA → [VACIO] → regreso)
+# ============================
+# Arma todas las cadenas candidatas con merges sobre Origen/Destino y calcula
+# la utilidad combinada en una sola pasada, en lugar de filtrar la tabla de
+# rutas una vez por cada VACIO. Funciona igual para un viaje o para muchos.
+
+TOP_K = 5
+
+
+def tipo_regreso(tipo_ida):
+    return "EXPO" if tipo_ida == "IMPO" else "IMPO"
+
+
+def _tramos(df_rutas, tipos, sufijo):
+    t = df_rutas[df_rutas["Tipo"].isin(tipos)]
+    ingreso = t["Ingreso Total"].fillna(0).to_numpy()
+    costo = t["Costo_Total_Ruta"].fillna(0).to_numpy()
+    return pd.DataFrame({
+        f"idx_{sufijo}": t.index,
+        f"Tipo_{sufijo}": t["Tipo"].to_numpy(),
+        f"Cliente_{sufijo}": t["Cliente"].to_numpy(),
+        f"Origen_{sufijo}": t["Origen"].to_numpy(),
+        f"Destino_{sufijo}": t["Destino"].to_numpy(),
+        f"Ingreso_{sufijo}": ingreso,
+        f"Costo_{sufijo}": costo,
+        f"Utilidad_{sufijo}": ingreso - costo,
+    })
+
+
+def _mejores(df, columna, por, k):
+    return df.sort_values(columna, ascending=False, kind="stable").groupby(por, sort=False).head(k)
+
+
+def cadenas_regreso(idas, df_rutas, k=TOP_K):
+    # idas: un renglón por viaje pendiente; su índice es la clave del viaje.
+    # Devuelve hasta k cadenas por viaje ordenadas por utilidad combinada.
+    if idas.empty or df_rutas.empty:
+        return pd.DataFrame()
+
+    tipos_ida = idas["Tipo"].to_numpy()
+    base = pd.DataFrame({
+        "clave": idas.index,
+        "Destino_ida": idas["Destino"].to_numpy(),
+        "Tipo_buscado": np.where(tipos_ida == "IMPO", "EXPO", "IMPO"),
+        "Ingreso_ida": idas["Ingreso Total"].fillna(0).to_numpy(),
+        "Costo_ida": idas["Costo_Total_Ruta"].fillna(0).to_numpy(),
+    })
+
+    # La utilidad de la cadena es aditiva por tramo, así que para el top-k
+    # basta con los k mejores regresos por origen y los k mejores pares
+    # VACIO+regreso por origen del VACIO; esto acota el join a 2k filas por viaje.
+    regresos = _mejores(_tramos(df_rutas, ["IMPO", "EXPO"], "regreso"), "Utilidad_regreso",
+                        ["Origen_regreso", "Tipo_regreso"], k)
+    vacios = _tramos(df_rutas, ["VACIO"], "vacio")
+    pares = vacios.merge(regresos, left_on="Destino_vacio", right_on="Origen_regreso")
+    pares["Utilidad_pares"] = pares["Utilidad_vacio"] + pares["Utilidad_regreso"]
+    pares = _mejores(pares, "Utilidad_pares", ["Origen_vacio", "Tipo_regreso"], k)
+
+    directas = base.merge(
+        regresos, left_on=["Destino_ida", "Tipo_buscado"], right_on=["Origen_regreso", "Tipo_regreso"]
+    )
+    via_vacio = base.merge(
+        pares, left_on=["Destino_ida", "Tipo_buscado"], right_on=["Origen_vacio", "Tipo_regreso"]
+    )
+    # Las dos partes entran aunque alguna esté vacía: así las columnas *_vacio
+    # existen siempre (nulas en las cadenas directas)
+    cadenas = pd.concat([directas, via_vacio], ignore_index=True)
+    if cadenas.empty:
+        return pd.DataFrame()
+
+    ingreso_vacio = cadenas["Ingreso_vacio"].fillna(0).to_numpy()
+    costo_vacio = cadenas["Costo_vacio"].fillna(0).to_numpy()
+    ingreso = cadenas["Ingreso_ida"].to_numpy() + ingreso_vacio + cadenas["Ingreso_regreso"].to_numpy()
+    costo = cadenas["Costo_ida"].to_numpy() + costo_vacio + cadenas["Costo_regreso"].to_numpy()
+    utilidad = ingreso - costo
+
+    cadenas["Ingreso Total"] = ingreso
+    cadenas["Costo Total"] = costo
+    cadenas["Utilidad"] = utilidad
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cadenas["% Utilidad"] = np.round(np.where(ingreso > 0, utilidad / ingreso * 100, 0), 2)
+    cadenas["idx_vacio"] = cadenas["idx_vacio"].astype("Int64")
+
+    cadenas = cadenas.sort_values(["clave", "Utilidad"], ascending=[True, False], kind="stable")
+    return cadenas.groupby("clave", sort=False).head(k).reset_index(drop=True)
+
+
+def opciones_regreso(ida, df_rutas, k=TOP_K):
+    idas = pd.DataFrame([ida])
+    return cadenas_regreso(idas, df_rutas, k=k)
+
+
+def tramos_de_cadena(cadena, df_rutas):
+    tramos = []
+    if pd.notna(cadena["idx_vacio"]):
+        tramos.append(df_rutas.loc[int(cadena["idx_vacio"])])
+    tramos.append(df_rutas.loc[cadena["idx_regreso"]])
+    return tramos
+
+
+# Datos del viaje que heredan los tramos de regreso
+COLUMNAS_VIAJE = ["Fecha", "Número_Trafico", "Unidad", "Operador", "ID_Programacion"]
+
+
+def filas_de_cierre(idas, cadenas, df_rutas):
+    # Una cadena elegida por viaje → tramos "VUELTA" listos para guardar en un solo write
+    partes = []
+    for orden, columna in enumerate(["idx_vacio", "idx_regreso"]):
+        sel = cadenas[cadenas[columna].notna()]
+        if sel.empty:
+            continue
+        tramos = df_rutas.loc[sel[columna].astype(int).to_numpy()].reset_index(drop=True)
+        ida = idas.loc[sel["clave"].to_numpy()].reset_index(drop=True)
+        for col in COLUMNAS_VIAJE:
+            tramos[col] = ida[col].to_numpy()
+        tramos["Tramo"] = "VUELTA"
+        tramos["_clave"] = sel["clave"].to_numpy()
+        tramos["_orden"] = orden
+        partes.append(tramos)
+    if not partes:
+        return pd.DataFrame()
+    filas = pd.concat(partes, ignore_index=True).sort_values(["_clave", "_orden"], kind="stable")
+    return sin_derivadas(filas.drop(columns=["_clave", "_orden"])).reset_index(drop=True)
@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+
+from picus.costos import _num, calcular_costos
+from picus.rentabilidad import PORCENTAJE_INDIRECTOS, UMBRAL_UTILIDAD_NETA
+
+# ============================
+# Sensibilidad Monte Carlo (diesel, tipo de cambio, rendimiento)
+# ============================
+# Con los demás parámetros fijos, ingreso y costo de una ruta son lineales en
+# el tipo de cambio USD y en el costo por km (Costo Diesel / Rendimiento):
+#   ingreso = ingreso_mxn + ingreso_usd · TC
+#   costo   = costo_mxn + costo_usd · TC + KM · diesel / rendimiento
+# Cada ruta se reduce a esos coeficientes una vez y los escenarios se evalúan
+# como operaciones de matrices rutas × escenarios, por bloques de rutas para
+# acotar la memoria. Las rutas sin montos en USD solo dependen del costo por
+# km y su margen baja cuando éste sube, así que sus percentiles y la
+# probabilidad de quedar bajo el umbral salen directo de los escenarios
+# ordenados, sin armar la matriz. Como todo es lineal, un cliente o el
+# portafolio completo es la suma de los coeficientes de sus rutas (un viaje
+# por ruta).
+
+PARAMETROS_RIESGO = ["Costo Diesel", "Tipo de cambio USD", "Rendimiento Camion"]
+# Desviación estándar relativa de cada parámetro en el horizonte analizado
+VOLATILIDAD = {"Costo Diesel": 0.10, "Tipo de cambio USD": 0.08, "Rendimiento Camion": 0.05}
+CORRELACION_DIESEL_TC = 0.3
+N_ESCENARIOS = 10000
+# Elementos (rutas × escenarios) por bloque: ~32 MB por matriz de float64
+ELEMENTOS_BLOQUE = 4_000_000
+COLUMNAS_COEFICIENTES = ["Ingreso MXN", "Ingreso USD", "Costo MXN", "Costo USD", "KM"]
+COLUMNAS_SENSIBILIDAD = [
+    "Ingreso Medio", "Utilidad Neta Media",
+    "% Utilidad Neta P5", "% Utilidad Neta P50", "% Utilidad Neta P95", "Prob. Bajo Umbral",
+]
+
+
+def muestrear_escenarios(valores, n=N_ESCENARIOS, volatilidad=None, correlacion=CORRELACION_DIESEL_TC, semilla=0):
+    # Lognormales centradas en el valor vigente; diesel y tipo de cambio se mueven juntos
+    volatilidad = {**VOLATILIDAD, **(volatilidad or {})}
+    rng = np.random.default_rng(semilla)
+    z = rng.standard_normal((n, len(PARAMETROS_RIESGO)))
+    z[:, 1] = correlacion * z[:, 0] + np.sqrt(1 - correlacion ** 2) * z[:, 1]
+    escenarios = {}
+    for j, parametro in enumerate(PARAMETROS_RIESGO):
+        sigma = float(volatilidad[parametro])
+        escenarios[parametro] = float(valores[parametro]) * np.exp(sigma * z[:, j] - sigma ** 2 / 2)
+    return pd.DataFrame(escenarios)
+
+
+def coeficientes(rutas, valores):
+    # Reproduce exactamente el costo con `valores` cuando el escenario es el vigente
+    derivadas = calcular_costos(rutas, valores)
+    tc_usd = float(valores["Tipo de cambio USD"])
+
+    def en_usd(columna_moneda, columna_monto):
+        monedas = rutas[columna_moneda].to_numpy() if columna_moneda in rutas.columns else np.full(len(rutas), "MXN")
+        return np.where(monedas == "USD", _num(rutas, columna_monto), 0.0)
+
+    ingreso_usd = en_usd("Moneda", "Ingreso_Original") + en_usd("Moneda_Cruce", "Cruce_Original")
+    costo_usd = en_usd("Moneda Costo Cruce", "Costo Cruce")
+    costo_total = derivadas["Costo_Total_Ruta"].to_numpy()
+    return pd.DataFrame({
+        "Ingreso MXN": derivadas["Ingreso Total"].to_numpy() - ingreso_usd * tc_usd,
+        "Ingreso USD": ingreso_usd,
+        "Costo MXN": costo_total - derivadas["Costo_Diesel_Camion"].to_numpy() - costo_usd * tc_usd,
+        "Costo USD": costo_usd,
+        "KM": _num(rutas, "KM"),
+    }, index=rutas.index)
+
+
+def _margenes(coef, tipo_cambio, costo_km, porcentaje_indirectos):
+    # coef: arreglo (rutas × 5); devuelve ingreso y utilidad neta (rutas × escenarios)
+    ingreso = coef[:, [0]] + coef[:, [1]] * tipo_cambio
+    costo = coef[:, [2]] + coef[:, [3]] * tipo_cambio + coef[:, [4]] * costo_km
+    return ingreso, ingreso * (1 - porcentaje_indirectos) - costo
+
+
+def _factores(escenarios):
+    tipo_cambio = escenarios["Tipo de cambio USD"].to_numpy(dtype=float)
+    costo_km = (escenarios["Costo Diesel"] / escenarios["Rendimiento Camion"]).to_numpy(dtype=float)
+    return tipo_cambio, costo_km
+
+
+def _simular_solo_km(coef, costo_km, umbral, porcentaje_indirectos):
+    # Rutas sin USD: margen = (1 - indirectos) - (costo_mxn + KM · k) / ingreso_mxn,
+    # afín y decreciente en k; el percentil q del margen es el de k en 1 - q
+    ordenado = np.sort(costo_km)
+    k95, k50, k5 = np.percentile(ordenado, [95, 50, 5])
+    ingreso, costo, km = coef[:, 0], coef[:, 2], coef[:, 4]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        def margen(k):
+            return np.where(ingreso > 0, ((1 - porcentaje_indirectos) - (costo + km * k) / ingreso) * 100, np.nan)
+        # margen < umbral  ⇔  KM · k > (1 - indirectos - umbral/100) · ingreso - costo
+        limite = ((1 - porcentaje_indirectos - umbral / 100) * ingreso - costo) / km
+        por_encima = 1 - np.searchsorted(ordenado, limite, side="right") / len(ordenado)
+        bajo = np.where(km > 0, por_encima, (margen(0) < umbral).astype(float))
+        return np.column_stack([
+            ingreso, ingreso * (1 - porcentaje_indirectos) - costo - km * costo_km.mean(),
+            margen(k95), margen(k50), margen(k5), np.where(ingreso > 0, bajo, np.nan),
+        ])
+
+
+def _simular_bloque(coef, tipo_cambio, costo_km, umbral, porcentaje_indirectos):
+    ingreso, neta = _margenes(coef, tipo_cambio, costo_km, porcentaje_indirectos)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(ingreso > 0, neta / ingreso * 100, np.nan)
+        p5, p50, p95 = np.percentile(pct, [5, 50, 95], axis=1)
+    sin_ingreso = (coef[:, 0] <= 0) & (coef[:, 1] <= 0)
+    bajo = np.where(sin_ingreso, np.nan, (pct < umbral).mean(axis=1))
+    return np.column_stack([ingreso.mean(axis=1), neta.mean(axis=1), p5, p50, p95, bajo])
+
+
+def simular(coef, escenarios, umbral=UMBRAL_UTILIDAD_NETA, porcentaje_indirectos=PORCENTAJE_INDIRECTOS,
+            elementos_bloque=ELEMENTOS_BLOQUE):
+    # Distribución del margen neto de cada fila de `coef` sobre todos los escenarios
+    tipo_cambio, costo_km = _factores(escenarios)
+    matriz = coef[COLUMNAS_COEFICIENTES].to_numpy(dtype=float)
+    resultado = np.full((len(matriz), len(COLUMNAS_SENSIBILIDAD)), np.nan)
+
+    solo_km = (matriz[:, 1] == 0) & (matriz[:, 3] == 0)
+    if solo_km.any():
+        resultado[solo_km] = _simular_solo_km(matriz[solo_km], costo_km, umbral, porcentaje_indirectos)
+
+    con_usd = np.flatnonzero(~solo_km)
+    bloque = max(1, elementos_bloque // max(1, len(escenarios)))
+    for inicio in range(0, len(con_usd), bloque):
+        filas = con_usd[inicio:inicio + bloque]
+        resultado[filas] = _simular_bloque(matriz[filas], tipo_cambio, costo_km, umbral, porcentaje_indirectos)
+
+    tabla = pd.DataFrame(resultado, index=coef.index, columns=COLUMNAS_SENSIBILIDAD)
+    tabla.iloc[:, :-1] = tabla.iloc[:, :-1].round(2)
+    return tabla
+
+
+def distribucion(coef, escenarios, porcentaje_indirectos=PORCENTAJE_INDIRECTOS):
+    # Ingreso y utilidad neta de un solo renglón de coeficientes en cada escenario
+    tipo_cambio, costo_km = _factores(escenarios)
+    fila = np.asarray(coef[COLUMNAS_COEFICIENTES], dtype=float).reshape(1, -1)
+    ingreso, neta = _margenes(fila, tipo_cambio, costo_km, porcentaje_indirectos)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(ingreso[0] > 0, neta[0] / ingreso[0] * 100, np.nan)
+    return escenarios.assign(**{"Ingreso": ingreso[0], "Utilidad Neta": neta[0], "% Utilidad Neta": pct})
+
+
+def analizar_portafolio(rutas, valores, n_escenarios=N_ESCENARIOS, volatilidad=None,
+                        correlacion=CORRELACION_DIESEL_TC, umbral=UMBRAL_UTILIDAD_NETA, semilla=0):
+    # (por ruta, por cliente, escenarios con el resultado del portafolio completo)
+    escenarios = muestrear_escenarios(valores, n_escenarios, volatilidad, correlacion, semilla)
+    coef = coeficientes(rutas, valores)
+    columnas = [c for c in ["Tipo", "Cliente", "Ruta"] if c in rutas.columns]
+    por_ruta = rutas[columnas].join(simular(coef, escenarios, umbral))
+    por_cliente = simular(coef.groupby(rutas["Cliente"]).sum(), escenarios, umbral)
+    portafolio = distribucion(coef.sum(), escenarios)
+    return por_ruta, por_cliente.reset_index(), portafolio
@@ -0,0 +1,250 @@
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from picus.busqueda import buscar_rutas
+from picus.constantes import RUTA_DATOS
+from picus.costos import version_parametros
+from picus.cotizador import agregar_regreso, cotizar_carriles
+from picus.importacion import validar_columnas
+from picus.metricas import Latencias
+from picus.parametros import datos_generales_vigentes
+from picus.ranking import obtener_ranking
+from picus.repositorio import rutas_rc, version_rutas
+
+# ============================
+# Servicio HTTP de cotización (local, solo biblioteca estándar)
+# ============================
+# Endpoints (JSON):
+#   POST /cotizar   {"carriles": [{...}, ...]}  o un solo carril {...}
+#   POST /vuelta    igual que /cotizar, agrega el mejor regreso del catálogo
+#   GET  /rutas?q=texto&tipo=IMPO&limite=20
+#   GET  /metricas  latencias p50/p95/p99 por endpoint
+#   GET  /salud
+# El catálogo y los Datos Generales se toman de los cachés del proceso, que
+# se recargan solos cuando cambia el archivo en disco. Un lote se cotiza en
+# una sola pasada vectorizada, y las solicitudes que llegan al mismo tiempo
+# se juntan en un solo lote (el costo fijo de pandas se paga una vez).
+# Las cotizaciones de un solo carril se recuerdan mientras no cambien los
+# parámetros ni el catálogo: un carril repetido no vuelve a cotizarse.
+
+PUERTO = 8765
+MAX_CARRILES_LOTE = 5000
+MAX_MEMORIA = 10000
+COLUMNAS_RUTA_API = ["Tipo", "Cliente", "Origen", "Destino", "KM",
+                     "Ingreso Total", "Costo_Total_Ruta", "Utilidad", "% Utilidad"]
+
+
+def _registros(df):
+    # NaN → null para que el JSON sea válido
+    return [{k: (None if v != v else v) for k, v in fila.items()} for fila in df.to_dict("records")]
+
+
+def _carriles(cuerpo):
+    if isinstance(cuerpo, dict) and "carriles" in cuerpo:
+        cuerpo = cuerpo["carriles"]
+    if isinstance(cuerpo, dict):
+        cuerpo = [cuerpo]
+    if not isinstance(cuerpo, list) or not cuerpo or not all(isinstance(c, dict) for c in cuerpo):
+        raise ValueError("Se esperaba un carril o una lista 'carriles'")
+    return cuerpo
+
+
+class LoteCotizacion:
+    # Un hilo cotizador: toma todo lo pendiente en la cola, lo cotiza con una
+    # sola llamada y reparte a cada solicitud sus filas
+    def __init__(self, ruta_datos=RUTA_DATOS, max_carriles=MAX_CARRILES_LOTE):
+        self.ruta_datos = ruta_datos
+        self.max_carriles = max_carriles
+        self._cola = queue.Queue()
+        self._hilo = threading.Thread(target=self._trabajar, name="picus-cotizador", daemon=True)
+        self._hilo.start()
+        self.solicitudes = 0
+        self.lotes = 0
+
+    def cotizar(self, carriles, con_regreso=False):
+        # Las columnas se revisan antes de juntar la solicitud con otras: si le
+        # falta una, el error es solo suyo
+        carriles = validar_columnas(carriles)
+        futuro = Future()
+        self._cola.put((carriles.reset_index(drop=True), con_regreso, futuro))
+        return futuro.result()
+
+    def _trabajar(self):
+        while True:
+            lote = [self._cola.get()]
+            filas = len(lote[0][0])
+            while filas < self.max_carriles:
+                try:
+                    lote.append(self._cola.get_nowait())
+                except queue.Empty:
+                    break
+                filas += len(lote[-1][0])
+            self._atender(lote)
+
+    def _atender(self, lote):
+        try:
+            self._procesar(lote)
+        except BaseException as e:
+            if len(lote) == 1:
+                if not lote[0][2].done():
+                    lote[0][2].set_exception(e)
+                return
+            # Se repite solicitud por solicitud para que la excepción llegue
+            # solo a la que la provocó
+            for solicitud in lote:
+                if not solicitud[2].done():
+                    self._atender([solicitud])
+
+    def _procesar(self, lote):
+        inicios = np.cumsum([0] + [len(c) for c, _, _ in lote])
+        carriles = pd.concat([c for c, _, _ in lote], ignore_index=True)
+        resultado, errores = cotizar_carriles(carriles, datos_generales_vigentes(self.ruta_datos))
+        if any(con_regreso for _, con_regreso, _ in lote):
+            con_vuelta = agregar_regreso(resultado, obtener_ranking())
+        self.solicitudes += len(lote)
+        self.lotes += 1
+
+        # Fila de error global (índice + 2) → fila dentro de cada solicitud
+        posicion_error = errores["Fila"].to_numpy() - 2
+        for (c, con_regreso, futuro), inicio, fin in zip(lote, inicios[:-1], inicios[1:]):
+            propio = con_vuelta if con_regreso else resultado
+            filas = propio[(propio.index >= inicio) & (propio.index < fin)]
+            en_rango = (posicion_error >= inicio) & (posicion_error < fin)
+            errores_propios = errores[en_rango].assign(Fila=errores["Fila"][en_rango] - inicio)
+            futuro.set_result((filas, errores_propios))
+
+
+class ServicioCotizacion:
+    def __init__(self, ruta_datos=RUTA_DATOS):
+        self.ruta_datos = ruta_datos
+        self.latencias = Latencias()
+        self.lotes = LoteCotizacion(ruta_datos)
+        self._memoria = OrderedDict()
+        self._memoria_lock = threading.Lock()
+        self.inicio = time.time()
+
+    def _vigencia(self, con_regreso):
+        vigencia = version_parametros(datos_generales_vigentes(self.ruta_datos))
+        return (vigencia, version_rutas()) if con_regreso else vigencia
+
+    def cotizar(self, cuerpo, con_regreso=False):
+        carriles = _carriles(cuerpo)
+        clave = None
+        if len(carriles) == 1:
+            clave = (json.dumps(carriles[0], sort_keys=True), con_regreso)
+            vigencia = self._vigencia(con_regreso)
+            with self._memoria_lock:
+                guardada = self._memoria.get(clave)
+                if guardada is not None and guardada[0] == vigencia:
+                    self._memoria.move_to_end(clave)
+                    return guardada[1]
+
+        resultado, errores = self.lotes.cotizar(pd.DataFrame(carriles), con_regreso)
+        respuesta = {"cotizaciones": _registros(resultado), "errores": _registros(errores)}
+        if clave is not None:
+            with self._memoria_lock:
+                self._memoria[clave] = (vigencia, respuesta)
+                while len(self._memoria) > MAX_MEMORIA:
+                    self._memoria.popitem(last=False)
+        return respuesta
+
+    def rutas(self, consulta):
+        texto = consulta.get("q", [""])[0]
+        tipos = consulta.get("tipo") or None
+        limite = int(consulta.get("limite", ["20"])[0])
+        indices, total = buscar_rutas(texto, tipos=tipos, limite=limite)
+        rutas = rutas_rc()
+        filas = rutas.loc[indices, [c for c in COLUMNAS_RUTA_API if c in rutas.columns]] if len(indices) else pd.DataFrame()
+        filas = filas.reset_index(names="indice") if not filas.empty else filas
+        return {"total": int(total), "rutas": _registros(filas)}
+
+    def salud(self):
+        rutas = rutas_rc()
+        return {
+            "estado": "ok",
+            "rutas": 0 if rutas is None else len(rutas),
+            "version_rutas": str(version_rutas()),
+            "segundos_activo": round(time.time() - self.inicio, 1),
+        }
+
+    def atender(self, metodo, ruta, consulta, cuerpo):
+        # Devuelve (código HTTP, respuesta)
+        if metodo == "POST" and ruta == "/cotizar":
+            return 200, self.cotizar(cuerpo)
+        if metodo == "POST" and ruta == "/vuelta":
+            return 200, self.cotizar(cuerpo, con_regreso=True)
+        if metodo == "GET" and ruta == "/rutas":
+            return 200, self.rutas(consulta)
+        if metodo == "GET" and ruta == "/metricas":
+            return 200, {
+                "latencias": self.latencias.resumen(),
+                "lotes": {"solicitudes": self.lotes.solicitudes, "lotes": self.lotes.lotes},
+            }
+        if metodo == "GET" and ruta == "/salud":
+            return 200, self.salud()
+        return 404, {"error": f"No existe {metodo} {ruta}"}
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    servicio = None
+    protocol_version = "HTTP/1.1"
+
+    def _responder(self, metodo):
+        inicio = time.perf_counter()
+        url = urlparse(self.path)
+        try:
+            cuerpo = None
+            largo = int(self.headers.get("Content-Length") or 0)
+            if largo:
+                cuerpo = json.loads(self.rfile.read(largo))
+            codigo, respuesta = self.servicio.atender(metodo, url.path, parse_qs(url.query), cuerpo)
+        except (ValueError, KeyError) as e:
+            codigo, respuesta = 400, {"error": str(e)}
+        except Exception as e:
+            codigo, respuesta = 500, {"error": f"{type(e).__name__}: {e}"}
+
+        datos = json.dumps(respuesta, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+        if url.path != "/metricas":
+            self.servicio.latencias.registrar(f"{metodo} {url.path}", (time.perf_counter() - inicio) * 1000)
+
+    def do_GET(self):
+        self._responder("GET")
+
+    def do_POST(self):
+        self._responder("POST")
+
+    def log_message(self, formato, *args):
+        pass
+
+
+def crear_servidor(host="127.0.0.1", puerto=PUERTO, ruta_datos=RUTA_DATOS):
+    servicio = ServicioCotizacion(ruta_datos)
+    manejador = type("Manejador", (_Manejador,), {"servicio": servicio})
+    servidor = ThreadingHTTPServer((host, puerto), manejador)
+    servidor.daemon_threads = True
+    return servidor
+
+
+def servir(host="127.0.0.1", puerto=PUERTO, ruta_datos=RUTA_DATOS):
+    servidor = crear_servidor(host, puerto, ruta_datos)
+    # Se cargan catálogo, índice de búsqueda y ranking antes de aceptar solicitudes
+    buscar_rutas("")
+    obtener_ranking()
+    try:
+        servidor.serve_forever()
+    finally:
+        servidor.server_close()
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+from picus.almacenamiento import obtener_almacen
+from picus.costos import COLUMNAS_COSTEADAS, aplicar_costos, totalizar
+from picus.escritura import en_serie
+from picus.parametros import historial_vigente, parametros_por_fecha
+from picus.rentabilidad import rentabilidad
+
+# ============================
+# Tramos programados por clave (ID_Programacion, Tramo)
+# ============================
+# Lectura y edición de un solo tramo sin cargar ni recorrer todo el
+# historial; cada motor persiste únicamente el registro modificado (en CSV,
+# que no permite escribir por fila, se reescribe el archivo una vez).
+
+
+def obtener_tramo(id_programacion, tramo="IDA"):
+    return obtener_almacen().leer_tramo(id_programacion, tramo)
+
+
+def actualizar_tramo(id_programacion, tramo, cambios):
+    obtener_almacen().actualizar_tramo(id_programacion, tramo, cambios)
+
+
+def actualizar_tramos(cambios):
+    # Lote de cambios (ID_Programacion, Tramo y columnas) con una sola escritura
+    obtener_almacen().actualizar_tramos(cambios)
+
+
+def parchar_tramo(id_programacion, tramo, cambios):
+    # Combina los cambios con el tramo actual y recalcula extras y costo total una vez
+    actual = obtener_tramo(id_programacion, tramo)
+    if actual is None:
+        raise KeyError(f"No existe el tramo {tramo} de {id_programacion}")
+    fila = actual.copy()
+    for col, val in cambios.items():
+        fila[col] = val
+    totales = totalizar(pd.DataFrame([fila]))
+    cambios = dict(cambios)
+    cambios["Costo_Extras"] = float(totales["Costo_Extras"].iloc[0])
+    cambios["Costo_Total_Ruta"] = float(totales["Costo_Total_Ruta"].iloc[0])
+    actualizar_tramo(id_programacion, tramo, cambios)
+    return cambios
+
+
+def resumen_traficos(tramos):
+    # Un renglón por tráfico: ingreso y costo de todos sus tramos y su rentabilidad
+    tramos = tramos.assign(Fecha=pd.to_datetime(tramos["Fecha"]))
+    resumen = tramos.groupby(["ID_Programacion", "Número_Trafico", "Fecha"]).agg({
+        "Ingreso Total": "sum",
+        "Costo_Total_Ruta": "sum"
+    }).reset_index()
+
+    margen = rentabilidad(resumen["Ingreso Total"], resumen["Costo_Total_Ruta"])
+    margen["Costos Indirectos"] = margen["Costos Indirectos"].round(2)
+    return pd.concat([resumen, margen.rename(columns={"Costos Indirectos": "Costos Indirectos (35%)"})], axis=1)
+
+
+# ============================
+# Recosteo con los Datos Generales de cada fecha
+# ============================
+# Cada tramo se vuelve a costear con el renglón del historial vigente en su
+# Fecha (parametros_por_fecha hace un solo merge_asof) y el motor de costos
+# trabaja con un parámetro por fila, así que un año de tráficos es una sola
+# pasada vectorizada. Al aplicar solo se reescriben los tramos que cambian.
+
+TOLERANCIA_RECOSTEO = 0.005
+
+
+def costear_por_fecha(tramos, historial=None):
+    historial = historial_vigente() if historial is None else historial
+    return aplicar_costos(tramos, parametros_por_fecha(tramos["Fecha"], historial))
+
+
+def tramos_con_cambios(tramos, costeados, tolerancia=TOLERANCIA_RECOSTEO):
+    # Máscara de tramos cuyo costo, ingreso o versión de parámetros cambia (más de medio centavo)
+    numericas = [c for c in COLUMNAS_COSTEADAS if c != "Version_Parametros"]
+    antes = tramos.reindex(columns=numericas).apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    despues = costeados[numericas].to_numpy(dtype=float)
+    distinto = ~np.isclose(antes, despues, rtol=0, atol=tolerancia)
+    version = tramos.reindex(columns=["Version_Parametros"])["Version_Parametros"].astype(object).to_numpy()
+    return distinto.any(axis=1) | (version != costeados["Version_Parametros"].to_numpy(dtype=object))
+
+
+def comparar_recosteo(tramos, costeados):
+    # Un renglón por tráfico: ingreso, costo y utilidad guardados contra los de su fecha
+    llaves = ["ID_Programacion", "Número_Trafico", "Fecha"]
+    montos = ["Ingreso Total", "Costo_Total_Ruta"]
+    guardado = tramos[llaves].assign(**{c: pd.to_numeric(tramos[c], errors="coerce") for c in montos})
+    guardado = guardado.groupby(llaves, dropna=False, observed=True)[montos].sum()
+    vigente = costeados[llaves + montos].groupby(llaves, dropna=False, observed=True)[montos].sum()
+    comparacion = pd.DataFrame({
+        "Ingreso Guardado": guardado["Ingreso Total"],
+        "Ingreso Vigente": vigente["Ingreso Total"],
+        "Costo Guardado": guardado["Costo_Total_Ruta"],
+        "Costo Vigente": vigente["Costo_Total_Ruta"],
+    })
+    comparacion["Diferencia Utilidad"] = ((comparacion["Ingreso Vigente"] - comparacion["Costo Vigente"])
+                                          - (comparacion["Ingreso Guardado"] - comparacion["Costo Guardado"]))
+    return comparacion.round(2).reset_index()
+
+
+def recostear_viajes(desde=None, hasta=None):
+    # Lectura, recálculo y escritura van juntas en el hilo escritor para no pisar altas concurrentes
+    return en_serie(_recostear_viajes, desde, hasta)
+
+
+def _recostear_viajes(desde, hasta):
+    tramos = obtener_almacen().leer_viajes(desde=desde, hasta=hasta)
+    if tramos is None or tramos.empty:
+        return 0
+    costeados = costear_por_fecha(tramos)
+    cambios = tramos_con_cambios(tramos, costeados)
+    if cambios.any():
+        # Se mandan todos los tramos de cada tráfico tocado: así los tramos
+        # repetidos (dos VUELTA) se emparejan por orden con los guardados
+        tocados = costeados["ID_Programacion"].isin(costeados.loc[cambios, "ID_Programacion"]).to_numpy()
+        actualizar_tramos(costeados.loc[tocados, ["ID_Programacion", "Tramo"] + COLUMNAS_COSTEADAS])
+    return int(cambios.sum())
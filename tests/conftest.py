@@ -0,0 +1,31 @@
+import pandas as pd
+import pytest
+
+# ============================
+# Datos y entorno comunes de las pruebas
+# ============================
+# Las rutas de archivo de picus son relativas a la carpeta de trabajo: cada
+# prueba corre en su propia carpeta temporal.
+
+
+@pytest.fixture(autouse=True)
+def carpeta(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def ruta(tipo, origen, destino, ingreso, costo, cliente="CLIENTE", km=100.0, fecha="2025-01-15"):
+    return {"Fecha": fecha, "Tipo": tipo, "Cliente": cliente, "Origen": origen, "Destino": destino,
+            "KM": km, "Ingreso Total": ingreso, "Costo_Total_Ruta": costo}
+
+
+@pytest.fixture
+def catalogo():
+    # IMPO a Laredo con dos regresos EXPO posibles y un VACIO hacia otra planta
+    return pd.DataFrame([
+        ruta("IMPO", "MONTERREY", "LAREDO", 10000, 6000, cliente="A"),
+        ruta("EXPO", "LAREDO", "MONTERREY", 9000, 6000, cliente="B"),
+        ruta("EXPO", "LAREDO", "SALTILLO", 8000, 7000, cliente="C"),
+        ruta("VACIO", "LAREDO", "NUEVO LAREDO", 0, 500, cliente="D", km=10.0),
+        ruta("EXPO", "NUEVO LAREDO", "MONTERREY", 12000, 6000, cliente="E"),
+    ])
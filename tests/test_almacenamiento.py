@@ -0,0 +1,120 @@
+import pandas as pd
+import pytest
+
+from picus.almacenamiento import (COLUMNAS_IDENTIDAD_RUTA, AlmacenCSV, AlmacenParquet, AlmacenSQLite, crear_almacen,
+                                  migrar)
+from picus.indice_viajes import CONCLUIDO, PENDIENTE
+from tests.conftest import ruta
+
+MOTORES = {
+    "csv": lambda d: AlmacenCSV(str(d / "rutas.csv"), str(d / "viajes.csv"), str(d / "indice_viajes.csv")),
+    "sqlite": lambda d: AlmacenSQLite(str(d / "picus.db")),
+    "parquet": lambda d: AlmacenParquet(str(d / "rutas.csv"), str(d / "viajes_mes")),
+}
+
+
+@pytest.fixture(params=sorted(MOTORES))
+def almacen(request, carpeta):
+    return MOTORES[request.param](carpeta)
+
+
+def _viajes():
+    filas = []
+    for i, fecha in enumerate(["2025-01-20", "2025-02-03", "2025-02-10"]):
+        ida = dict(ruta("IMPO", "MONTERREY", "LAREDO", 10000, 6000, fecha=fecha),
+                   ID_Programacion=f"T{i}_{fecha}", Número_Trafico=f"T{i}", Unidad=f"U{i}", Operador="OP",
+                   Tramo="IDA")
+        filas.append(ida)
+    # El primero ya cerró con un regreso
+    filas.append(dict(filas[0], Tipo="EXPO", Origen="LAREDO", Destino="MONTERREY", Tramo="VUELTA"))
+    return pd.DataFrame(filas)
+
+
+def _iguales(leido, esperado):
+    leido = leido.reset_index(drop=True)[list(esperado.columns)]
+    pd.testing.assert_frame_equal(leido, esperado.reset_index(drop=True), check_dtype=False, check_index_type=False)
+
+
+def test_rutas_se_guardan_y_leen_igual(almacen, catalogo):
+    assert not almacen.existe_rutas()
+    almacen.guardar_rutas(catalogo)
+    _iguales(almacen.leer_rutas(), catalogo)
+
+    almacen.agregar_rutas(catalogo.head(2).assign(Cliente="NUEVO"))
+    leidas = almacen.leer_rutas()
+    assert len(leidas) == len(catalogo) + 2
+    assert leidas["Cliente"].tolist()[-2:] == ["NUEVO", "NUEVO"]
+    assert len(almacen.buscar_rutas(Tipo="EXPO")) == 4
+
+
+def test_editar_y_eliminar_rutas(almacen, catalogo):
+    almacen.guardar_rutas(catalogo)
+    vista = almacen.leer_rutas()
+    almacen.actualizar_ruta(vista.index[1], {"KM": 250.5, "Cliente": "OTRO"},
+                            vista.loc[vista.index[1], COLUMNAS_IDENTIDAD_RUTA])
+    almacen.eliminar_rutas([vista.index[0]], vista.loc[[vista.index[0]], COLUMNAS_IDENTIDAD_RUTA])
+
+    leidas = almacen.leer_rutas()
+    assert len(leidas) == len(catalogo) - 1
+    editada = leidas[leidas["Cliente"] == "OTRO"]
+    assert editada["KM"].tolist() == [250.5]
+    # La vista vieja ya no corresponde: la escritura se rechaza sin tocar nada
+    with pytest.raises(ValueError):
+        almacen.eliminar_rutas([vista.index[0]], vista.loc[[vista.index[0]], COLUMNAS_IDENTIDAD_RUTA])
+    assert len(almacen.leer_rutas()) == len(catalogo) - 1
+
+
+def test_viajes_por_rango_e_indice(almacen):
+    viajes = _viajes()
+    almacen.guardar_viajes(viajes)
+    _iguales(almacen.leer_viajes().sort_values(["ID_Programacion", "Tramo"]),
+             viajes.sort_values(["ID_Programacion", "Tramo"]))
+
+    febrero = almacen.leer_viajes(desde="2025-02-01", hasta="2025-02-28", columnas=["ID_Programacion", "Unidad"])
+    assert sorted(febrero["ID_Programacion"]) == ["T1_2025-02-03", "T2_2025-02-10"]
+    assert set(febrero.columns) >= {"ID_Programacion", "Unidad"}
+
+    estados = almacen.indice_viajes().set_index("ID_Programacion")["Estado"]
+    assert estados.to_dict() == {"T0_2025-01-20": CONCLUIDO, "T1_2025-02-03": PENDIENTE,
+                                 "T2_2025-02-10": PENDIENTE}
+
+
+def test_altas_y_cambios_de_tramos_mantienen_el_indice(almacen):
+    viajes = _viajes()
+    almacen.guardar_viajes(viajes.head(3))
+    almacen.agregar_viajes(viajes.tail(1))
+    assert almacen.indice_viajes().set_index("ID_Programacion").loc["T0_2025-01-20", "Estado"] == CONCLUIDO
+
+    almacen.actualizar_tramos(pd.DataFrame({"ID_Programacion": ["T1_2025-02-03", "T2_2025-02-10"],
+                                            "Tramo": ["IDA", "IDA"], "Unidad": ["U9", "U8"], "Stop": [150.0, 0.0]}))
+    tramos = almacen.leer_programaciones(["T1_2025-02-03", "T2_2025-02-10"]).set_index("ID_Programacion")
+    assert tramos["Unidad"].to_dict() == {"T1_2025-02-03": "U9", "T2_2025-02-10": "U8"}
+    assert tramos.loc["T1_2025-02-03", "Stop"] == 150.0
+    assert almacen.indice_viajes().set_index("ID_Programacion").loc["T1_2025-02-03", "Unidad"] == "U9"
+
+    with pytest.raises(KeyError):
+        almacen.actualizar_tramo("NO_EXISTE", "IDA", {"Unidad": "U1"})
+
+
+@pytest.mark.parametrize("origen,destino", [("csv", "sqlite"), ("sqlite", "parquet"), ("parquet", "csv")])
+def test_migrar_entre_motores(carpeta, catalogo, origen, destino):
+    # Cada motor en su carpeta: csv y parquet usan el mismo nombre para las rutas
+    (carpeta / "origen").mkdir()
+    (carpeta / "destino").mkdir()
+    fuente = MOTORES[origen](carpeta / "origen")
+    fuente.guardar_rutas(catalogo)
+    fuente.guardar_viajes(_viajes())
+
+    copia = MOTORES[destino](carpeta / "destino")
+    assert migrar(fuente, copia) == (len(catalogo), 4)
+    _iguales(copia.leer_rutas(), catalogo)
+    _iguales(copia.leer_viajes().sort_values(["ID_Programacion", "Tramo"]),
+             _viajes().sort_values(["ID_Programacion", "Tramo"]))
+    assert (copia.indice_viajes()["Estado"] == CONCLUIDO).sum() == 1
+
+
+def test_crear_almacen_por_nombre(monkeypatch):
+    assert isinstance(crear_almacen("sqlite"), AlmacenSQLite)
+    assert isinstance(crear_almacen("parquet"), AlmacenParquet)
+    monkeypatch.setenv("PICUS_ALMACEN", "csv")
+    assert type(crear_almacen()) is AlmacenCSV
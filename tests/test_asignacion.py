@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from picus.asignacion import KM_DESCONOCIDO, asignar, flota_disponible, km_vacio, resolver_asignacion
+from picus.ranking import obtener_ranking
+from tests.conftest import ruta
+
+VALORES = {"Costo Diesel": 24.0, "Rendimiento Camion": 2.0}
+
+
+def _idas():
+    return pd.DataFrame([
+        dict(ruta("IMPO", "MONTERREY", "LAREDO", 10000, 6000), ID_Programacion="T1"),
+        dict(ruta("IMPO", "SALTILLO", "LAREDO", 10000, 6000), ID_Programacion="T2"),
+    ])
+
+
+def test_km_vacio_encadena_rutas_sin_directa():
+    rutas = pd.DataFrame([
+        ruta("EXPO", "LAREDO", "MONTERREY", 0, 0, km=230.0),
+        ruta("VACIO", "MONTERREY", "SALTILLO", 0, 0, km=85.0),
+    ])
+    km = km_vacio(rutas, ["LAREDO", "SALTILLO"], ["SALTILLO", "MONTERREY", "LAREDO"])
+    assert km[0].tolist() == [315.0, 230.0, 0.0]
+    assert np.isnan(km[1, 1]) and np.isnan(km[1, 2])
+
+
+def test_asigna_la_unidad_mas_cercana():
+    rutas = pd.DataFrame([ruta("VACIO", "SALTILLO", "MONTERREY", 0, 0, km=85.0)])
+    flota = pd.DataFrame({"Unidad": ["U1", "U2"], "Operador": ["A", "B"], "Ubicación": ["SALTILLO", "MONTERREY"]})
+    asignaciones, sin_unidad, libres = asignar(_idas(), flota, rutas, VALORES, None)
+    por_trafico = asignaciones.set_index("ID_Programacion")
+    assert por_trafico.loc["T1", "Unidad"] == "U2" and por_trafico.loc["T2", "Unidad"] == "U1"
+    assert sin_unidad.empty and libres.empty
+
+
+def test_sin_ranking_cuenta_solo_la_ida():
+    # Tráficos programados antes de vaciar el catálogo: obtener_ranking() da None
+    flota = pd.DataFrame({"Unidad": ["U1"], "Operador": ["A"], "Ubicación": ["LEON"]})
+    asignaciones, sin_unidad, _ = asignar(_idas(), flota, pd.DataFrame(columns=["Origen", "Destino", "KM"]),
+                                          VALORES, None)
+    assert len(asignaciones) == 1 and len(sin_unidad) == 1
+    assert asignaciones.loc[0, "Utilidad Vuelta"] == 4000
+    assert asignaciones.loc[0, "Regreso Sugerido"] is None
+    assert asignaciones.loc[0, "Vacío Estimado"] and asignaciones.loc[0, "KM Vacío"] == KM_DESCONOCIDO
+
+
+def test_con_ranking_suma_el_mejor_cierre(catalogo):
+    flota = pd.DataFrame({"Unidad": ["U1"], "Operador": ["A"], "Ubicación": ["MONTERREY"]})
+    asignaciones, _, _ = asignar(_idas().head(1), flota, catalogo, VALORES, obtener_ranking(catalogo))
+    assert asignaciones.loc[0, "KM Vacío"] == 0
+    assert asignaciones.loc[0, "Utilidad Vuelta"] > 4000
+
+
+def test_resolver_asignacion_rectangular():
+    costo = np.array([[4.0, 1.0, 3.0], [2.0, 0.0, 5.0]])
+    filas, columnas = resolver_asignacion(costo)
+    assert costo[filas, columnas].sum() == 3.0
+
+
+def test_flota_descarta_unidades_ocupadas_ese_dia():
+    historial = pd.DataFrame({
+        "ID_Programacion": ["A", "B", "C"], "Fecha": ["2025-01-10", "2025-01-11", "2025-01-15"],
+        "Tramo": ["IDA"] * 3, "Unidad": ["U1", "U2", "U2"], "Operador": ["X", "Y", "Y"],
+        "Destino": ["LAREDO", "SALTILLO", "LEON"],
+    })
+    disponibles, ocupadas = flota_disponible(historial, "2025-01-15")
+    assert disponibles["Unidad"].tolist() == ["U1"]
+    assert ocupadas["Unidad"].tolist() == ["U2"]
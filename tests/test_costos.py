@@ -0,0 +1,77 @@
+import pandas as pd
+import pytest
+
+from picus.costos import COLUMNAS_COSTEADAS, aplicar_costos, calcular_ruta, repreciar, version_parametros
+from picus.parametros import VALORES_DEFAULT, VIGENCIA, cargar_historial
+from picus.viajes import costear_por_fecha
+
+CAPTURA = [
+    {"Tipo": "IMPO", "Cliente": "A", "Origen": "MONTERREY", "Destino": "LAREDO", "KM": 230.0,
+     "Moneda": "USD", "Ingreso_Original": 800.0, "Moneda_Cruce": "USD", "Cruce_Original": 100.0,
+     "Moneda Costo Cruce": "MXN", "Costo Cruce": 900.0, "Casetas": 650.0, "Stop": 200.0},
+    {"Tipo": "EXPO", "Cliente": "B", "Origen": "LAREDO", "Destino": "SALTILLO", "KM": 310.0,
+     "Moneda": "MXN", "Ingreso_Original": 18000.0, "Moneda_Cruce": "MXN", "Cruce_Original": 0.0,
+     "Moneda Costo Cruce": "USD", "Costo Cruce": 50.0, "Casetas": 0.0, "Pension": 120.0},
+    {"Tipo": "VACIO", "Cliente": "C", "Origen": "SALTILLO", "Destino": "MONTERREY", "KM": 85.0,
+     "Moneda": "MXN", "Ingreso_Original": 0.0, "Moneda_Cruce": "MXN", "Cruce_Original": 0.0,
+     "Moneda Costo Cruce": "MXN", "Costo Cruce": 0.0, "Casetas": 120.0},
+]
+
+
+def _nuevos(**cambios):
+    return {**VALORES_DEFAULT, **cambios}
+
+
+def test_ruta_individual_a_mano():
+    ruta = calcular_ruta(CAPTURA[0], VALORES_DEFAULT)
+    assert ruta["Ingreso Total"] == pytest.approx((800 + 100) * 17.5)
+    assert ruta["Costo_Diesel_Camion"] == pytest.approx(230 / 2.5 * 24)
+    assert ruta["Costo_Extras"] == pytest.approx(200)
+    assert ruta["Costo_Total_Ruta"] == pytest.approx(230 / 2.5 * 24 + 300 + 185.06 + 650 + 200 + 900)
+    assert ruta["Version_Parametros"] == version_parametros(VALORES_DEFAULT)
+
+
+@pytest.mark.parametrize("anteriores", [None, VALORES_DEFAULT])
+def test_repreciar_coincide_con_la_ruta_individual(anteriores):
+    catalogo = aplicar_costos(pd.DataFrame(CAPTURA), VALORES_DEFAULT)
+    valores = _nuevos(**{"Costo Diesel": 26.5, "Tipo de cambio USD": 18.2})
+
+    repreciado, cambiadas = repreciar(catalogo, valores, anteriores)
+
+    assert cambiadas == len(CAPTURA)
+    for i, registro in enumerate(CAPTURA):
+        esperado = calcular_ruta(registro, valores)
+        for col in COLUMNAS_COSTEADAS:
+            if col == "Version_Parametros":
+                assert repreciado.loc[i, col] == esperado[col]
+            else:
+                assert repreciado.loc[i, col] == pytest.approx(esperado[col]), col
+
+
+def test_repreciar_solo_toca_versiones_distintas():
+    catalogo = aplicar_costos(pd.DataFrame(CAPTURA), VALORES_DEFAULT)
+    mismo, cambiadas = repreciar(catalogo, VALORES_DEFAULT)
+    assert cambiadas == 0 and mismo is catalogo
+
+    # Una fila costeada con otros parámetros se pone al día; las demás quedan igual
+    mezcla = pd.concat([catalogo.head(2), aplicar_costos(pd.DataFrame(CAPTURA[2:]), _nuevos(**{"Costo Diesel": 30.0}))],
+                       ignore_index=True)
+    repreciado, cambiadas = repreciar(mezcla, VALORES_DEFAULT)
+    assert cambiadas == 1
+    pd.testing.assert_frame_equal(repreciado[COLUMNAS_COSTEADAS], catalogo[COLUMNAS_COSTEADAS], check_dtype=False)
+
+
+def test_costeo_por_fecha_usa_los_parametros_vigentes():
+    # Cada tramo se costea con los Datos Generales vigentes en su fecha
+    pd.DataFrame([
+        {VIGENCIA: "2025-01-01", **_nuevos()},
+        {VIGENCIA: "2025-03-01", **_nuevos(**{"Costo Diesel": 30.0})},
+    ]).to_csv("historial.csv", index=False)
+    tramos = pd.DataFrame(CAPTURA[:2]).assign(Fecha=["2025-02-15", "2025-03-01"])
+
+    costeados = costear_por_fecha(tramos, cargar_historial("historial.csv"))
+
+    for i, valores in enumerate([_nuevos(), _nuevos(**{"Costo Diesel": 30.0})]):
+        esperado = calcular_ruta(CAPTURA[i], valores)
+        assert costeados.loc[i, "Costo_Total_Ruta"] == pytest.approx(esperado["Costo_Total_Ruta"])
+        assert costeados.loc[i, "Version_Parametros"] == esperado["Version_Parametros"]
@@ -0,0 +1,83 @@
+import threading
+from concurrent.futures import Future
+
+import pandas as pd
+import pytest
+
+from picus.escritura import ColaEscritura, bloqueo, reemplazar_atomico
+
+
+def _anexo(clave, funcion, df):
+    return (clave, funcion, (), {}, df, Future())
+
+
+def test_anexos_consecutivos_se_escriben_juntos():
+    cola = ColaEscritura()
+    llamadas = []
+    lote = [_anexo("viajes", llamadas.append, pd.DataFrame({"x": [i]})) for i in range(3)]
+    lote.append(("otro", lambda df: llamadas.append(df), (), {}, pd.DataFrame({"x": [9]}), Future()))
+
+    cola._procesar(lote)
+
+    assert [df["x"].tolist() for df in llamadas] == [[0, 1, 2], [9]]
+    assert cola.operaciones == 4 and cola.flushes == 2
+    assert all(g[5].exception() is None for g in lote)
+
+
+def test_un_anexo_invalido_no_hace_fallar_a_los_demas():
+    cola = ColaEscritura()
+    escritos = []
+
+    def agregar(df):
+        if (df["x"] < 0).any():
+            raise ValueError("valor negativo")
+        escritos.extend(df["x"])
+
+    lote = [_anexo("viajes", agregar, pd.DataFrame({"x": [x]})) for x in (1, -1, 2)]
+    cola._procesar(lote)
+
+    assert escritos == [1, 2]
+    assert lote[0][5].exception() is None and lote[2][5].exception() is None
+    assert isinstance(lote[1][5].exception(), ValueError)
+
+
+def test_hilo_escritor_escribe_todo_y_devuelve_errores():
+    cola = ColaEscritura()
+    escritos = []
+
+    def agregar(df):
+        escritos.extend(df["x"])
+
+    hilos = [threading.Thread(target=cola.anexar, args=("t", agregar, pd.DataFrame({"x": [i]})))
+             for i in range(20)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert sorted(escritos) == list(range(20))
+
+    def falla():
+        raise KeyError("no existe")
+
+    with pytest.raises(KeyError):
+        cola.ejecutar(falla)
+    assert cola.ejecutar(lambda a, b: a + b, 2, b=3) == 5
+
+
+def test_reemplazo_atomico_no_deja_temporales(carpeta):
+    reemplazar_atomico("datos.csv", lambda temporal: pd.DataFrame({"x": [1]}).to_csv(temporal, index=False))
+
+    def a_medias(temporal):
+        open(temporal, "w").close()
+        raise RuntimeError("disco lleno")
+
+    with pytest.raises(RuntimeError):
+        reemplazar_atomico("datos.csv", a_medias)
+    assert pd.read_csv("datos.csv")["x"].tolist() == [1]
+    assert sorted(p.name for p in carpeta.iterdir()) == ["datos.csv"]
+
+
+def test_bloqueo_es_reentrante():
+    with bloqueo("datos.csv"):
+        with bloqueo("datos.csv"):
+            pass
@@ -0,0 +1,99 @@
+import json
+import os
+import zipfile
+
+import pandas as pd
+import pytest
+
+from picus.constantes import RUTA_DATOS, RUTA_PROG, RUTA_RESPALDOS, RUTA_RUTAS
+from picus.respaldos import MANIFIESTO, crear_respaldo, leer_manifiesto, restaurar_respaldo
+from tests.conftest import ruta
+
+
+def _leer(nombre):
+    with open(nombre, "rb") as archivo:
+        return archivo.read()
+
+
+def _tramo(i):
+    return dict(ruta("IMPO", "MONTERREY", "LAREDO", 10000, 6000),
+                ID_Programacion=f"T{i}_2025-01-15", Número_Trafico=f"T{i}", Tramo="IDA")
+
+
+@pytest.fixture
+def datos(catalogo):
+    catalogo.to_csv(RUTA_RUTAS, index=False)
+    pd.DataFrame([_tramo(1), _tramo(2)]).to_csv(RUTA_PROG, index=False)
+    pd.DataFrame({"Parametro": ["Costo Diesel"], "Valor": [24.0]}).to_csv(RUTA_DATOS, index=False)
+    return {nombre: _leer(nombre) for nombre in (RUTA_RUTAS, RUTA_PROG, RUTA_DATOS)}
+
+
+def _anexar_tramo(i):
+    pd.DataFrame([_tramo(i)]).to_csv(RUTA_PROG, mode="a", header=False, index=False)
+
+
+def test_respaldo_completo_y_restauracion(datos):
+    nombre, manifiesto = crear_respaldo(incremental=False)
+    assert manifiesto["tipo"] == "completo"
+    assert {a["modo"] for a in manifiesto["archivos"].values()} == {"completo"}
+
+    # Se dañan los datos vivos y se restaura
+    pd.DataFrame({"Tipo": ["IMPO"], "Origen": ["X"], "Destino": ["Y"], "KM": [1]}).to_csv(RUTA_RUTAS, index=False)
+    os.remove(RUTA_DATOS)
+    restaurados = restaurar_respaldo(nombre)
+
+    assert sorted(restaurados) == sorted(datos)
+    for archivo, contenido in datos.items():
+        assert _leer(archivo) == contenido
+    assert not [a for a in os.listdir(".") if a.endswith(".restaurando")]
+
+
+def test_incremental_guarda_solo_lo_nuevo_y_restaura_la_cadena(datos):
+    completo, _ = crear_respaldo(incremental=False)
+    _anexar_tramo(3)
+    pd.DataFrame({"Parametro": ["Costo Diesel"], "Valor": [26.0]}).to_csv(RUTA_DATOS, index=False)
+    esperado = {archivo: _leer(archivo) for archivo in datos}
+
+    incremental, manifiesto = crear_respaldo(incremental=True)
+    modos = {clave: a["modo"] for clave, a in manifiesto["archivos"].items()}
+    assert manifiesto["base"] == completo
+    assert modos == {RUTA_RUTAS: "sin_cambios", RUTA_PROG: "anexo", RUTA_DATOS: "completo"}
+
+    _anexar_tramo(4)
+    os.remove(RUTA_RUTAS)
+    restaurar_respaldo(incremental)
+    for archivo, contenido in esperado.items():
+        assert _leer(archivo) == contenido
+
+    # El completo sigue sirviendo para volver más atrás
+    restaurar_respaldo(completo)
+    for archivo, contenido in datos.items():
+        assert _leer(archivo) == contenido
+
+
+def test_incremental_sin_cambios_no_copia_nada(datos):
+    crear_respaldo(incremental=False)
+    nombre, manifiesto = crear_respaldo(incremental=True)
+    assert {a["modo"] for a in manifiesto["archivos"].values()} == {"sin_cambios"}
+    with zipfile.ZipFile(os.path.join(RUTA_RESPALDOS, nombre)) as zf:
+        assert zf.namelist() == [MANIFIESTO]
+
+
+def test_manifiesto_con_ruta_ajena_no_restaura_nada(datos):
+    nombre, _ = crear_respaldo(incremental=False)
+    ruta_zip = os.path.join(RUTA_RESPALDOS, nombre)
+    manifiesto = leer_manifiesto(ruta_zip)
+    manifiesto["archivos"]["../fuera.csv"] = manifiesto["archivos"][RUTA_RUTAS]
+    with zipfile.ZipFile(ruta_zip) as zf:
+        miembros = {m: zf.read(m) for m in zf.namelist() if m != MANIFIESTO}
+    with zipfile.ZipFile(ruta_zip, "w") as zf:
+        for miembro, contenido in miembros.items():
+            zf.writestr(miembro, contenido)
+        zf.writestr(MANIFIESTO, json.dumps(manifiesto))
+    pd.DataFrame({"Tipo": ["IMPO"], "Origen": ["X"], "Destino": ["Y"], "KM": [1]}).to_csv(RUTA_RUTAS, index=False)
+    cambiado = _leer(RUTA_RUTAS)
+
+    with pytest.raises(ValueError, match="no permitido"):
+        restaurar_respaldo(nombre)
+    assert _leer(RUTA_RUTAS) == cambiado
+    assert not os.path.exists(os.path.join("..", "fuera.csv"))
@@ -0,0 +1,44 @@
+import pandas as pd
+
+from picus.retornos import cadenas_regreso, filas_de_cierre
+
+
+def _idas(catalogo):
+    idas = catalogo[catalogo["Tipo"] == "IMPO"].assign(
+        Número_Trafico="T1", Unidad="U1", Operador="OP1", ID_Programacion="T1_2025-01-15")
+    return idas.set_axis(idas["ID_Programacion"].to_numpy())
+
+
+def test_elige_la_cadena_de_mayor_utilidad(catalogo):
+    mejores = cadenas_regreso(_idas(catalogo), catalogo, k=1)
+    assert len(mejores) == 1
+    # VACIO (-500) + EXPO desde Nuevo Laredo (+6000) supera al regreso directo (+3000)
+    assert mejores.loc[0, "idx_vacio"] == 3
+    assert mejores.loc[0, "Utilidad"] == 4000 - 500 + 6000
+
+
+def test_sin_rutas_vacio_devuelve_las_mismas_columnas(catalogo):
+    sin_vacio = catalogo[catalogo["Tipo"] != "VACIO"]
+    con_vacio = cadenas_regreso(_idas(catalogo), catalogo)
+    mejores = cadenas_regreso(_idas(catalogo), sin_vacio, k=1)
+
+    assert set(con_vacio.columns) == set(mejores.columns)
+    assert mejores["idx_vacio"].isna().all()
+    assert mejores.loc[0, "Utilidad"] == 4000 + 3000
+    # Lo que arma la página de Programación para la tabla de cierre
+    vacio = (mejores["Origen_vacio"] + " → " + mejores["Destino_vacio"]).fillna("-")
+    assert vacio.tolist() == ["-"]
+
+
+def test_cierre_sin_vacio_solo_agrega_el_regreso(catalogo):
+    sin_vacio = catalogo[catalogo["Tipo"] != "VACIO"]
+    idas = _idas(catalogo)
+    filas = filas_de_cierre(idas, cadenas_regreso(idas, sin_vacio, k=1), sin_vacio)
+    assert filas["Tramo"].tolist() == ["VUELTA"]
+    assert filas.loc[0, "Cliente"] == "B"
+    assert filas.loc[0, "ID_Programacion"] == "T1_2025-01-15"
+
+
+def test_sin_regresos_devuelve_vacio(catalogo):
+    assert cadenas_regreso(_idas(catalogo), catalogo[catalogo["Tipo"] == "IMPO"]).empty
+    assert cadenas_regreso(pd.DataFrame(), catalogo).empty
@@ -33,6 +33,8 @@ st.markdown("""
 - **🚚 Programación de Viajes:** Registrar tráficos por fecha
 - **🗂️ Gestión de Rutas:** Editar o eliminar rutas
 - **📂 Archivos:** Respaldar o restaurar información
+- **🎲 Sensibilidad:** Riesgo del margen ante diesel, tipo de cambio y rendimiento
+- **🩺 Diagnóstico:** Tiempos por página y estado del proceso
 """)
 
 st.info("Selecciona una opción desde el menú lateral para comenzar")